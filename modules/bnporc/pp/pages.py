@@ -651,7 +651,7 @@ def iter_coming(self):
             tr.vdate = parse_french_date(op.get('valueDate'))
             tr.rdate = NotAvailable
             tr.raw = CleanText().filter(op.get('libelle'))
-            parse_with_patterns(tr.raw, tr, Transaction.PATTERNS)
+            parse_with_patterns(tr.raw, tr, Transaction.get_patterns_matcher())
 
             if tr.type == Transaction.TYPE_CARD:
                 tr.type = self.browser.card_to_transaction_type.get(op.get('keyCarte'), Transaction.TYPE_DEFERRED_CARD)
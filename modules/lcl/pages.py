@@ -717,7 +717,7 @@ def fix_transaction_stuff(self, obj, tr_page):
         # Some transactions have no details, but we can find the type of the transaction,
         # the label and the category from the raw label.
         if obj.type == Transaction.TYPE_UNKNOWN:
-            parse_with_patterns(obj.raw, obj, Transaction.PATTERNS)
+            parse_with_patterns(obj.raw, obj, Transaction.get_patterns_matcher())
 
     @pagination
     def get_operations(self, date_guesser):
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright(C) 2021 The Woob Team
+#
+# This file is part of woob.
+#
+# woob is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# woob is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with woob. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Measure time and memory used to create, copy and export capability objects,
+as a module does when it parses a long history of transactions.
+
+    PYTHONPATH=. python3 tools/bench_baseobject.py --count 100000
+"""
+
+from __future__ import print_function
+
+import argparse
+import datetime
+import gc
+import time
+import tracemalloc
+import warnings
+from decimal import Decimal
+
+from woob.capabilities.bank import Transaction
+
+
+def create(count):
+    date = datetime.date(2021, 1, 1)
+    objects = []
+    for i in range(count):
+        tr = Transaction(str(i))
+        tr.date = date
+        tr.rdate = date
+        tr.amount = Decimal('-12.50')
+        tr.label = u'CARTE X1234 %d' % i
+        tr.raw = u'CARTE X1234 12/01 %d' % i
+        tr.type = Transaction.TYPE_CARD
+        tr._coming = False
+        objects.append(tr)
+    return objects
+
+
+def measure(name, func, *args):
+    gc.collect()
+    start = time.perf_counter()
+    result = func(*args)
+    print('%-10s %8.3f s' % (name, time.perf_counter() - start))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--count', type=int, default=100000, help='number of objects')
+    parser.add_argument('--memory-count', type=int, default=10000,
+                        help='number of objects created to measure memory, as tracing allocations is slow')
+    args = parser.parse_args()
+
+    warnings.simplefilter('ignore')
+
+    tracemalloc.start()
+    objects = create(args.memory_count)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print('%-10s %8.2f KiB per object' % ('memory', size / 1024. / len(objects)))
+    del objects
+
+    objects = measure('create', create, args.count)
+    measure('copy', lambda: [obj.copy() for obj in objects])
+    measure('to_dict', lambda: [obj.to_dict() for obj in objects])
+    measure('read', lambda: [(obj.amount, obj.label, obj.date, obj.category) for obj in objects])
+
+
+if __name__ == '__main__':
+    main()
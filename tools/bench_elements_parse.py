@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright(C) 2021 The Woob Team
+#
+# This file is part of woob.
+#
+# woob is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# woob is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with woob. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Measure the time taken by elements to parse a large HTML table.
+
+Run it on two revisions to compare them:
+
+    PYTHONPATH=. python3 tools/bench_elements_parse.py --rows 10000
+"""
+
+from __future__ import print_function
+
+import argparse
+import time
+
+from lxml.html import fromstring
+
+from woob.browser.elements import ItemElement, TableElement
+from woob.browser.filters.html import TableCell
+from woob.browser.filters.standard import CleanDecimal, CleanText, Env
+from woob.capabilities.base import BaseObject, DecimalField, StringField
+from woob.tools.log import getLogger
+
+
+class Row(BaseObject):
+    label = StringField('Label')
+    amount = DecimalField('Amount')
+    category = StringField('Category')
+
+
+class Page(object):
+    def __init__(self, doc):
+        self.doc = doc
+        self.params = {'category': 'bench'}
+        self.logger = getLogger('page')
+
+
+class RowsElement(TableElement):
+    head_xpath = '//table/thead/tr/th'
+    item_xpath = '//table/tbody/tr'
+
+    col_id = 'Id'
+    col_label = 'Label'
+    col_amount = 'Amount'
+
+    class item(ItemElement):
+        klass = Row
+
+        obj_id = CleanText(TableCell('id'))
+        obj_label = CleanText(TableCell('label'))
+        obj_amount = CleanDecimal.French(TableCell('amount'))
+        obj_category = Env('category')
+
+
+def build_doc(rows):
+    html = ['<table><thead><tr><th>Id</th><th>Label</th><th>Amount</th></tr></thead><tbody>']
+    for i in range(rows):
+        html.append('<tr><td>%d</td><td> row  %d </td><td>%d,%02d</td></tr>' % (i, i, i, i % 100))
+    html.append('</tbody></table>')
+    return fromstring(''.join(html))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark parsing of a table with elements.')
+    parser.add_argument('--rows', type=int, default=10000, help='number of rows of the table')
+    parser.add_argument('--repeat', type=int, default=5, help='number of parses, the best one is kept')
+    args = parser.parse_args()
+
+    doc = build_doc(args.rows)
+    timings = []
+    for _ in range(args.repeat):
+        start = time.time()
+        count = sum(1 for _ in RowsElement(Page(doc))())
+        timings.append(time.time() - start)
+        assert count == args.rows
+
+    best = min(timings)
+    print('%d rows: best %.3fs, %.1f µs per row' % (args.rows, best, best * 1e6 / args.rows))
+
+
+if __name__ == '__main__':
+    main()
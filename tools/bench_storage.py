@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright(C) 2021 The Woob Team
+#
+# This file is part of woob.
+#
+# woob is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# woob is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with woob. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Compare the cost of loading and saving backend states with the storages
+of woob.tools.storage.
+
+    PYTHONPATH=. python3 tools/bench_storage.py --backends 1 50 500
+"""
+
+from __future__ import print_function
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+from woob.tools.backend import BackendStorage
+from woob.tools.storage import ShardedStorage, SQLiteStorage, StandardStorage
+
+
+STORAGES = [StandardStorage, ShardedStorage, SQLiteStorage]
+
+
+def make_state(i):
+    # roughly what a browser state looks like
+    return {
+        'url': 'https://example.org/account/%d' % i,
+        'expire': '2021-01-01 00:00:00',
+        'cookies': 'x' * 4000,
+        'data': {'token': '%032x' % i, 'ids': list(range(20))},
+    }
+
+
+def populate(path, count):
+    storage = StandardStorage(path)
+    for i in range(count):
+        backend = BackendStorage('backend%d' % i, storage)
+        backend.load({})
+        backend.set('browser_state', make_state(i))
+    storage.save('backends', None)
+
+
+def bench(klass, path, count):
+    start = time.time()
+    storage = klass(path)
+    backends = []
+    for i in range(count):
+        backend = BackendStorage('backend%d' % i, storage)
+        backend.load({'browser_state': {}})
+        backends.append(backend)
+    load = time.time() - start
+
+    # what happens when every backend is deinit
+    start = time.time()
+    for i, backend in enumerate(backends):
+        state = make_state(i)
+        state['expire'] = '2021-01-02 00:00:00'
+        backend.set('browser_state', state)
+        backend.save()
+    save = (time.time() - start) / count
+
+    if hasattr(storage, 'close'):
+        storage.close()
+    return load, save
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark storages of backend data.')
+    parser.add_argument('--backends', type=int, nargs='+', default=[1, 50, 500], help='numbers of backends')
+    args = parser.parse_args()
+
+    print('%-16s %8s %12s %16s' % ('storage', 'backends', 'load (ms)', 'save (ms/backend)'))
+    for count in args.backends:
+        for klass in STORAGES:
+            dirname = tempfile.mkdtemp(prefix='woob_bench_')
+            try:
+                path = os.path.join(dirname, 'bench.storage')
+                populate(path, count)
+                # the first run of the new storages migrates data of the legacy file
+                if klass is not StandardStorage:
+                    bench(klass, path, count)
+                load, save = bench(klass, path, count)
+            finally:
+                shutil.rmtree(dirname)
+            print('%-16s %8d %12.1f %16.2f' % (klass.__name__, count, load * 1000, save * 1000))
+
+
+if __name__ == '__main__':
+    main()
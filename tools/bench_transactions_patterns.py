@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright(C) 2021 The Woob Team
+#
+# This file is part of woob.
+#
+# woob is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# woob is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with woob. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Measure the time spent to parse transaction labels with the PATTERNS of the
+bank modules, by trying every pattern in order and with the matcher of
+FrenchTransaction, and check that both give the same results.
+
+    PYTHONPATH=. python3 tools/bench_transactions_patterns.py --repeat 20
+"""
+
+from __future__ import print_function
+
+import argparse
+import datetime
+import importlib
+import os
+import pkgutil
+import sys
+import time
+import warnings
+
+from woob.capabilities.base import NotAvailable
+from woob.exceptions import ParseError
+from woob.tools.capabilities.bank.transactions import FrenchTransaction, PatternsMatcher, parse_with_patterns
+
+
+MODULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'modules')
+
+# Labels as displayed by french banks, in the forms the modules patterns
+# are written for.
+LABELS = [
+    u'VIR SEPA RECU /DE M JEAN DUPONT /MOTIF LOYER JANVIER',
+    u'VIREMENT EN VOTRE FAVEUR SALAIRE DECEMBRE',
+    u'VIR INST RE 1234567 DE: DUPONT JEAN',
+    u'VIRT. M DUPONT',
+    u'PRLV SEPA FREE MOBILE FM123456789',
+    u'PRELEVEMENT EDF CLIENTS PARTICULIERS',
+    u'PRLV EUROPEEN SEPA ORANGE',
+    u'Plt ASSURANCE HABITATION',
+    u'CARTE X1234 12/01 CARREFOUR MARKET',
+    u'CB CARREFOUR MARKET 12/01/21',
+    u'CB  CARREFOUR MARKET FACT 120121',
+    u'PAIEMENT CB 1201 PARIS MONOPRIX CARTE 12345678',
+    u'PAIEMENT PAR CARTE X1234 AMAZON EU 12/01',
+    u'PAIEMENT PSC 1201 PARIS SNCF CARTE 12345678',
+    u'MONOPRIX 12345678 PAIEMENT CB 1201 PARIS',
+    u'FACTURE CARTE DU 120121 AMAZON PAYMENTS CARTE 4974XXXXXXXX1234',
+    u'ACHAT CB LEROY MERLIN 12.01.21 CARTE NO 123',
+    u'Regroupement 3 PAIEMENTS 1201 SNCF CARTE 12345678',
+    u'RELEVE CARTE 1234 DEC 2020',
+    u'RETRAIT DAB 1201 PARIS OPERA CARTE 12345678',
+    u'RETRAIT DAB 12/01/21 PARIS',
+    u'12/01/2021 RETRAIT DAB BNP PARIBAS',
+    u'RET DAB 1201 PARIS CARTE 1234',
+    u'RETRAIT 12/01 BNP PARIS',
+    u'CHEQUE 1234567',
+    u'CHEQUE',
+    u'CHQ. 1234567',
+    u'REMISE CHEQUES 1234567',
+    u'REM CHQ 1234567',
+    u'REMISE CB 1201 MAGASIN',
+    u'VERSEMENT ESPECES',
+    u'VERSEMT PERIOD',
+    u'COTIS. CARTE VISA PREMIER',
+    u'F COTIS. EUROCOMPTE',
+    u'COTISATION JAZZ',
+    u'FRAIS TENUE DE COMPTE',
+    u'COMMISSION INTERVENTION',
+    u'INTERETS DEBITEURS',
+    u'INTERETS CREDITEURS 2020',
+    u'AGIOS DECEMBRE',
+    u'EXT.AGIOS',
+    u'PREL.SOC. 2020',
+    u'FACTURE SGT 1234',
+    u'ECHEANCE PRET 12345678',
+    u'ÉCHÉANCE PRET IMMOBILIER',
+    u'Echéance prêt',
+    u'REMBOURSEMENT DE PRET',
+    u'AVOIR CARTE 1201 AMAZON',
+    u'ANNULATION VIREMENT',
+    u'DEBIT MENSUEL CARTE',
+    u'TIP EDF 123456',
+    u'ECH PRET CAP+IN 12345 ECHEANCE 05/01/21',
+    u'PAIEMENT A L\'ETRANGER 12/01 LONDON',
+    u'SOUSCRIPTION PARTS SOCIALES',
+    u'ACHAT DE TITRES',
+    u'MONTANT A REGULARISER',
+    u'DEPOT ESPECES 1201',
+    u'TRANSFERT SEPA RECU DUPONT',
+    u'01/12 SNCF INTERNET PARIS',
+    u'Transfer from savings account',
+    u'',
+]
+
+
+def find_transaction_classes(module_names=None):
+    """
+    Import modules and get their FrenchTransaction subclasses with patterns.
+    """
+    sys.path.insert(0, MODULES_PATH)
+    classes = []
+    for name in sorted(os.listdir(MODULES_PATH)):
+        if module_names and name not in module_names:
+            continue
+        path = os.path.join(MODULES_PATH, name)
+        if not os.path.isfile(os.path.join(path, '__init__.py')):
+            continue
+
+        for _, submodule, _ in pkgutil.walk_packages([path], '%s.' % name, onerror=lambda name: None):
+            if submodule.endswith('.test'):
+                continue
+            try:
+                package = importlib.import_module(submodule)
+            except Exception as e:
+                print('Skipping %s: %s' % (submodule, e), file=sys.stderr)
+                continue
+
+            for value in vars(package).values():
+                if isinstance(value, type) and issubclass(value, FrenchTransaction) \
+                   and value.__module__ == submodule and value.PATTERNS and value not in classes:
+                    classes.append(value)
+    return classes
+
+
+def parse(klass, patterns, raw):
+    obj = klass()
+    obj.date = obj.rdate = datetime.date(2021, 2, 1)
+    try:
+        parse_with_patterns(raw, obj, patterns)
+    except ParseError as e:
+        return str(e)
+    return (obj.type, obj.label, obj.category, obj.rdate)
+
+
+def measure(classes, get_patterns, repeat):
+    elapsed = 0
+    for klass in classes:
+        patterns = get_patterns(klass)
+        obj = klass()
+        obj.date = obj.rdate = datetime.date(2021, 2, 1)
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for raw in LABELS:
+                try:
+                    parse_with_patterns(raw, obj, patterns)
+                except ParseError:
+                    pass
+        elapsed += time.perf_counter() - start
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=20, help='number of times labels are parsed')
+    parser.add_argument('modules', nargs='*', help='modules to use, all by default')
+    args = parser.parse_args()
+
+    warnings.simplefilter('ignore')
+
+    classes = find_transaction_classes(args.modules)
+    count = sum(len(klass.PATTERNS) for klass in classes)
+    print('%d transaction classes, %d patterns, %d labels' % (len(classes), count, len(LABELS)))
+
+    errors = 0
+    matched = 0
+    for klass in classes:
+        matcher = klass.get_patterns_matcher()
+        for raw in LABELS:
+            expected = parse(klass, klass.PATTERNS, raw)
+            result = parse(klass, matcher, raw)
+            if result != expected:
+                errors += 1
+                print('%s.%s: %r is parsed as %r instead of %r'
+                      % (klass.__module__, klass.__name__, raw, result, expected), file=sys.stderr)
+            elif isinstance(expected, tuple) and expected[0] not in (NotAvailable, FrenchTransaction.TYPE_UNKNOWN):
+                matched += 1
+    print('%d parsed labels have a type, %d differences' % (matched, errors))
+
+    start = time.perf_counter()
+    for klass in classes:
+        PatternsMatcher(klass.PATTERNS)
+    print('%-10s %8.3f s' % ('build', time.perf_counter() - start))
+
+    print('%-10s %8.3f s' % ('sequence', measure(classes, lambda klass: klass.PATTERNS, args.repeat)))
+    print('%-10s %8.3f s' % ('matcher', measure(classes, lambda klass: klass.get_patterns_matcher(), args.repeat)))
+    return 1 if errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+
+# Copyright(C) 2021 The Woob Team
+#
+# This file is part of woob.
+#
+# woob is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# woob is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with woob. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Compare the cost of URL.build() with the previous implementation, which
+normalized every regexp at each call, on URL definitions found in modules.
+
+Usage: tools/bench_url_build.py [MODULES_DIR]
+"""
+
+import ast
+import os
+import re
+import sys
+import timeit
+
+from woob.browser.url import URL, UrlNotResolvable
+from woob.tools.misc import to_unicode
+from woob.tools.regex_helper import normalize
+
+
+class FakeBrowser(object):
+    BASEURL = 'https://example.org/'
+
+    def absurl(self, uri, base=None):
+        return uri
+
+
+def legacy_build(url, kwargs):
+    patterns = []
+    for regexp in url.urls:
+        patterns += normalize(regexp)
+
+    for pattern, _ in patterns:
+        result = pattern
+        args = kwargs.copy()
+        for key in list(args.keys()):
+            search = '%%(%s)s' % key
+            if search in pattern:
+                result = result.replace(search, to_unicode(args.pop(key)))
+        if re.search(r'%\([A-z_]+\)s', result):
+            continue
+        if len(args):
+            continue
+        return result
+
+    raise UrlNotResolvable()
+
+
+def iter_url_definitions(modules_dir):
+    for root, _, files in os.walk(modules_dir):
+        for filename in files:
+            if not filename.endswith('.py'):
+                continue
+            with open(os.path.join(root, filename)) as fd:
+                try:
+                    tree = ast.parse(fd.read())
+                except SyntaxError:
+                    continue
+
+            for node in ast.walk(tree):
+                if not isinstance(node, ast.Call) or getattr(node.func, 'id', None) != 'URL':
+                    continue
+                patterns = [arg.value for arg in node.args
+                            if isinstance(arg, ast.Constant) and isinstance(arg.value, str)]
+                if patterns:
+                    yield patterns
+
+
+def main():
+    modules_dir = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(__file__), '..', 'modules')
+    browser = FakeBrowser()
+
+    calls = []
+    for patterns in iter_url_definitions(modules_dir):
+        url = URL(*patterns)
+        url.browser = browser
+        try:
+            templates = url.get_build_templates()
+        except Exception:
+            # some regexps are not reversible
+            continue
+        for _, _, _, names in templates:
+            kwargs = {name: 'v%d' % i for i, name in enumerate(sorted(names))}
+            try:
+                expected = legacy_build(url, kwargs)
+            except UrlNotResolvable:
+                continue
+            assert url.build(**kwargs) == expected, (url.urls, kwargs)
+            calls.append((url, kwargs))
+
+    print('%d URL.build() calls from %s' % (len(calls), modules_dir))
+
+    def run_legacy():
+        for url, kwargs in calls:
+            legacy_build(url, kwargs)
+
+    def run_cached():
+        for url, kwargs in calls:
+            url.build(**kwargs)
+
+    for name, func in (('legacy', run_legacy), ('cached', run_cached)):
+        duration = min(timeit.repeat(func, number=10, repeat=3)) / 10
+        print('%-8s %8.2f ms per pass, %6.2f us per call' % (name, duration * 1000, duration * 1e6 / len(calls)))
+
+
+if __name__ == '__main__':
+    main()
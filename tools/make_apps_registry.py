@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright(C) 2021 The Woob Team
+#
+# This file is part of woob.
+#
+# woob is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# woob is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with woob. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Generate woob/applications/main/registry.py, used by the woob launcher to
+list applications without importing them.
+
+Applications are read from their source code, so this script has no
+dependencies.
+"""
+
+import argparse
+import ast
+import os
+import sys
+
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+APPLICATIONS_PATH = os.path.join(ROOT, 'woob', 'applications')
+REGISTRY_PATH = os.path.join(APPLICATIONS_PATH, 'main', 'registry.py')
+
+# max-line-length of flake8 in setup.cfg
+MAX_LINE_LENGTH = 120
+
+HEADER = '''# -*- coding: utf-8 -*-
+
+# This file is generated by tools/make_apps_registry.py, do not edit it.
+
+# name: (APPNAME, SHORT_DESCRIPTION, module, class)
+APPLICATIONS = {
+'''
+
+
+def parse(filename):
+    with open(filename, 'rb') as f:
+        return ast.parse(f.read(), filename)
+
+
+def get_literal(tree, name):
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(isinstance(t, ast.Name) and t.id == name for t in node.targets):
+            return ast.literal_eval(node.value)
+    raise ValueError('%s is not defined' % name)
+
+
+def read_application(name):
+    package = 'woob.applications.%s' % name
+    init = parse(os.path.join(APPLICATIONS_PATH, name, '__init__.py'))
+    klass = get_literal(init, '__all__')[0]
+
+    for node in init.body:
+        if isinstance(node, ast.ImportFrom) and node.level == 1 and any(a.name == klass for a in node.names):
+            module = node.module
+            break
+    else:
+        raise ValueError('%s is not imported in %s' % (klass, package))
+
+    tree = parse(os.path.join(APPLICATIONS_PATH, name, '%s.py' % module.replace('.', os.sep)))
+    for node in tree.body:
+        if isinstance(node, ast.ClassDef) and node.name == klass:
+            return (get_literal(node, 'APPNAME'),
+                    get_literal(node, 'SHORT_DESCRIPTION'),
+                    package,
+                    klass)
+    raise ValueError('class %s is not found in %s.%s' % (klass, package, module))
+
+
+def format_application(name, application):
+    line = '    %r: %r,' % (name, application)
+    if len(line) <= MAX_LINE_LENGTH:
+        return line + '\n'
+
+    # put the module and the class on a second line
+    start = '    %r: (' % name
+    return '%s%s,\n%s%s),\n' % (start, ', '.join(map(repr, application[:2])),
+                                ' ' * len(start), ', '.join(map(repr, application[2:])))
+
+
+def generate():
+    lines = [HEADER]
+    for name in sorted(os.listdir(APPLICATIONS_PATH)):
+        if name == 'main' or not os.path.isfile(os.path.join(APPLICATIONS_PATH, name, '__init__.py')):
+            continue
+        try:
+            lines.append(format_application(name, read_application(name)))
+        except (IOError, SyntaxError, ValueError) as e:
+            # the launcher imports the applications missing in the registry
+            print('Skipping application %s: %s' % (name, e), file=sys.stderr)
+    lines.append('}\n')
+    return ''.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--check', action='store_true', help='only check that the registry is up to date')
+    args = parser.parse_args()
+
+    content = generate()
+    if args.check:
+        with open(REGISTRY_PATH) as f:
+            if f.read() != content:
+                print('%s is outdated, run %s' % (os.path.relpath(REGISTRY_PATH), sys.argv[0]), file=sys.stderr)
+                return 1
+        return 0
+
+    with open(REGISTRY_PATH, 'w') as f:
+        f.write(content)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -26,8 +26,6 @@
 from dateutil.parser import parse as parse_date
 from decimal import Decimal, InvalidOperation
 
-from woob.browser.browsers import APIBrowser
-from woob.browser.profiles import Woob
 from woob.exceptions import (
     BrowserHTTPError, CaptchaQuestion, DecoupledValidation,
     AppValidationCancelled, AppValidationExpired,
@@ -930,6 +928,10 @@ def do_budgea(self, line):
 
         https://www.budgea.com
         """
+        # the browser stack is only needed here, don't import it at startup
+        from woob.browser.browsers import APIBrowser
+        from woob.browser.profiles import Woob
+
         username, password = self.parse_command_args(line, 2, 2)
 
         client = APIBrowser(baseurl='https://budgea.biapi.pro/2.0/',
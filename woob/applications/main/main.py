@@ -25,6 +25,9 @@
 
 from woob import __name__, __version__, __copyright__
 import woob.applications
+from woob.tools.importtime import profile_imports_from_env
+
+from .registry import APPLICATIONS
 
 
 class WoobMain(object):
@@ -39,9 +42,32 @@ def list_apps(cls):
 
     @classmethod
     def load_app(cls, app):
+        if app in APPLICATIONS:
+            _, _, module, klass = APPLICATIONS[app]
+            return getattr(importlib.import_module(module), klass)
+
         app_module = importlib.import_module("woob.applications.%s" % app)
         return getattr(app_module, app_module.__all__[0])
 
+    @classmethod
+    def get_app_description(cls, app):
+        """
+        Get name and short description of an application.
+
+        They are read from the registry generated by
+        tools/make_apps_registry.py, so the application is imported only if
+        it is missing from it.
+
+        :param app: name of the application package
+        :type app: str
+        :rtype: tuple[str, str]
+        """
+        if app in APPLICATIONS:
+            return APPLICATIONS[app][:2]
+
+        app_class = cls.load_app(app)
+        return app_class.APPNAME, app_class.SHORT_DESCRIPTION
+
     @classmethod
     def run_app(cls, app, args):
         app_class = cls.load_app(app)
@@ -53,8 +79,7 @@ def print_list(cls, app_list):
         print()
         print('Use one of this commands:')
         for app in app_list:
-            app_class = cls.load_app(app)
-            print('   %-15s %s' % (app_class.APPNAME, app_class.SHORT_DESCRIPTION))
+            print('   %-15s %s' % cls.get_app_description(app))
         print()
         print('For more information about a command, use:')
         print('   $ man woob-<command>')
@@ -67,6 +92,8 @@ def print_version(cls):
 
     @classmethod
     def run(cls):
+        profile_imports_from_env()
+
         app_list = cls.list_apps()
 
         if len(sys.argv) < 2 or sys.argv[1] == '--help':
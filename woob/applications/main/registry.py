@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+
+# This file is generated by tools/make_apps_registry.py, do not edit it.
+
+# name: (APPNAME, SHORT_DESCRIPTION, module, class)
+APPLICATIONS = {
+    'bands': ('bands', 'display bands and suggestions', 'woob.applications.bands', 'Appbands'),
+    'bank': ('bank', 'manage bank accounts', 'woob.applications.bank', 'Appbank'),
+    'bill': ('bill', 'get/download documents and bills', 'woob.applications.bill', 'AppBill'),
+    'books': ('books', 'manage rented books', 'woob.applications.books', 'AppBooks'),
+    'bugtracker': ('bugtracker', 'manage bug tracking issues', 'woob.applications.bugtracker', 'AppBugTracker'),
+    'calendar': ('calendar', 'see upcoming events', 'woob.applications.calendar', 'AppCalendar'),
+    'cinema': ('cinema', 'search movies and persons around cinema', 'woob.applications.cinema', 'AppCinema'),
+    'cli': ('cli', 'call a method on backends', 'woob.applications.cli', 'AppCli'),
+    'config': ('config', 'manage backends or register new accounts', 'woob.applications.config', 'AppConfig'),
+    'contentedit': ('contentedit', 'manage websites content', 'woob.applications.contentedit', 'AppContentEdit'),
+    'dating': ('dating', 'interact with dating websites', 'woob.applications.dating', 'AppDating'),
+    'debug': ('debug', 'debug backends', 'woob.applications.debug', 'AppDebug'),
+    'gallery': ('gallery', 'browse and download web image galleries', 'woob.applications.gallery', 'AppGallery'),
+    'gauge': ('gauge', 'display sensors and gauges values', 'woob.applications.gauge', 'AppGauge'),
+    'geolocip': ('geolocip', 'geolocalize IP addresses', 'woob.applications.geolocip', 'AppGeolocIP'),
+    'housing': ('housing', 'search for housing', 'woob.applications.housing', 'AppHousing'),
+    'job': ('job', 'search for a job', 'woob.applications.job', 'AppJob'),
+    'lyrics': ('lyrics', 'search and display song lyrics', 'woob.applications.lyrics', 'AppLyrics'),
+    'money': ('money', 'import bank accounts into Microsoft Money', 'woob.applications.money', 'AppMoney'),
+    'msg': ('msg', 'send and receive message threads', 'woob.applications.msg', 'AppMsg'),
+    'parcel': ('parcel', 'manage your parcels', 'woob.applications.parcel', 'AppParcel'),
+    'paste': ('paste', 'post and get pastes from pastebins', 'woob.applications.paste', 'AppPaste'),
+    'pricecompare': ('pricecompare', 'compare products', 'woob.applications.pricecompare', 'AppPriceCompare'),
+    'radio': ('radio', 'search, show or listen to radio stations', 'woob.applications.radio', 'AppRadio'),
+    'recipes': ('recipes', 'search and consult recipes', 'woob.applications.recipes', 'AppRecipes'),
+    'repos': ('repos', 'manage a woob repository', 'woob.applications.repos', 'AppWoobRepos'),
+    'rpg': ('rpg', 'manage RPG data', 'woob.applications.rpg', 'AppRPG'),
+    'shop': ('shop', 'obtain details and status of e-commerce orders', 'woob.applications.shop', 'AppShop'),
+    'smtp': ('smtp', 'daemon to send and check messages', 'woob.applications.smtp', 'AppSmtp'),
+    'subtitles': ('subtitles', 'search and download subtitles', 'woob.applications.subtitles', 'AppSubtitles'),
+    'torrent': ('torrent', 'search and download torrents', 'woob.applications.torrent', 'AppTorrent'),
+    'translate': ('translate', 'translate text from one language to another',
+                  'woob.applications.translate', 'AppTranslate'),
+    'travel': ('travel', 'search for train stations and departures', 'woob.applications.travel', 'AppTravel'),
+    'video': ('video', 'search and play videos', 'woob.applications.video', 'AppVideo'),
+    'weather': ('weather', 'display weather and forecasts', 'woob.applications.weather', 'AppWeather'),
+}
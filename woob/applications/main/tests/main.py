@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+
+# Copyright(C) 2021 The Woob Team
+#
+# This file is part of woob.
+#
+# woob is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# woob is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with woob. If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import subprocess
+import sys
+from unittest import TestCase, skipUnless
+
+import woob
+from woob.applications.main.main import WoobMain
+from woob.applications.main.registry import APPLICATIONS
+
+
+MAKE_REGISTRY = os.path.join(os.path.dirname(woob.__file__), os.pardir, 'tools', 'make_apps_registry.py')
+
+
+class RegistryTest(TestCase):
+    def setUp(self):
+        self.applications = dict(APPLICATIONS)
+
+    def tearDown(self):
+        APPLICATIONS.clear()
+        APPLICATIONS.update(self.applications)
+
+    # Check that applications in the registry are described without importing them
+    def test_registry(self):
+        APPLICATIONS['woobtestapp'] = ('testapp', 'test application', 'woob.applications.woobtestapp', 'AppTest')
+        self.assertEqual(WoobMain.get_app_description('woobtestapp'), ('testapp', 'test application'))
+
+        app_class = WoobMain.load_app('bank')
+        self.assertEqual(app_class.__name__, APPLICATIONS['bank'][3])
+        self.assertEqual(WoobMain.get_app_description('bank'), APPLICATIONS['bank'][:2])
+
+    # Check that applications missing from the registry are imported
+    def test_missing(self):
+        expected = APPLICATIONS.pop('bank')
+        app_class = WoobMain.load_app('bank')
+        self.assertEqual(app_class.__name__, expected[3])
+        self.assertEqual(WoobMain.get_app_description('bank'), expected[:2])
+
+        self.assertRaises(ImportError, WoobMain.load_app, 'woobtestmissing')
+
+    # Check that the registry is up to date with the sources of applications
+    @skipUnless(os.path.isfile(MAKE_REGISTRY), 'tools/make_apps_registry.py is not available')
+    def test_up_to_date(self):
+        process = subprocess.run([sys.executable, MAKE_REGISTRY, '--check'], stderr=subprocess.PIPE)
+        self.assertEqual(process.returncode, 0, process.stderr)
@@ -24,7 +24,6 @@
 import re
 import pickle
 import base64
-import io
 from hashlib import sha256
 import zlib
 from functools import reduce
@@ -55,18 +54,17 @@
 
 from woob.tools.log import getLogger
 from woob.tools.compat import basestring, unicode, urlparse, urljoin, urlencode, parse_qsl
-from woob.tools.misc import to_unicode
 from woob.tools.json import json
 from woob.tools.value import Value
-from woob import __version__
 
 from .adapters import HTTPAdapter
 from .cookies import WoobCookieJar
 from .exceptions import HTTPNotFound, ClientError, ServerError
+from .har import HARWriter, get_response_filename
 from .sessions import FuturesSession
 from .profiles import Firefox
 from .pages import NextPage
-from .url import URL, normalize_url
+from .url import URL, URLRouter, normalize_url
 
 
 class Browser(object):
@@ -117,6 +115,31 @@ class Browser(object):
     Example: woob.browser.cookies.BlockAllCookies()
     """
 
+    RESPONSES_QUEUE_SIZE = 100
+    """
+    Maximum of saved responses waiting to be written in the HAR file.
+    When the queue is full, next responses are not saved.
+
+    Browsers saving responses in the same directory share a writer, with
+    the ``RESPONSES_*`` options of the first of them.
+    """
+
+    RESPONSES_MAX_BODY_SIZE = None
+    """
+    Maximum size of response contents saved in the HAR file, in bytes.
+    """
+
+    RESPONSES_MAX_HAR_SIZE = None
+    """
+    Maximum size of a HAR file, in bytes. Next responses are saved in a new file.
+    """
+
+    RESPONSES_SAMPLING = 1
+    """
+    Ratio of successful responses saved in the HAR file, between 0 and 1.
+    Responses with an error status are always saved.
+    """
+
     @classmethod
     def asset(cls, localfile):
         """
@@ -150,10 +173,13 @@ def __init__(self, logger=None, proxy=None, responses_dirname=None, woob=None, p
         self._setup_session(self.PROFILE)
         self.url = None
         self.response = None
-        self.har_bundle = None
+        self.har_writer = None
 
     def deinit(self):
         self.session.close()
+        if self.har_writer is not None:
+            self.har_writer.release()
+            self.har_writer = None
 
     def set_normalized_url(self, response, **kwargs):
         response.url = normalize_url(response.url)
@@ -174,193 +200,26 @@ def save_response(self, response, warning=False, **kwargs):
 
         response_filepath = slug
 
+        # files of the obsolete responses dir are written by the HAR writer thread too
+        filename = None
         if os.environ.get('WOOB_USE_OBSOLETE_RESPONSES_DIR') == '1':
-            import mimetypes
-            # get the content-type, remove optionnal charset part
-            mimetype = response.headers.get('Content-Type', '').split(';')[0]
-            # due to http://bugs.python.org/issue1043134
-            if mimetype == 'text/plain':
-                ext = '.txt'
-            else:
-                # try to get an extension (and avoid adding 'None')
-                ext = mimetypes.guess_extension(mimetype, False) or ''
-
-            filename = '%02d-%d-%s%s' % \
-                (counter, response.status_code, slug, ext)
-
+            filename = get_response_filename(response, counter, slug)
             response_filepath = os.path.join(self.responses_dirname, filename)
 
-            request = response.request
-            with open(response_filepath + '-request.txt', 'w') as f:
-                f.write('%s %s\n\n\n' % (request.method, request.url))
-
-                for key, value in request.headers.items():
-                    f.write('%s: %s\n' % (key, value))
-                if request.body is not None:  # separate '' from None
-                    f.write('\n\n\n%s' % request.body)
-            with open(response_filepath + '-response.txt', 'w') as f:
-                if hasattr(response.elapsed, 'total_seconds'):
-                    f.write('Time: %3.3fs\n' % response.elapsed.total_seconds())
-                f.write('%s %s\n\n\n' % (response.status_code, response.reason))
-                for key, value in response.headers.items():
-                    f.write('%s: %s\n' % (key, value))
-
-            with open(response_filepath, 'wb') as f:
-                f.write(response.content)
-
-            match_filepath = os.path.join(self.responses_dirname, 'url_response_match.txt')
-            with open(match_filepath, 'a') as f:
-                f.write('# %d %s %s\n' % (response.status_code, response.reason, response.headers.get('Content-Type', '')))
-                f.write('%s\t%s\n' % (response.url, filename))
-
-        request = response.request
-
-        if not self.har_bundle:
-            self.har_bundle = {
-                'log': {
-                    'version': '1.2',
-                    'creator': {
-                        'name': 'woob',
-                        'version': __version__,
-                    },
-                    'browser': {
-                        'name': 'woob',
-                        'version': __version__,
-                    },
-                    # there are no pages, but we need that to please firefox
-                    'pages': [{
-                        'id': 'fake_page',
-                        'pageTimings': {},
-                        # and chromium wants some of it too
-                        'startedDateTime': (datetime.now() - response.elapsed).isoformat(),
-                    }],
-                    # don't put additional data after this list, to have a fixed-size suffix after it
-                    # so we can add more entries without rewriting the whole file.
-                    'entries': [],
-                },
-            }
-
-        har_entry = {
-            '$anchor': slug,
-            'startedDateTime': (datetime.now() - response.elapsed).isoformat(),
-            'pageref': 'fake_page',
-            'time': int(response.elapsed.total_seconds() * 1000),
-            'request': {
-                'method': request.method,
-                'url': request.url,
-                'httpVersion': 'HTTP/%.1f' % (response.raw.version / 10.),
-                'headers': [
-                    {
-                        'name': k,
-                        'value': v,
-                    }
-                    for k, v in request.headers.items()
-                ],
-                'queryString': [
-                    {
-                        'name': key,
-                        'value': value,
-                    }
-                    for key, value in parse_qsl(
-                        urlparse(request.url).query,
-                        keep_blank_values=True,
+        if self.har_writer is None:
+            with self.responses_lock:
+                if self.har_writer is None:
+                    self.har_writer = HARWriter.get_shared(
+                        self.responses_dirname,
+                        logger=self.logger,
+                        queue_size=self.RESPONSES_QUEUE_SIZE,
+                        max_body_size=self.RESPONSES_MAX_BODY_SIZE,
+                        max_size=self.RESPONSES_MAX_HAR_SIZE,
+                        sampling=self.RESPONSES_SAMPLING,
                     )
-                ],
-                'cookies': [
-                    {
-                        'name': k,
-                        'value': v,
-                    }
-                    for k, v in request._cookies.items()
-                ],
-                # for chromium
-                'bodySize': -1,
-                'headersSize': -1,
-            },
-            'response': {
-                'status': response.status_code,
-                'statusText': to_unicode(response.reason),
-                'httpVersion': 'HTTP/%.1f' % (response.raw.version / 10.),
-                'headers': [
-                    {
-                        'name': k,
-                        'value': v,
-                    }
-                    for k, v in response.headers.items()
-                ],
-                'content': {
-                    'mimeType': response.headers.get('Content-Type', ''),
-                    'size': len(response.content),
-                    # systematically use base64 to avoid more content alteration
-                    # than there already is...
-                    'encoding': "base64",
-                    'text': base64.b64encode(response.content).decode('ascii'),
-                },
-                'cookies': [
-                    {
-                        'name': k,
-                        'value': v,
-                    }
-                    for k, v in response.cookies.items()
-                ],
-                'redirectURL': response.headers.get('location', ''),
-                # for chromium
-                'bodySize': -1,
-                'headersSize': -1,
-            },
-            'timings': {  # please chromium
-                'send': -1,
-                'wait': -1,
-                'receive': -1,
-            },
-            'cache': {},
-        }
-        if request.body is not None:
-            har_entry['request']['postData'] = {
-                'mimeType': request.headers.get('Content-Type', ''),
-                'params': [],
-            }
-            if isinstance(request.body, str):
-                har_entry['request']['postData']['text'] = request.body
-            else:
-                # HAR format has no proper way to encode posted binary data!
-                har_entry['request']['postData']['text'] = request.body.decode('latin-1')
-                # add a non-standard key to indicate how should "text" be decoded.
-                har_entry['request']['postData']['x-binary'] = True
-
-            if request.headers.get('Content-Type') == 'application/x-www-form-urlencoded':
-                har_entry['request']['postData']['params'] = [
-                    {
-                        "name": key,
-                        "value": value,
-                    } for key, value in parse_qsl(request.body)
-                ]
 
-        with self.responses_lock:
-            self.har_bundle['log']['entries'].append(har_entry)
-
-            har_path = os.path.join(self.responses_dirname, 'bundle.har')
-            if not os.path.isfile(har_path):
-                with open(har_path, 'w') as fd:
-                    json.dump(self.har_bundle, fd, separators=(',', ':'))
-            else:
-                # hack to avoid rewriting the whole file: entries are last in the JSON file
-                # we need to seek at the right place and write the new entry.
-                # this will unfortunately overwrite closings.
-                suffix = "]}}"
-                with open(har_path, 'r+') as fd:
-                    # can't seek with a negative value...
-                    fd.seek(0, io.SEEK_END)
-                    after_entry_pos = fd.tell() - len(suffix)
-                    fd.seek(after_entry_pos)
-
-                    if fd.read(len(suffix)) != suffix:
-                        self.logger.warning('HAR file does not end with the expected pattern')
-                    else:
-                        fd.seek(after_entry_pos)
-                        fd.write(',')  # there should have been at least one entry
-                        json.dump(har_entry, fd, separators=(',', ':'))
-                        fd.write(suffix)
+        if not self.har_writer.add(response, slug, filename):
+            return
 
         msg = u'Response saved to %s' % response_filepath
         if warning:
@@ -852,6 +711,7 @@ def is_property(attr):
             setattr(self, k, v)
         for url in self._urls.values():
             url.browser = self
+        self._router = URLRouter(list(self._urls.values()))
 
     def open(self, *args, **kwargs):
         """
@@ -874,13 +734,10 @@ def internal_callback(response):
                 response.page = page_class(self, response)
                 return callback(response)
 
-            for url in self._urls.values():
-                response.page = url.handle(response)
-                if response.page is not None:
-                    self.logger.debug('Handle %s with %s', response.url, response.page.__class__.__name__)
-                    break
-
-            if response.page is None:
+            response.page = self._router.handle(response, self.BASEURL)
+            if response.page is not None:
+                self.logger.debug('Handle %s with %s', response.url, response.page.__class__.__name__)
+            else:
                 regexp = r'^(?P<proto>\w+)://.*'
 
                 proto_response = re.match(regexp, response.url)
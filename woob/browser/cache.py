@@ -17,7 +17,36 @@
 # You should have received a copy of the GNU Lesser General Public License
 # along with woob. If not, see <http://www.gnu.org/licenses/>.
 
-__all__ = ['CacheMixin']
+import os
+import pickle
+import sqlite3
+from collections import OrderedDict
+from datetime import timedelta
+from email.utils import parsedate_tz, mktime_tz
+from hashlib import sha256
+from threading import Lock
+from time import time
+
+from requests import Response
+from requests.structures import CaseInsensitiveDict
+
+__all__ = ['CacheMixin', 'CacheEntry', 'CacheStats', 'CacheStore', 'MemoryCacheStore', 'SQLiteCacheStore']
+
+
+def parse_cache_control(value):
+    """
+    Parse a Cache-Control header.
+
+    >>> sorted(parse_cache_control('no-cache, max-age=60').items())
+    [('max-age', '60'), ('no-cache', None)]
+    """
+    directives = {}
+    for directive in (value or '').split(','):
+        name, _, arg = directive.partition('=')
+        name = name.strip().lower()
+        if name:
+            directives[name] = arg.strip().strip('"') or None
+    return directives
 
 
 class CacheEntry(object):
@@ -25,16 +54,337 @@ def __init__(self, response):
         self.response = response
         self.etag = response.headers.get('ETag')
         self.last_modified = response.headers.get('Last-Modified')
+        self.size = len(response.content or b'') + sum(len(k) + len(v) for k, v in response.headers.items())
+
+        directives = parse_cache_control(response.headers.get('Cache-Control'))
+        self.no_store = 'no-store' in directives
+        self.expires = self.get_expires(response.headers, directives)
+
+        # request headers the response depends on
+        self.vary = {}
+        for name in response.headers.get('Vary', '').split(','):
+            name = name.strip().lower()
+            if name == '*':
+                self.no_store = True
+            elif name:
+                self.vary[name] = response.request.headers.get(name)
+
+    @staticmethod
+    def get_expires(headers, directives):
+        """
+        Get the timestamp until which a response is fresh.
+
+        :returns: None if the response has to be revalidated
+        :rtype: float
+        """
+        if 'no-cache' in directives:
+            return None
+
+        if directives.get('max-age'):
+            try:
+                return time() + int(directives['max-age'])
+            except ValueError:
+                return None
+
+        if headers.get('Expires'):
+            date = parsedate_tz(headers['Expires'])
+            # an invalid date means the response is already expired
+            return mktime_tz(date) if date else 0
+
+        return None
 
     def has_cache_key(self):
         return (self.etag or self.last_modified)
 
+    def is_storable(self):
+        return not self.no_store and (self.has_cache_key() or self.expires is not None)
+
+    def is_fresh(self):
+        return self.expires is not None and time() < self.expires
+
+    def matches(self, request):
+        """
+        Check the request sends the same headers as the one which got
+        the cached response, for headers listed in `Vary`.
+        """
+        for name, value in self.vary.items():
+            if request.headers.get(name) != value:
+                return False
+        return True
+
     def update_request(self, request):
         if self.last_modified:
             request.headers['If-Modified-Since'] = self.last_modified
         if self.etag:
             request.headers['If-None-Match'] = self.etag
 
+    def revalidate(self, response):
+        """
+        Update the entry from a 304 Not Modified response.
+        """
+        self.etag = response.headers.get('ETag', self.etag)
+        self.last_modified = response.headers.get('Last-Modified', self.last_modified)
+        directives = parse_cache_control(response.headers.get('Cache-Control'))
+        if directives or 'Expires' in response.headers:
+            self.expires = self.get_expires(response.headers, directives)
+
+    def get_response(self, request):
+        if self.response.request is None:
+            self.response.request = request
+        return self.response
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        response = state.pop('response')
+        state['response_state'] = {
+            'status_code': response.status_code,
+            'headers': dict(response.headers),
+            'content': response.content,
+            'url': response.url,
+            'encoding': response.encoding,
+            'reason': response.reason,
+        }
+        return state
+
+    def __setstate__(self, state):
+        response_state = state.pop('response_state')
+        self.__dict__.update(state)
+
+        self.response = Response()
+        self.response.status_code = response_state['status_code']
+        self.response.headers = CaseInsensitiveDict(response_state['headers'])
+        self.response._content = response_state['content']
+        self.response.url = response_state['url']
+        self.response.encoding = response_state['encoding']
+        self.response.reason = response_state['reason']
+        self.response.elapsed = timedelta(0)
+
+
+class CacheStats(object):
+    """
+    Counters of a HTTP cache.
+
+    Counters are also added to the `parent` stats, if any, to aggregate
+    stats of several browsers.
+
+    >>> stats = CacheStats(parent=CacheStats())
+    >>> stats.incr('hits')
+    >>> stats.incr('bytes_saved', 42)
+    >>> stats.parent.as_dict()['bytes_saved']
+    42
+    >>> stats.copy().as_dict()['hits']
+    1
+    """
+
+    FIELDS = ('hits', 'misses', 'revalidations', 'stores', 'evictions', 'bytes_saved')
+
+    def __init__(self, parent=None):
+        self.parent = parent
+        self.lock = Lock()
+        self.counters = dict.fromkeys(self.FIELDS, 0)
+        self.backend = None
+        """
+        Name of the backend the stats come from, if any.
+        """
+
+    def copy(self):
+        """
+        Get a snapshot of counters, which is not updated anymore.
+
+        :rtype: :class:`CacheStats`
+        """
+        stats = CacheStats()
+        stats.counters = self.as_dict()
+        stats.backend = self.backend
+        return stats
+
+    def incr(self, name, value=1):
+        with self.lock:
+            self.counters[name] += value
+        if self.parent is not None:
+            self.parent.incr(name, value)
+
+    def as_dict(self):
+        with self.lock:
+            return self.counters.copy()
+
+    def __str__(self):
+        return ', '.join('%s=%d' % (name, value) for name, value in self.as_dict().items())
+
+
+class CacheStore(object):
+    """
+    Store of :class:`CacheEntry` objects.
+
+    A plain dict can also be used as a store.
+    """
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def __getitem__(self, key):
+        raise NotImplementedError()
+
+    def __setitem__(self, key, entry):
+        raise NotImplementedError()
+
+    def __delitem__(self, key):
+        raise NotImplementedError()
+
+    def __len__(self):
+        raise NotImplementedError()
+
+    def clear(self):
+        raise NotImplementedError()
+
+
+class MemoryCacheStore(CacheStore):
+    """
+    Store entries in memory, and drop the least recently used ones when
+    limits are reached.
+
+    :param max_size: maximum size of the stored responses, in bytes
+    :type max_size: int
+    :param max_entries: maximum number of stored responses
+    :type max_entries: int
+    :param stats: stats where evictions are counted
+    :type stats: :class:`CacheStats`
+    """
+
+    def __init__(self, max_size=None, max_entries=None, stats=None):
+        self.max_size = max_size
+        self.max_entries = max_entries
+        self.stats = stats
+        self.size = 0
+        self.entries = OrderedDict()
+        self.lock = Lock()
+
+    def __getitem__(self, key):
+        with self.lock:
+            entry = self.entries[key]
+            self.entries.move_to_end(key)
+            return entry
+
+    def __setitem__(self, key, entry):
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.size -= old.size
+
+            self.entries[key] = entry
+            self.size += entry.size
+
+            while self.entries and ((self.max_size is not None and self.size > self.max_size)
+                                    or (self.max_entries is not None and len(self.entries) > self.max_entries)):
+                key, old = self.entries.popitem(last=False)
+                self.size -= old.size
+                if self.stats is not None:
+                    self.stats.incr('evictions')
+
+    def __delitem__(self, key):
+        with self.lock:
+            entry = self.entries.pop(key)
+            self.size -= entry.size
+
+    def __len__(self):
+        return len(self.entries)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+
+class SQLiteCacheStore(CacheStore):
+    """
+    Store entries in a SQLite database, which can be shared by several
+    browsers and processes, and kept across runs.
+
+    :param path: path of the database file
+    :type path: str
+    :param max_size: maximum size of the stored responses, in bytes
+    :type max_size: int
+    :param stats: stats where evictions are counted
+    :type stats: :class:`CacheStats`
+    """
+
+    def __init__(self, path, max_size=None, stats=None):
+        self.path = path
+        self.max_size = max_size
+        self.stats = stats
+        self.lock = Lock()
+
+        dirname = os.path.dirname(path)
+        if dirname and not os.path.isdir(dirname):
+            os.makedirs(dirname)
+
+        self.db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self.lock, self.db:
+            self.db.execute('CREATE TABLE IF NOT EXISTS entries ('
+                            'key TEXT PRIMARY KEY, entry BLOB NOT NULL, '
+                            'size INTEGER NOT NULL, accessed REAL NOT NULL)')
+            self.db.execute('CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)')
+
+    @staticmethod
+    def hash_key(key):
+        return sha256(repr(key).encode('utf-8')).hexdigest()
+
+    def __getitem__(self, key):
+        key = self.hash_key(key)
+        with self.lock, self.db:
+            row = self.db.execute('SELECT entry FROM entries WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                raise KeyError(key)
+            self.db.execute('UPDATE entries SET accessed = ? WHERE key = ?', (time(), key))
+        return pickle.loads(row[0])
+
+    def __setitem__(self, key, entry):
+        data = pickle.dumps(entry, pickle.HIGHEST_PROTOCOL)
+        with self.lock, self.db:
+            self.db.execute('INSERT OR REPLACE INTO entries (key, entry, size, accessed) VALUES (?, ?, ?, ?)',
+                            (self.hash_key(key), data, len(data), time()))
+            if self.max_size is not None:
+                self._evict()
+
+    def _evict(self):
+        size, = self.db.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()
+        if size <= self.max_size:
+            return
+
+        keys = []
+        for key, entry_size in self.db.execute('SELECT key, size FROM entries ORDER BY accessed'):
+            keys.append((key,))
+            size -= entry_size
+            if size <= self.max_size:
+                break
+        self.db.executemany('DELETE FROM entries WHERE key = ?', keys)
+        if self.stats is not None:
+            self.stats.incr('evictions', len(keys))
+
+    def __delitem__(self, key):
+        with self.lock, self.db:
+            cursor = self.db.execute('DELETE FROM entries WHERE key = ?', (self.hash_key(key),))
+            if not cursor.rowcount:
+                raise KeyError(key)
+
+    def __len__(self):
+        with self.lock:
+            return self.db.execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+
+    def clear(self):
+        with self.lock, self.db:
+            self.db.execute('DELETE FROM entries')
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
 
 class CacheMixin(object):
     """Mixin to inherit in a Browser"""
@@ -52,47 +402,104 @@ class CacheMixin(object):
     check if a newer version of the page exists.
     If a newer page exists, it is returned instead and overwrites the
     obsolete page in the cache.
+
+    Responses still fresh according to their `Cache-Control: max-age` or
+    `Expires` headers are returned without querying the server.
+    """
+
+    cache_max_size = None
+
+    """Maximum size of the cached responses, in bytes
+
+    If `None`, the cache is not bounded, and no response is ever evicted.
+    """
+
+    cache_path = None
+
+    """Path of a SQLite database where responses are cached
+
+    The database can be shared by several browsers, and kept across runs.
+    If `None`, responses are cached in memory.
+    """
+
+    cache_key_headers = None
+
+    """Names of the request headers used to build cache keys
+
+    If `None`, all headers are used. Headers listed in the `Vary` header
+    of responses are always checked.
     """
 
     def __init__(self, *args, **kwargs):
         super(CacheMixin, self).__init__(*args, **kwargs)
 
-        self.cache = {}
+        self.cache_stats = CacheStats()
+
+        """Counters of cache hits, misses, revalidations, stores, evictions and saved bytes"""
+
+        self.cache = self.create_cache_store()
 
         """Cache store object
 
-        To limit the size of the cache, a :class:`woob.tools.lrudict.LimitedLRUDict`
-        instance can be used.
+        Any :class:`CacheStore` can be used, or a dict. See
+        :meth:`create_cache_store`.
         """
 
+    def create_cache_store(self):
+        """Create the store of cached responses."""
+
+        if self.cache_path:
+            return SQLiteCacheStore(self.cache_path, max_size=self.cache_max_size, stats=self.cache_stats)
+        return MemoryCacheStore(max_size=self.cache_max_size, stats=self.cache_stats)
+
     def make_cache_key(self, request):
         """Make a key for the cache corresponding to the request."""
 
         body = getattr(request, 'body', None)
-        headers = tuple(request.headers.values())
+        if self.cache_key_headers is None:
+            headers = tuple(request.headers.values())
+        else:
+            headers = tuple(request.headers.get(name) for name in self.cache_key_headers)
         return (request.method, request.url, body, headers)
 
+    def get_cache_entry(self, key, request):
+        """Get the cache entry matching the request, if any."""
+
+        entry = self.cache.get(key)
+        if entry is not None and not entry.matches(request):
+            return None
+        return entry
+
     def open_with_cache(self, url, **kwargs):
         """Perform a request using the cache if possible."""
         request = self.build_request(url, **kwargs)
 
         key = self.make_cache_key(request)
-        if key in self.cache:
-            if not self.cache_is_updatable:
+        entry = self.get_cache_entry(key, request)
+        if entry is not None:
+            if not self.cache_is_updatable or entry.is_fresh():
                 self.logger.debug('cache HIT for %r', request.url)
-                return self.cache[key].response
+                self.cache_stats.incr('hits')
+                self.cache_stats.incr('bytes_saved', len(entry.response.content))
+                return entry.get_response(request)
             else:
-                self.cache[key].update_request(request)
+                entry.update_request(request)
 
         response = super(CacheMixin, self).open(request, **kwargs)
-        if response.status_code == 304:
+        if response.status_code == 304 and entry is not None:
             self.logger.debug('cache HIT for %r', request.url)
-            return self.cache[key].response
+            self.cache_stats.incr('revalidations')
+            self.cache_stats.incr('bytes_saved', len(entry.response.content))
+            entry.revalidate(response)
+            self.cache[key] = entry
+            return entry.get_response(request)
         elif response.status_code == 200:
             entry = CacheEntry(response)
-            if entry.has_cache_key():
+            if entry.is_storable():
                 self.logger.debug('storing %r response in cache', request.url)
+                self.cache_stats.incr('stores')
                 self.cache[key] = entry
 
         self.logger.debug('cache MISS for %r', request.url)
+        self.cache_stats.incr('misses')
         return response
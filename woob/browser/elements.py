@@ -19,12 +19,16 @@
 
 from __future__ import print_function
 
+import datetime
 import os
 import re
 import sys
 from collections import OrderedDict
+from collections.abc import MutableMapping
 from copy import deepcopy
+from decimal import Decimal
 import traceback
+from weakref import WeakValueDictionary
 
 import lxml.html
 
@@ -33,16 +37,20 @@
 from woob.browser.pages import NextPage
 from woob.capabilities.base import FetchError
 
+from .filters.base import cssselect as select_css, xpath as select_xpath
 from .filters.standard import _Filter, CleanText
 from .filters.html import AttributeNotFound, XPathNotFound
 
 
 __all__ = [
     'DataError', 'AbstractElement', 'ListElement', 'ItemElement', 'TableElement', 'SkipItem',
-    'ItemElementFromAbstractPage',
+    'ItemElementFromAbstractPage', 'ElementEnv',
 ]
 
 
+FILTERS_LOGGER = getLogger('woob.browser.b2filters')
+
+
 def generate_table_element(doc, head_xpath, cleaner=CleanText):
     """
     Prints generated base code for TableElement/TableCell usage.
@@ -96,6 +104,136 @@ def inner(self, *args, **kwargs):
     return inner
 
 
+class ElementEnv(MutableMapping):
+    """
+    Environment of an element, layered over the environment of its parent.
+
+    Reads fall through to the parent and writes stay local. A mutable value
+    read from the parent is deep-copied in the local layer first, so
+    changing it does not affect the parent, like if the whole environment
+    had been deep-copied when the element was created.
+
+    In the same way, when a key is set or deleted in an environment, its
+    previous value is kept by the children already created. Only changes
+    made in place to a mutable value, or to the page parameters, after
+    the creation of a child are seen by it, if it did not read the value
+    before.
+
+    :param parent: environment of the parent element, or page parameters
+    :type parent: :class:`ElementEnv` or :class:`dict`
+    """
+
+    IMMUTABLE_TYPES = (
+        basestring, bytes, int, float, bool, type(None), Decimal, datetime.date, datetime.time,
+        datetime.timedelta, frozenset,
+    )
+
+    _DELETED = object()
+
+    def __init__(self, parent=None):
+        self._data = {}
+        self._parent = parent
+        self._children = None
+        if isinstance(parent, ElementEnv):
+            # environments are not hashable, as mappings
+            if parent._children is None:
+                parent._children = WeakValueDictionary()
+            parent._children[id(self)] = self
+
+    def _lookup(self, key):
+        env = self
+        while isinstance(env, ElementEnv):
+            if key in env._data:
+                value = env._data[key]
+                if value is self._DELETED:
+                    raise KeyError(key)
+                return value
+            env = env._parent
+
+        if env is None:
+            raise KeyError(key)
+        return env[key]
+
+    def __getitem__(self, key):
+        try:
+            value = self._data[key]
+        except KeyError:
+            value = self._lookup(key)
+            if not isinstance(value, self.IMMUTABLE_TYPES):
+                value = self._data[key] = deepcopy(value)
+            return value
+
+        if value is self._DELETED:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key):
+        try:
+            self._lookup(key)
+        except KeyError:
+            return False
+        return True
+
+    def _snapshot(self, key):
+        if self._children is None:
+            return
+
+        for child in list(self._children.values()):
+            if key in child._data:
+                continue
+
+            try:
+                value = self._lookup(key)
+            except KeyError:
+                value = self._DELETED
+            else:
+                if not isinstance(value, self.IMMUTABLE_TYPES):
+                    value = deepcopy(value)
+            child._data[key] = value
+
+    def __setitem__(self, key, value):
+        self._snapshot(key)
+        self._data[key] = value
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        self._snapshot(key)
+        self._data[key] = self._DELETED
+
+    def _keys(self):
+        if isinstance(self._parent, ElementEnv):
+            keys = self._parent._keys()
+        elif self._parent is not None:
+            keys = OrderedDict.fromkeys(self._parent)
+        else:
+            keys = OrderedDict()
+
+        for key, value in self._data.items():
+            if value is self._DELETED:
+                keys.pop(key, None)
+            else:
+                keys[key] = None
+        return keys
+
+    def __iter__(self):
+        return iter(self._keys())
+
+    def __len__(self):
+        return len(self._keys())
+
+    def __repr__(self):
+        return repr(dict(self))
+
+    def copy(self):
+        """
+        Shallow copy of the environment, as a :class:`dict`.
+
+        :rtype: :class:`dict`
+        """
+        return dict(self)
+
+
 class AbstractElement(object):
     _creation_counter = 0
     condition = None
@@ -110,11 +248,6 @@ def __init__(self, page, parent=None, el=None):
         else:
             self.el = page.doc
 
-        parent_logger = None
-        if self.page:
-            parent_logger = self.page.logger
-        self.logger = getLogger(self.__class__.__name__.lower(), parent_logger)
-
         self.fill_env(page, parent)
 
         # Used by debug
@@ -123,6 +256,39 @@ def __init__(self, page, parent=None, el=None):
 
         self.loaders = {}
 
+    @property
+    def logger(self):
+        """
+        Logger of the element.
+
+        It is only resolved when used, and shared by all the elements of the
+        same class built on a page.
+        """
+        try:
+            return self._logger
+        except AttributeError:
+            pass
+
+        name = self.__class__.__name__.lower()
+        if self.page:
+            try:
+                loggers = self.page._element_loggers
+            except AttributeError:
+                loggers = self.page._element_loggers = {}
+            try:
+                logger = loggers[name]
+            except KeyError:
+                logger = loggers[name] = getLogger(name, self.page.logger)
+        else:
+            logger = getLogger(name)
+
+        self._logger = logger
+        return logger
+
+    @logger.setter
+    def logger(self, logger):
+        self._logger = logger
+
     def use_selector(self, func, key=None):
         if isinstance(func, _Filter):
             func._obj = self
@@ -143,17 +309,54 @@ def parse(self, obj):
         pass
 
     def cssselect(self, *args, **kwargs):
+        if len(args) == 1 and not kwargs:
+            return select_css(self.el, *args)
         return self.el.cssselect(*args, **kwargs)
 
     def xpath(self, *args, **kwargs):
+        if len(args) == 1 and not kwargs:
+            return select_xpath(self.el, *args)
         return self.el.xpath(*args, **kwargs)
 
+    @classmethod
+    def _get_class_cache(cls):
+        # Stored in the class __dict__, as subclasses have their own members.
+        try:
+            return cls.__dict__['_class_cache']
+        except KeyError:
+            cls._class_cache = {}
+            return cls._class_cache
+
+    @classmethod
+    def _get_class_prefixed_attrs(cls, prefix):
+        cache = cls._get_class_cache()
+        try:
+            return cache[prefix]
+        except KeyError:
+            attrs = [(attrname, attrname[len(prefix):]) for attrname in dir(cls) if attrname.startswith(prefix)]
+            cache[prefix] = attrs
+            return attrs
+
+    def get_prefixed_attrs(self, prefix):
+        """
+        Get attributes whose name starts with *prefix*, sorted like
+        ``dir(self)``.
+
+        Class attributes are looked up once per class, attributes set on
+        the instance are added to them.
+
+        :returns: list of (attribute name, name without prefix)
+        """
+        attrs = self._get_class_prefixed_attrs(prefix)
+        extra = [attrname for attrname in self.__dict__ if attrname.startswith(prefix)]
+        if not extra:
+            return attrs
+
+        names = sorted(set(attrname for attrname, _ in attrs).union(extra))
+        return [(attrname, attrname[len(prefix):]) for attrname in names]
+
     def handle_loaders(self):
-        for attrname in dir(self):
-            m = re.match('load_(.*)', attrname)
-            if not m:
-                continue
-            name = m.group(1)
+        for attrname, name in self.get_prefixed_attrs('load_'):
             if name in self.loaders:
                 continue
             loader = getattr(self, attrname)
@@ -161,9 +364,9 @@ def handle_loaders(self):
 
     def fill_env(self, page, parent=None):
         if parent is not None:
-            self.env = deepcopy(parent.env)
+            self.env = ElementEnv(parent.env)
         else:
-            self.env = deepcopy(page.params)
+            self.env = ElementEnv(page.params)
 
 
 class ListElement(AbstractElement):
@@ -172,9 +375,28 @@ class ListElement(AbstractElement):
     flush_at_end = False
     ignore_duplicate = False
 
+    streaming = False
+    """
+    If True, each item is built, parsed and yielded before looking at the
+    next node, instead of building every item of the list first.
+    """
+
+    keep_objects = True
+    """
+    If False, yielded objects are not stored in :attr:`objects`, only their
+    IDs are kept to detect duplicates. It can't be used with
+    :attr:`flush_at_end`.
+    """
+
     def __init__(self, *args, **kwargs):
         super(ListElement, self).__init__(*args, **kwargs)
-        self.objects = OrderedDict()
+        assert self.keep_objects or not self.flush_at_end, 'flush_at_end requires keep_objects'
+
+        if self.keep_objects:
+            self.objects = OrderedDict()
+        else:
+            self.objects = None
+            self.stored_ids = set()
 
     def __call__(self, *args, **kwargs):
         for key, value in kwargs.items():
@@ -182,6 +404,40 @@ def __call__(self, *args, **kwargs):
 
         return self.__iter__()
 
+    @classmethod
+    def _get_class_sub_elements(cls):
+        cache = cls._get_class_cache()
+        try:
+            return cache['sub_elements']
+        except KeyError:
+            elements = []
+            for attrname in dir(cls):
+                attr = getattr(cls, attrname)
+                if isinstance(attr, type) and issubclass(attr, AbstractElement) and attr != cls:
+                    elements.append((attrname, attr))
+            cache['sub_elements'] = elements
+            return elements
+
+    def get_sub_elements(self):
+        """
+        Get element classes defined in this element, to build an element for
+        each node found by :meth:`find_elements`, sorted by attribute name
+        like ``dir(self)``.
+
+        Class attributes are looked up once per class, element classes set
+        on the instance are added to them.
+
+        :rtype: list[:class:`AbstractElement`]
+        """
+        elements = dict(self._get_class_sub_elements())
+        for attrname, attr in self.__dict__.items():
+            if isinstance(attr, type) and issubclass(attr, AbstractElement) and attr != type(self):
+                elements[attrname] = attr
+            else:
+                # an instance attribute hides the class one
+                elements.pop(attrname, None)
+        return [elements[attrname] for attrname in sorted(elements)]
+
     def find_elements(self):
         """
         Get the nodes that will have to be processed.
@@ -189,11 +445,11 @@ def find_elements(self):
         sufficient.
         """
         if self.item_xpath is not None:
-            element_list = self.el.xpath(self.item_xpath)
+            element_list = select_xpath(self.el, self.item_xpath)
             if element_list:
                 for el in element_list:
                     yield el
-            elif self.empty_xpath is not None and not self.el.xpath(self.empty_xpath):
+            elif self.empty_xpath is not None and not select_xpath(self.el, self.empty_xpath):
                 # Send a warning if no item_xpath node was found and an empty_xpath is defined
                 self.logger.warning('No element matched the item_xpath and the defined empty_xpath was not found!')
         else:
@@ -205,17 +461,9 @@ def __iter__(self):
 
         self.parse(self.el)
 
-        items = []
-        for el in self.find_elements():
-            for attrname in dir(self):
-                attr = getattr(self, attrname)
-                if isinstance(attr, type) and issubclass(attr, AbstractElement) and attr != type(self):
-                    item = attr(self.page, self, el)
-                    if item.condition is not None and not item.condition():
-                        continue
-
-                    item.handle_loaders()
-                    items.append(item)
+        items = self.iter_items()
+        if not self.streaming:
+            items = list(items)
 
         for item in items:
             for obj in item:
@@ -229,6 +477,20 @@ def __iter__(self):
 
         self.check_next_page()
 
+    def iter_items(self):
+        """
+        Build the elements of nodes found by :meth:`find_elements`.
+        """
+        sub_elements = self.get_sub_elements()
+        for el in self.find_elements():
+            for attr in sub_elements:
+                item = attr(self.page, self, el)
+                if item.condition is not None and not item.condition():
+                    continue
+
+                item.handle_loaders()
+                yield item
+
     def flush(self):
         for obj in self.objects.values():
             yield obj
@@ -251,13 +513,17 @@ def check_next_page(self):
 
     def store(self, obj):
         if obj.id:
-            if obj.id in self.objects:
+            if obj.id in (self.stored_ids if self.objects is None else self.objects):
                 if self.ignore_duplicate:
                     self.logger.warning('There are two objects with the same ID! %s' % obj.id)
                     return
                 else:
                     raise DataError('There are two objects with the same ID! %s' % obj.id)
-            self.objects[obj.id] = obj
+
+            if self.objects is None:
+                self.stored_ids.add(obj.id)
+            else:
+                self.objects[obj.id] = obj
         return obj
 
 
@@ -389,8 +655,8 @@ def handle_attr(self, key, func):
                 raise
             else:
                 value = FetchError
-        logger = getLogger('woob.browser.b2filters')
-        logger.log(DEBUG_FILTERS, "%s.%s = %r" % (self._random_id, key, value))
+        if FILTERS_LOGGER.isEnabledFor(DEBUG_FILTERS):
+            FILTERS_LOGGER.log(DEBUG_FILTERS, "%s.%s = %r", self._random_id, key, value)
         setattr(self.obj, key, value)
 
 
@@ -460,16 +726,14 @@ def __init__(self, *args, **kwargs):
         self._cols = {}
 
         columns = {}
-        for attrname in dir(self):
-            m = re.match('col_(.*)', attrname)
-            if m:
-                cols = getattr(self, attrname)
-                if not isinstance(cols, (list,tuple)):
-                    cols = [cols]
-                columns[m.group(1)] = [s.lower() if isinstance(s, (str, unicode)) else s for s in cols]
+        for attrname, name in self.get_prefixed_attrs('col_'):
+            cols = getattr(self, attrname)
+            if not isinstance(cols, (list,tuple)):
+                cols = [cols]
+            columns[name] = [s.lower() if isinstance(s, (str, unicode)) else s for s in cols]
 
         colnum = 0
-        for el in self.el.xpath(self.head_xpath):
+        for el in select_xpath(self.el, self.head_xpath):
             title = self.cleaner.clean(el)
             for name, titles in columns.items():
                 if name in self._cols:
@@ -18,15 +18,95 @@
 # along with woob. If not, see <http://www.gnu.org/licenses/>.
 
 from functools import wraps
+from threading import local
 
 import lxml.html
+from lxml import etree
 
 from woob.exceptions import ParseError
 from woob.tools.compat import unicode, basestring
 from woob.tools.log import getLogger, DEBUG_FILTERS
+from woob.tools.lrudict import LimitedLRUDict
 
 
-__all__ = ['FilterError', 'ItemNotFound', 'Filter',]
+__all__ = ['FilterError', 'ItemNotFound', 'Filter', 'compile_xpath', 'compile_css', 'xpath', 'cssselect']
+
+
+class _SelectorsCache(local):
+    """
+    Compiled selectors, per thread: lxml serializes the evaluations of a
+    same XPath object, and it avoids locking the LRU dicts.
+    """
+
+    def __init__(self):
+        self.xpaths = LimitedLRUDict()
+        self.xpaths.max_entries = 1000
+        self.css = LimitedLRUDict()
+        self.css.max_entries = 1000
+
+
+_selectors_cache = _SelectorsCache()
+
+
+def compile_xpath(expression):
+    """
+    Get a compiled XPath object for an expression, from a bounded cache.
+
+    Extension functions registered in the global namespace, like the ones
+    of :meth:`woob.browser.pages.HTMLPage.define_xpath_functions`, are
+    resolved when the expression is evaluated, so they can be defined after
+    compilation.
+
+    :type expression: :class:`str`
+    :rtype: :class:`lxml.etree.XPath`
+    """
+    cache = _selectors_cache.xpaths
+    try:
+        return cache[expression]
+    except KeyError:
+        compiled = cache[expression] = etree.XPath(expression)
+        return compiled
+
+
+def compile_css(selector, translator='html'):
+    """
+    Get a compiled XPath object for a CSS selector, which is translated
+    only once.
+
+    :type selector: :class:`str`
+    :param translator: 'html' or 'xml', see :class:`lxml.cssselect.CSSSelector`
+    :rtype: :class:`lxml.etree.XPath`
+    """
+    cache = _selectors_cache.css
+    key = (selector, translator)
+    try:
+        return cache[key]
+    except KeyError:
+        from lxml.cssselect import CSSSelector
+
+        compiled = cache[key] = compile_xpath(CSSSelector(selector, translator=translator).path)
+        return compiled
+
+
+def xpath(item, expression):
+    """
+    Evaluate an XPath expression on an lxml node or document, or on any
+    object having a *xpath* method, like elements.
+    """
+    if isinstance(item, (etree._Element, etree._ElementTree)):
+        return compile_xpath(expression)(item)
+    return item.xpath(expression)
+
+
+def cssselect(item, selector):
+    """
+    Select nodes matching a CSS selector on an lxml node, or on any object
+    having a *cssselect* method, like elements.
+    """
+    if isinstance(item, etree._Element):
+        translator = 'html' if isinstance(item, lxml.html.HtmlMixin) else 'xml'
+        return compile_css(selector, translator)(item)
+    return item.cssselect(selector)
 
 
 class NoDefault(object):
@@ -168,7 +248,7 @@ def __init__(self, selector=None, default=_NO_DEFAULT):
 
     def select(self, selector, item):
         if isinstance(selector, basestring):
-            ret = item.xpath(selector)
+            ret = xpath(item, selector)
         elif isinstance(selector, _Filter):
             selector._key = self._key
             selector._obj = self._obj
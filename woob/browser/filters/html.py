@@ -27,7 +27,7 @@
 
 from .base import (
     _NO_DEFAULT, Filter, FilterError, _Selector, debug, ItemNotFound,
-    _Filter,
+    _Filter, cssselect, xpath,
 )
 from .standard import CleanText
 
@@ -61,7 +61,7 @@ class CSS(_Selector):
     will take the text of all ``<div>`` having CSS class "main".
     """
     def select(self, selector, item):
-        ret = item.cssselect(selector)
+        ret = cssselect(item, selector)
         if isinstance(ret, list):
             for el in ret:
                 if isinstance(el, html.HtmlElement):
@@ -292,7 +292,7 @@ def __call__(self, item):
             if col_idx is not None:
                 current_col = 0
                 for td_idx in range(col_idx + 1):
-                    ret = item.xpath(self.td % (td_idx + 1))
+                    ret = xpath(item, self.td % (td_idx + 1))
                     if col_idx <= current_col:
                         for el in ret:
                             self.highlight_el(el, item)
@@ -0,0 +1,506 @@
+# -*- coding: utf-8 -*-
+
+# Copyright(C) 2021 The Woob Team
+#
+# This file is part of woob.
+#
+# woob is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# woob is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with woob. If not, see <http://www.gnu.org/licenses/>.
+
+import atexit
+import base64
+import io
+import mimetypes
+import os
+import random
+from datetime import datetime
+from threading import Lock, Thread
+from weakref import WeakSet
+try:
+    import Queue
+except ImportError:
+    import queue as Queue
+
+from woob import __version__
+from woob.tools.compat import parse_qsl, urlparse
+from woob.tools.json import json
+from woob.tools.log import getLogger
+from woob.tools.misc import to_unicode
+
+
+__all__ = ['HARWriter', 'build_har_entry', 'build_har_header', 'get_response_filename']
+
+
+def build_har_header(started):
+    """
+    Build the HAR structure written before the entries.
+
+    :param started: date of the first request
+    :type started: :class:`datetime.datetime`
+    :rtype: dict
+    """
+    return {
+        'log': {
+            'version': '1.2',
+            'creator': {
+                'name': 'woob',
+                'version': __version__,
+            },
+            'browser': {
+                'name': 'woob',
+                'version': __version__,
+            },
+            # there are no pages, but we need that to please firefox
+            'pages': [{
+                'id': 'fake_page',
+                'pageTimings': {},
+                # and chromium wants some of it too
+                'startedDateTime': started.isoformat(),
+            }],
+            # don't put additional data after this list, to have a fixed-size suffix after it
+            # so we can add more entries without rewriting the whole file.
+            'entries': [],
+        },
+    }
+
+
+def build_har_entry(response, slug, started, max_body_size=None):
+    """
+    Build the HAR entry of a response.
+
+    :param response: response to save, its content has to be already read
+    :type response: :class:`requests.Response`
+    :param slug: identifier of the response
+    :type slug: str
+    :param started: date of the request
+    :type started: :class:`datetime.datetime`
+    :param max_body_size: if set, the saved content is truncated to this size
+    :type max_body_size: int
+    :rtype: dict
+    """
+    request = response.request
+    content = response.content or b''
+
+    har_entry = {
+        '$anchor': slug,
+        'startedDateTime': started.isoformat(),
+        'pageref': 'fake_page',
+        'time': int(response.elapsed.total_seconds() * 1000),
+        'request': {
+            'method': request.method,
+            'url': request.url,
+            'httpVersion': 'HTTP/%.1f' % (response.raw.version / 10.),
+            'headers': [
+                {
+                    'name': k,
+                    'value': v,
+                }
+                for k, v in request.headers.items()
+            ],
+            'queryString': [
+                {
+                    'name': key,
+                    'value': value,
+                }
+                for key, value in parse_qsl(
+                    urlparse(request.url).query,
+                    keep_blank_values=True,
+                )
+            ],
+            'cookies': [
+                {
+                    'name': k,
+                    'value': v,
+                }
+                for k, v in request._cookies.items()
+            ],
+            # for chromium
+            'bodySize': -1,
+            'headersSize': -1,
+        },
+        'response': {
+            'status': response.status_code,
+            'statusText': to_unicode(response.reason),
+            'httpVersion': 'HTTP/%.1f' % (response.raw.version / 10.),
+            'headers': [
+                {
+                    'name': k,
+                    'value': v,
+                }
+                for k, v in response.headers.items()
+            ],
+            'content': {
+                'mimeType': response.headers.get('Content-Type', ''),
+                'size': len(content),
+                # systematically use base64 to avoid more content alteration
+                # than there already is...
+                'encoding': "base64",
+                'text': base64.b64encode(content[:max_body_size]).decode('ascii'),
+            },
+            'cookies': [
+                {
+                    'name': k,
+                    'value': v,
+                }
+                for k, v in response.cookies.items()
+            ],
+            'redirectURL': response.headers.get('location', ''),
+            # for chromium
+            'bodySize': -1,
+            'headersSize': -1,
+        },
+        'timings': {  # please chromium
+            'send': -1,
+            'wait': -1,
+            'receive': -1,
+        },
+        'cache': {},
+    }
+    if max_body_size is not None and len(content) > max_body_size:
+        har_entry['response']['content']['comment'] = 'truncated to %d bytes' % max_body_size
+
+    if request.body is not None:
+        har_entry['request']['postData'] = {
+            'mimeType': request.headers.get('Content-Type', ''),
+            'params': [],
+        }
+        if isinstance(request.body, str):
+            har_entry['request']['postData']['text'] = request.body
+        else:
+            # HAR format has no proper way to encode posted binary data!
+            har_entry['request']['postData']['text'] = request.body.decode('latin-1')
+            # add a non-standard key to indicate how should "text" be decoded.
+            har_entry['request']['postData']['x-binary'] = True
+
+        if request.headers.get('Content-Type') == 'application/x-www-form-urlencoded':
+            har_entry['request']['postData']['params'] = [
+                {
+                    "name": key,
+                    "value": value,
+                } for key, value in parse_qsl(request.body)
+            ]
+
+    return har_entry
+
+
+class HARWriter(object):
+    """
+    Write responses to HAR files from a dedicated thread.
+
+    Responses are queued by :meth:`add` and written by a background thread,
+    so the threads doing requests never wait for disk I/O. When the queue is
+    full, responses are dropped instead of slowing requests down.
+
+    Entries are appended to ``bundle.har`` without keeping them in memory,
+    and the file is a valid HAR file after each write. An existing
+    ``bundle.har`` is appended to, as before. When a file reaches
+    `max_size`, next entries are written to ``bundle-1.har``,
+    ``bundle-2.har``, etc.
+
+    Browsers get the writer of their directory with :meth:`get_shared`, so
+    browsers sharing a directory still write to the same ``bundle.har``.
+
+    :param dirname: directory where HAR files are written
+    :type dirname: str
+    :param logger: parent logger
+    :param queue_size: maximum number of responses waiting to be written
+    :type queue_size: int
+    :param max_body_size: maximum size of saved response contents, in bytes
+    :type max_body_size: int
+    :param max_size: maximum size of a HAR file, in bytes
+    :type max_size: int
+    :param sampling: ratio of successful responses to save, between 0 and 1
+                     (responses with an error status are always saved)
+    :type sampling: float
+    """
+
+    SUFFIX = ']}}'
+
+    _END = object()
+
+    _writers = WeakSet()
+
+    _shared = {}
+    _shared_lock = Lock()
+
+    def __init__(self, dirname, logger=None, queue_size=100, max_body_size=None, max_size=None, sampling=1):
+        self.dirname = dirname
+        self.logger = getLogger('har', logger)
+        self.max_body_size = max_body_size
+        self.max_size = max_size
+        self.sampling = sampling
+
+        self.queue = Queue.Queue(queue_size)
+        self.dropped = 0
+        self.segment = 0
+        self.fd = None
+        self.has_entries = False
+        self.thread = None
+        self.lock = Lock()
+        self.users = 0
+
+    @classmethod
+    def get_shared(cls, dirname, **kwargs):
+        """
+        Get the writer of a directory, shared by every browser of the
+        process saving responses in it. It is created with the given
+        options if there is none yet.
+
+        Call :meth:`release` when it is not used anymore.
+
+        :param dirname: directory where HAR files are written
+        :type dirname: str
+        :rtype: :class:`HARWriter`
+        """
+        key = os.path.realpath(dirname)
+        with cls._shared_lock:
+            writer = cls._shared.get(key)
+            if writer is None:
+                writer = cls._shared[key] = cls(dirname, **kwargs)
+            writer.users += 1
+            return writer
+
+    def release(self):
+        """
+        Release a writer got with :meth:`get_shared`, and close it when it
+        was the last user.
+        """
+        with self._shared_lock:
+            self.users -= 1
+            if self.users > 0:
+                return
+
+            key = os.path.realpath(self.dirname)
+            if self._shared.get(key) is self:
+                del self._shared[key]
+        self.close()
+
+    def get_path(self, segment=None):
+        """
+        Get path of a HAR file.
+
+        :param segment: number of the file, current one by default
+        :type segment: int
+        :rtype: str
+        """
+        if segment is None:
+            segment = self.segment
+        if segment == 0:
+            return os.path.join(self.dirname, 'bundle.har')
+        return os.path.join(self.dirname, 'bundle-%d.har' % segment)
+
+    def start(self):
+        with self.lock:
+            if self.thread is not None:
+                return
+
+            self.thread = Thread(target=self._run, name='har-writer')
+            self.thread.daemon = True
+            self.thread.start()
+            self._writers.add(self)
+
+    def add(self, response, slug, filename=None):
+        """
+        Queue a response to be written.
+
+        The response content is read here, so it is still available when
+        the request was done with ``stream=True``.
+
+        When *filename* is given, the request and the response are also
+        written in separate files of the directory, like with
+        ``WOOB_USE_OBSOLETE_RESPONSES_DIR``. As they are debug dumps
+        explicitly asked for, they are never dropped or sampled: the caller
+        waits when the queue is full.
+
+        :param response: response to save
+        :type response: :class:`requests.Response`
+        :param slug: identifier of the response in the HAR file
+        :type slug: str
+        :param filename: name of the file of the response content
+        :type filename: str
+        :returns: False if the response is not saved
+        :rtype: bool
+        """
+        in_har = self.sampling >= 1 or response.status_code >= 400 or random.random() < self.sampling
+        if not in_har and filename is None:
+            return False
+
+        started = datetime.now() - response.elapsed
+        response.content
+
+        self.start()
+        item = (response, slug, started, in_har, filename)
+        if filename is not None:
+            self.queue.put(item)
+            return True
+
+        try:
+            self.queue.put_nowait(item)
+        except Queue.Full:
+            self.dropped += 1
+            self.logger.debug('HAR queue is full, response %s is not saved', slug)
+            return False
+        return True
+
+    def close(self, timeout=None):
+        """
+        Write the queued responses and close the HAR file.
+
+        :param timeout: maximum time to wait for the queued responses
+        :type timeout: float
+        """
+        with self.lock:
+            thread = self.thread
+            self.thread = None
+
+        if thread is None:
+            return
+
+        self.queue.put(self._END)
+        thread.join(timeout)
+        self._writers.discard(self)
+
+        if self.dropped:
+            self.logger.warning('%d responses have not been saved in HAR files, as the queue was full', self.dropped)
+
+    def _run(self):
+        try:
+            while True:
+                item = self.queue.get()
+                if item is self._END:
+                    break
+
+                response, slug, started, in_har, filename = item
+                try:
+                    if filename is not None:
+                        self.write_files(response, filename)
+                    if in_har:
+                        self.write(build_har_entry(response, slug, started, self.max_body_size), started)
+                except Exception as e:
+                    self.logger.warning('Unable to save response in HAR file: %s', e)
+        finally:
+            if self.fd is not None:
+                self.fd.close()
+                self.fd = None
+
+    def write(self, har_entry, started=None):
+        """
+        Append an entry to the current HAR file.
+
+        :param har_entry: entry built by :func:`build_har_entry`
+        :type har_entry: dict
+        :param started: date of the request, used if a new file is created
+        :type started: :class:`datetime.datetime`
+        """
+        data = json.dumps(har_entry, separators=(',', ':'))
+
+        if self.fd is not None and self.max_size and self.fd.tell() + len(data) > self.max_size:
+            self.fd.close()
+            self.fd = None
+            self.segment += 1
+
+        if self.fd is None:
+            self.fd = self._open(started or datetime.now())
+
+        # entries are last in the JSON file: overwrite the closings, write
+        # the new entry and the closings again.
+        self.fd.seek(self.fd.tell() - len(self.SUFFIX))
+        if self.has_entries:
+            self.fd.write(',')
+        self.fd.write(data)
+        self.fd.write(self.SUFFIX)
+        self.fd.flush()
+        self.has_entries = True
+
+    def _open(self, started):
+        while True:
+            path = self.get_path()
+            if not os.path.exists(path):
+                fd = open(path, 'w')
+                json.dump(build_har_header(started), fd, separators=(',', ':'))
+                self.has_entries = False
+                return fd
+
+            # append to a HAR file written before, if it is not full
+            fd = open(path, 'r+')
+            fd.seek(0, io.SEEK_END)
+            size = fd.tell()
+            if size > len(self.SUFFIX) and not (self.max_size and size >= self.max_size):
+                fd.seek(size - len(self.SUFFIX) - 1)
+                end = fd.read(len(self.SUFFIX) + 1)
+                if end.endswith(self.SUFFIX):
+                    self.has_entries = not end.startswith('[')
+                    fd.seek(size)
+                    return fd
+
+            fd.close()
+            self.segment += 1
+
+    def write_files(self, response, filename):
+        """
+        Write a request, its response and its content in separate files.
+
+        :param response: response to save
+        :type response: :class:`requests.Response`
+        :param filename: name of the file of the response content
+        :type filename: str
+        """
+        response_filepath = os.path.join(self.dirname, filename)
+
+        request = response.request
+        with open(response_filepath + '-request.txt', 'w') as f:
+            f.write('%s %s\n\n\n' % (request.method, request.url))
+
+            for key, value in request.headers.items():
+                f.write('%s: %s\n' % (key, value))
+            if request.body is not None:  # separate '' from None
+                f.write('\n\n\n%s' % request.body)
+        with open(response_filepath + '-response.txt', 'w') as f:
+            if hasattr(response.elapsed, 'total_seconds'):
+                f.write('Time: %3.3fs\n' % response.elapsed.total_seconds())
+            f.write('%s %s\n\n\n' % (response.status_code, response.reason))
+            for key, value in response.headers.items():
+                f.write('%s: %s\n' % (key, value))
+
+        with open(response_filepath, 'wb') as f:
+            f.write(response.content)
+
+        match_filepath = os.path.join(self.dirname, 'url_response_match.txt')
+        with open(match_filepath, 'a') as f:
+            f.write('# %d %s %s\n' % (response.status_code, response.reason, response.headers.get('Content-Type', '')))
+            f.write('%s\t%s\n' % (response.url, filename))
+
+
+def get_response_filename(response, counter, slug):
+    """
+    Get the name of the file of a response content, when saved in separate
+    files.
+
+    :rtype: str
+    """
+    # get the content-type, remove optionnal charset part
+    mimetype = response.headers.get('Content-Type', '').split(';')[0]
+    # due to http://bugs.python.org/issue1043134
+    if mimetype == 'text/plain':
+        ext = '.txt'
+    else:
+        # try to get an extension (and avoid adding 'None')
+        ext = mimetypes.guess_extension(mimetype, False) or ''
+
+    return '%02d-%d-%s%s' % (counter, response.status_code, slug, ext)
+
+
+@atexit.register
+def _close_writers():
+    for writer in list(HARWriter._writers):
+        writer.close()
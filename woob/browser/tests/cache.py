@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+
+# Copyright(C) 2021 The Woob Team
+#
+# This file is part of woob.
+#
+# woob is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# woob is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with woob. If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+import requests
+
+from woob.browser.cache import CacheMixin, CacheStats, MemoryCacheStore, SQLiteCacheStore
+from woob.core.bcall import BackendsCall
+from woob.tools.backend import Module
+from woob.tools.log import getLogger
+
+
+# Mock of a browser returning the queued responses
+class MyMockBrowser(object):
+    def __init__(self):
+        self.logger = getLogger('browser')
+        self.responses = []
+        self.requests = []
+
+    def build_request(self, url, headers=None, **kwargs):
+        return requests.Request('GET', url, headers=headers).prepare()
+
+    def open(self, request, **kwargs):
+        self.requests.append(request)
+        status_code, headers, content = self.responses.pop(0)
+        response = requests.Response()
+        response.status_code = status_code
+        response.headers.update(headers)
+        response._content = content
+        response.url = request.url
+        response.request = request
+        return response
+
+
+class MyMockCacheBrowser(CacheMixin, MyMockBrowser):
+    pass
+
+
+class CacheMixinTest(TestCase):
+    def setUp(self):
+        self.browser = MyMockCacheBrowser()
+
+    # Check that a response with an ETag is revalidated and returned on 304
+    def test_revalidation(self):
+        self.browser.responses = [(200, {'ETag': '"1"'}, b'foo'), (304, {}, b'')]
+        self.browser.open_with_cache('http://woob.tech/')
+        response = self.browser.open_with_cache('http://woob.tech/')
+        self.assertEqual(response.content, b'foo')
+        self.assertEqual(self.browser.requests[1].headers['If-None-Match'], '"1"')
+
+    # Check that fresh responses are returned without request
+    def test_max_age(self):
+        self.browser.responses = [(200, {'Cache-Control': 'max-age=60'}, b'foo')]
+        self.browser.open_with_cache('http://woob.tech/')
+        self.assertEqual(self.browser.open_with_cache('http://woob.tech/').content, b'foo')
+        self.assertEqual(len(self.browser.requests), 1)
+
+    # Check that expired or not storable responses are not used
+    def test_not_fresh(self):
+        self.browser.responses = [(200, {'Expires': 'Thu, 01 Dec 1994 16:00:00 GMT'}, b'foo'),
+                                  (200, {'Cache-Control': 'no-store', 'ETag': '"1"'}, b'bar'),
+                                  (200, {}, b'baz')]
+        self.browser.open_with_cache('http://woob.tech/')
+        self.browser.open_with_cache('http://woob.tech/')
+        self.assertEqual(self.browser.open_with_cache('http://woob.tech/').content, b'baz')
+        self.assertNotIn('If-None-Match', self.browser.requests[2].headers)
+
+    # Check that responses are only used for requests with the same Vary headers
+    def test_vary(self):
+        self.browser.cache_key_headers = ()
+        self.browser.responses = [(200, {'Cache-Control': 'max-age=60', 'Vary': 'Accept'}, b'foo'),
+                                  (200, {}, b'bar')]
+        self.browser.open_with_cache('http://woob.tech/', headers={'Accept': 'text/html', 'X-Foo': '1'})
+        response = self.browser.open_with_cache('http://woob.tech/', headers={'Accept': 'text/html', 'X-Foo': '2'})
+        self.assertEqual(response.content, b'foo')
+        response = self.browser.open_with_cache('http://woob.tech/', headers={'Accept': 'text/plain'})
+        self.assertEqual(response.content, b'bar')
+
+
+class CacheStoreTest(TestCase):
+    def setUp(self):
+        self.dirname = tempfile.mkdtemp(prefix='woob_test_')
+        self.browser = MyMockCacheBrowser()
+
+    def tearDown(self):
+        shutil.rmtree(self.dirname)
+
+    def make_entry(self, url, size):
+        self.browser.responses = [(200, {'ETag': '"1"'}, b'x' * size)]
+        self.browser.open_with_cache(url)
+        return self.browser.cache[self.browser.make_cache_key(self.browser.requests[-1])]
+
+    # Check that the least recently used entries are dropped
+    def test_memory_max_size(self):
+        store = MemoryCacheStore(max_size=350)
+        for i in range(3):
+            store[i] = self.make_entry('http://woob.tech/%d' % i, 100)
+        store[0]
+        store[3] = self.make_entry('http://woob.tech/3', 100)
+        self.assertEqual(sorted(store.entries), [0, 2, 3])
+
+    # Check that entries are kept across instances of the SQLite store
+    def test_sqlite(self):
+        path = os.path.join(self.dirname, 'cache.sqlite')
+        store = SQLiteCacheStore(path, max_size=10000)
+        store['foo'] = self.make_entry('http://woob.tech/', 100)
+        store.close()
+
+        store = SQLiteCacheStore(path)
+        entry = store['foo']
+        self.assertEqual(entry.response.content, b'x' * 100)
+        self.assertEqual(entry.etag, '"1"')
+        self.assertRaises(KeyError, lambda: store['bar'])
+        self.assertEqual(len(store), 1)
+
+
+class CacheStatsTest(TestCase):
+    def setUp(self):
+        self.browser = MyMockCacheBrowser()
+
+    # Check that hits, misses, revalidations and stores are counted
+    def test_counters(self):
+        self.browser.responses = [(200, {'ETag': '"1"'}, b'foo'), (304, {}, b''), (200, {}, b'bar')]
+        self.browser.open_with_cache('http://woob.tech/')
+        self.browser.open_with_cache('http://woob.tech/')
+        self.browser.open_with_cache('http://woob.tech/other')
+        self.assertEqual(self.browser.cache_stats.as_dict(), {
+            'hits': 0, 'misses': 2, 'revalidations': 1, 'stores': 1,
+            'evictions': 0, 'bytes_saved': 3,
+        })
+
+    # Check that evictions are counted
+    def test_evictions(self):
+        self.browser.cache_max_size = 200
+        self.browser.cache = self.browser.create_cache_store()
+        for i in range(3):
+            self.browser.responses = [(200, {'Cache-Control': 'max-age=60'}, b'x' * 100)]
+            self.browser.open_with_cache('http://woob.tech/%d' % i)
+        self.assertEqual(self.browser.cache_stats.as_dict()['evictions'], 2)
+
+    # Check that the default cache is not bounded
+    def test_default_unbounded(self):
+        self.assertIsNone(self.browser.cache.max_size)
+        for i in range(3):
+            self.browser.responses = [(200, {'Cache-Control': 'max-age=60'}, b'x' * 100000)]
+            self.browser.open_with_cache('http://woob.tech/%d' % i)
+        self.assertEqual(self.browser.cache_stats.as_dict()['evictions'], 0)
+
+    # Check that backends give one snapshot of their stats through BackendsCall
+    def test_backend_stats(self):
+        backends = [Module(None, 'foo'), Module(None, 'bar')]
+        backends[0].cache_stats = CacheStats()
+        self.browser.cache_stats.parent = backends[0].cache_stats
+        self.browser.responses = [(200, {}, b'foo')]
+        self.browser.open_with_cache('http://woob.tech/')
+
+        results = list(BackendsCall(backends, 'get_cache_stats'))
+        self.assertEqual(len(results), 1)
+        self.assertIsInstance(results[0], CacheStats)
+        self.assertEqual(results[0].backend, 'foo')
+        self.assertEqual(results[0].as_dict()['misses'], 1)
+
+        # the snapshot is not updated anymore
+        self.browser.cache_stats.incr('misses')
+        self.assertEqual(results[0].as_dict()['misses'], 1)
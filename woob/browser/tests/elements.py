@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+
+# Copyright(C) 2021 The Woob Team
+#
+# This file is part of woob.
+#
+# woob is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# woob is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with woob. If not, see <http://www.gnu.org/licenses/>.
+
+from unittest import TestCase
+
+from lxml.html import fromstring
+
+from woob.browser.elements import ElementEnv, ItemElement, ListElement
+from woob.browser.filters.standard import CleanText, Env
+from woob.capabilities.base import BaseObject, StringField
+
+
+class ElementEnvTest(TestCase):
+    def setUp(self):
+        self.params = {'id': '42', 'items': ['a']}
+        self.env = ElementEnv(self.params)
+        self.child = ElementEnv(self.env)
+
+    # Values of parents are visible, writes stay local
+    def test_layers(self):
+        self.child['name'] = 'foo'
+        self.child['id'] = '43'
+        self.assertEqual(dict(self.child), {'id': '43', 'items': ['a'], 'name': 'foo'})
+        self.assertEqual(dict(self.env), {'id': '42', 'items': ['a']})
+        self.assertEqual(self.params, {'id': '42', 'items': ['a']})
+
+    # Mutable values are copied before being changed, like with a deepcopy
+    def test_copy_on_read(self):
+        self.child['items'].append('b')
+        self.assertEqual(self.child['items'], ['a', 'b'])
+        self.assertEqual(self.env['items'], ['a'])
+        self.assertEqual(self.params['items'], ['a'])
+
+    def test_delete(self):
+        del self.child['id']
+        self.assertNotIn('id', self.child)
+        self.assertIn('id', self.env)
+        self.assertRaises(KeyError, lambda: self.child['id'])
+        self.assertEqual(list(self.child), ['items'])
+
+    # Changes of parents after the creation of a child are not seen by it
+    def test_parent_changes(self):
+        grandchild = ElementEnv(self.child)
+        self.env['id'] = '43'
+        self.env['name'] = 'foo'
+        self.env['items'] = ['b']
+        del self.env['items']
+        self.assertEqual(dict(self.child), {'id': '42', 'items': ['a']})
+        self.assertEqual(dict(grandchild), {'id': '42', 'items': ['a']})
+        self.assertEqual(dict(self.env), {'id': '43', 'name': 'foo'})
+        self.assertEqual(dict(ElementEnv(self.env)), {'id': '43', 'name': 'foo'})
+
+        # values already set in the child are kept
+        self.child['id'] = '44'
+        self.env['id'] = '45'
+        self.assertEqual(self.child['id'], '44')
+
+    # An environment is copied like a dict
+    def test_copy(self):
+        self.child['name'] = 'foo'
+        env = self.child.copy()
+        self.assertEqual(env, {'id': '42', 'items': ['a'], 'name': 'foo'})
+        env['id'] = '43'
+        self.assertEqual(self.child['id'], '42')
+
+    def test_no_params(self):
+        env = ElementEnv(None)
+        self.assertEqual(len(env), 0)
+        self.assertRaises(KeyError, lambda: env['id'])
+
+
+class MyObject(BaseObject):
+    label = StringField('label')
+
+
+class MyPage(object):
+    logger = None
+    params = {'suffix': '!'}
+
+    def __init__(self, doc):
+        self.doc = doc
+
+
+class ListElementTest(TestCase):
+    def setUp(self):
+        self.page = MyPage(fromstring('<ul><li>1</li><li>2</li><li>2</li><li>3</li></ul>'))
+
+        class iter_objects(ListElement):
+            item_xpath = '//li'
+            ignore_duplicate = True
+
+            class item(ItemElement):
+                klass = MyObject
+
+                obj_id = CleanText('.')
+
+                def obj_label(self):
+                    return self.obj.id + Env('suffix')(self)
+
+        self.element = iter_objects
+
+    def test_streaming_same_objects(self):
+        expected = [(obj.id, obj.label) for obj in self.element(self.page)()]
+
+        self.element.streaming = True
+        self.element.keep_objects = False
+        element = self.element(self.page)
+        self.assertEqual([(obj.id, obj.label) for obj in element()], expected)
+        self.assertEqual(expected, [('1', '1!'), ('2', '2!'), ('3', '3!')])
+        self.assertIsNone(element.objects)
+
+    # Loggers are resolved once per element class and page
+    def test_logger_shared(self):
+        elements = [self.element.item(self.page) for _ in range(3)]
+        self.assertEqual(elements[0].logger.name, 'item')
+        self.assertIs(elements[0].logger, elements[2].logger)
+        self.assertEqual(list(self.page._element_loggers), ['item'])
+
+    # Sub-elements and columns set on the instance are used, like class ones
+    def test_instance_attributes(self):
+        element = self.element(self.page)
+
+        class other(ItemElement):
+            klass = MyObject
+
+            obj_id = CleanText('.')
+
+            def obj_label(self):
+                return u'other'
+
+        element.other = other
+        self.assertEqual(element.get_sub_elements(), [self.element.item, other])
+        element.item = None
+        self.assertEqual(element.get_sub_elements(), [other])
+        self.assertEqual(self.element(self.page).get_sub_elements(), [self.element.item])
+
+        element.load_foo = None
+        self.assertIn(('load_foo', 'foo'), element.get_prefixed_attrs('load_'))
+        self.assertNotIn(('load_foo', 'foo'), self.element(self.page).get_prefixed_attrs('load_'))
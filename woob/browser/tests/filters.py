@@ -21,9 +21,11 @@
 from unittest import TestCase
 
 from dateutil.tz import gettz
+from lxml import etree
 from lxml.html import fromstring
 
-from woob.browser.filters.html import FormValue, Link
+from woob.browser.filters.base import compile_css, compile_xpath
+from woob.browser.filters.html import CSS, FormValue, Link
 from woob.browser.filters.standard import RawText, DateTime, CleanText
 
 
@@ -123,3 +125,28 @@ def test_tz(self):
             DateTime(tzinfo='Europe/Paris').filter('2020-01-02 13:45:00'),
             datetime.datetime(2020, 1, 2, 13, 45, tzinfo=gettz('Europe/Paris'))
         )
+
+
+class CompiledSelectorsTest(TestCase):
+    def setUp(self):
+        self.e = fromstring('<ul><li class="a">One</li><li class="b">Two</li></ul>')
+
+    # Compiled selectors are reused
+    def test_cache(self):
+        self.assertIs(compile_xpath('//li'), compile_xpath('//li'))
+        self.assertIs(compile_css('li.a'), compile_css('li.a'))
+
+    # Results are the same as lxml methods
+    def test_same_results(self):
+        self.assertEqual(CleanText('//li[2]')(self.e), 'Two')
+        self.assertEqual(CSS('li.b')(self.e), self.e.cssselect('li.b'))
+
+    # Extension functions can be registered after the compilation
+    def test_extension_function(self):
+        xpath = compile_xpath('//li[woob-test-is-first-class(@class)]')
+        ns = etree.FunctionNamespace(None)
+        ns['woob-test-is-first-class'] = lambda context, classes: classes == ['a']
+        try:
+            self.assertEqual([el.text for el in xpath(self.e)], ['One'])
+        finally:
+            del ns['woob-test-is-first-class']
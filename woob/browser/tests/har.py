@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+
+# Copyright(C) 2021 The Woob Team
+#
+# This file is part of woob.
+#
+# woob is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# woob is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with woob. If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest import TestCase
+
+import requests
+
+from woob.browser.har import HARWriter
+from woob.tools.json import json
+
+
+class MyMockRaw(object):
+    version = 11
+
+
+def MyMockResponse(url, content=b'', status_code=200):
+    response = requests.Response()
+    response.url = url
+    response.request = requests.Request('GET', url).prepare()
+    response.status_code = status_code
+    response.reason = 'OK'
+    response.elapsed = timedelta(milliseconds=10)
+    response.raw = MyMockRaw()
+    response._content = content
+    return response
+
+
+class HARWriterTest(TestCase):
+    def setUp(self):
+        self.dirname = tempfile.mkdtemp(prefix='woob_test_')
+
+    def tearDown(self):
+        shutil.rmtree(self.dirname)
+
+    def load(self, filename):
+        with open(os.path.join(self.dirname, filename)) as fd:
+            return json.load(fd)
+
+    # Check that the written file is a valid HAR file with all the entries
+    def test_write(self):
+        writer = HARWriter(self.dirname)
+        for i in range(3):
+            self.assertTrue(writer.add(MyMockResponse('http://woob.tech/%d' % i, b'foo'), str(i)))
+        writer.close()
+
+        entries = self.load('bundle.har')['log']['entries']
+        self.assertEqual([entry['request']['url'] for entry in entries],
+                         ['http://woob.tech/0', 'http://woob.tech/1', 'http://woob.tech/2'])
+        self.assertEqual(entries[0]['response']['content']['text'], 'Zm9v')
+
+    # Check that contents are truncated and files split when limits are reached
+    def test_limits(self):
+        writer = HARWriter(self.dirname, max_body_size=2, max_size=2000)
+        for i in range(5):
+            writer.add(MyMockResponse('http://woob.tech/%d' % i, b'x' * 1000), str(i))
+        writer.close()
+
+        files = sorted(os.listdir(self.dirname))
+        self.assertGreater(len(files), 1)
+        entries = []
+        for filename in files:
+            entries += self.load(filename)['log']['entries']
+        self.assertEqual(len(entries), 5)
+        self.assertEqual(entries[0]['response']['content']['size'], 1000)
+        self.assertEqual(entries[0]['response']['content']['text'], 'eHg=')
+
+    # Check that only error responses are saved when sampling is disabled
+    def test_sampling(self):
+        writer = HARWriter(self.dirname, sampling=0)
+        self.assertFalse(writer.add(MyMockResponse('http://woob.tech/'), 'ok'))
+        self.assertTrue(writer.add(MyMockResponse('http://woob.tech/', status_code=500), 'error'))
+        writer.close()
+
+        entries = self.load('bundle.har')['log']['entries']
+        self.assertEqual([entry['$anchor'] for entry in entries], ['error'])
+
+    # Check that writers of a directory append to the same bundle.har
+    def test_shared(self):
+        writer = HARWriter.get_shared(self.dirname)
+        self.assertIs(HARWriter.get_shared(self.dirname + '/'), writer)
+        writer.add(MyMockResponse('http://woob.tech/0'), '0')
+        writer.add(MyMockResponse('http://woob.tech/1'), '1')
+        writer.release()
+        writer.release()
+        self.assertIsNone(writer.thread)
+
+        # a new writer appends to the existing file
+        writer = HARWriter.get_shared(self.dirname)
+        writer.add(MyMockResponse('http://woob.tech/2'), '2')
+        writer.release()
+
+        self.assertEqual(os.listdir(self.dirname), ['bundle.har'])
+        entries = self.load('bundle.har')['log']['entries']
+        self.assertEqual([entry['$anchor'] for entry in entries], ['0', '1', '2'])
+
+    # Check that separate files of responses are written by the writer thread
+    def test_files(self):
+        writer = HARWriter(self.dirname, sampling=0)
+        self.assertTrue(writer.add(MyMockResponse('http://woob.tech/', b'foo'), 'ok', '00-200-ok'))
+        writer.close()
+
+        self.assertEqual(sorted(os.listdir(self.dirname)),
+                         ['00-200-ok', '00-200-ok-request.txt', '00-200-ok-response.txt', 'url_response_match.txt'])
+        with open(os.path.join(self.dirname, '00-200-ok'), 'rb') as fd:
+            self.assertEqual(fd.read(), b'foo')
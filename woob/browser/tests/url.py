@@ -15,10 +15,13 @@
 #
 # You should have received a copy of the GNU Lesser General Public License
 # along with woob. If not, see <http://www.gnu.org/licenses/>.
+import re
 from unittest import TestCase
 
+import requests
+
 from woob.browser import PagesBrowser, URL
-from woob.browser.pages import Page
+from woob.browser.pages import Page, RawPage
 from woob.browser.url import UrlNotResolvable
 
 
@@ -135,3 +138,99 @@ def test_ishere_klass_none(self):
         self.assertRaisesRegexp(AssertionError, "You can use this method" +
                                 " only if there is a Page class handler.",
                                 self.myBrowser.urlRegex.is_here, id=2)
+
+
+class MyMockRawPage(RawPage):
+    pass
+
+
+class MyMockNotHerePage(RawPage):
+    def is_here(self):
+        return False
+
+
+class MyMockRouterBrowser(PagesBrowser):
+    BASEURL = "http://woob.tech/"
+
+    noKlass = URL("item/(?P<id>\\d+)")
+    notHere = URL("item/(?P<id>\\d+)", MyMockNotHerePage)
+    item = URL("item/(?P<id>\\d+)/(?P<name>\\w+)", "item/(?P<id>\\d+)", MyMockRawPage)
+    other = URL("http://other.org/(?P<id>\\d+)", MyMockRawPage)
+
+
+def MyMockResponse(url, method='GET'):
+    response = requests.Response()
+    response.url = url
+    response.request = requests.Request(method, url).prepare()
+    response._content = b''
+    return response
+
+
+# Class that tests the dispatch of responses to URL objects
+class URLRouterTest(TestCase):
+    def setUp(self):
+        self.myBrowser = MyMockRouterBrowser()
+        self.router = self.myBrowser._router
+
+    def handle_sequentially(self, response):
+        for url in self.myBrowser._urls.values():
+            page = url.handle(response)
+            if page is not None:
+                return page
+
+    # Check that the router finds the same page and params as trying URLs
+    # one by one, skipping URLs without page class or refused by is_here
+    def test_same_as_sequential(self):
+        for url in ("http://woob.tech/item/42", "http://woob.tech/item/42/foo",
+                    "http://other.org/12", "http://woob.tech/nothing"):
+            response = MyMockResponse(url)
+            expected = self.handle_sequentially(response)
+            page = self.router.handle(response, self.myBrowser.BASEURL)
+            if expected is None:
+                self.assertIsNone(page)
+            else:
+                self.assertIs(type(page), type(expected))
+                self.assertEqual(page.params, expected.params)
+
+    # Check that HEAD requests are never handled
+    def test_head_not_handled(self):
+        response = MyMockResponse("http://woob.tech/item/42", method='HEAD')
+        self.assertIsNone(self.router.handle(response, self.myBrowser.BASEURL))
+
+    # Check that the router follows changes of the URL regexps and BASEURL
+    def test_urls_changed(self):
+        self.myBrowser.other.urls.insert(0, "news/(?P<id>\\d+)")
+        page = self.router.handle(MyMockResponse("http://woob.tech/news/3"), self.myBrowser.BASEURL)
+        self.assertEqual(page.params, {'id': '3'})
+
+        self.myBrowser.BASEURL = "http://woob2.tech/"
+        page = self.router.handle(MyMockResponse("http://woob2.tech/news/3"), self.myBrowser.BASEURL)
+        self.assertEqual(page.params, {'id': '3'})
+
+    # Check that regexps which can't be combined are tried one by one
+    def test_backreference_fallback(self):
+        self.myBrowser.other.urls.insert(0, "(a)\\1/(?P<id>\\d+)")
+        page = self.router.handle(MyMockResponse("http://woob.tech/aa/3"), self.myBrowser.BASEURL)
+        self.assertIn(list(self.myBrowser._urls).index('other'), self.router.segments)
+        self.assertEqual(page.params, {'id': '3'})
+        self.test_same_as_sequential()
+
+    # Check that an invalid regexp only fails when its URL is reached
+    def test_invalid_regex(self):
+        self.myBrowser.other.urls.append("http://other.org/(?P<id>\\d+")
+        page = self.router.handle(MyMockResponse("http://woob.tech/item/42"), self.myBrowser.BASEURL)
+        self.assertEqual(page.params, {'id': '42'})
+        self.assertRaises(re.error, self.router.handle, MyMockResponse("http://woob.tech/nothing"),
+                          self.myBrowser.BASEURL)
+
+    # Check that the alternations are only built again when an URL changes
+    def test_signature_cached(self):
+        response = MyMockResponse("http://woob.tech/item/42")
+        self.router.handle(response, self.myBrowser.BASEURL)
+        segments = self.router.segments
+        self.router.handle(response, self.myBrowser.BASEURL)
+        self.assertIs(self.router.segments, segments)
+
+        self.myBrowser.item.klass = MyMockRawPage
+        self.router.handle(response, self.myBrowser.BASEURL)
+        self.assertIsNot(self.router.segments, segments)
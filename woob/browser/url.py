@@ -18,6 +18,7 @@
 # along with woob. If not, see <http://www.gnu.org/licenses/>.
 
 from functools import wraps
+import itertools
 import re
 import requests
 
@@ -32,6 +33,28 @@ class UrlNotResolvable(Exception):
     """
 
 
+class URLList(list):
+    """
+    List of regexps of an :class:`URL`, changing :attr:`URL.generation`
+    when it is modified.
+    """
+
+
+def _count_change(name):
+    method = getattr(list, name)
+
+    @wraps(method)
+    def inner(self, *args, **kwargs):
+        URL.generation = next(URL._generations)
+        return method(self, *args, **kwargs)
+    return inner
+
+
+for _name in ('__setitem__', '__delitem__', '__iadd__', '__imul__', 'append', 'extend', 'insert',
+              'remove', 'pop', 'clear', 'sort', 'reverse'):
+    setattr(URLList, _name, _count_change(_name))
+
+
 class URL(object):
     """
     A description of an URL on the PagesBrowser website.
@@ -41,6 +64,21 @@ class which is instancied by PagesBrowser.open if the page matches a regex.
     """
     _creation_counter = 0
 
+    _generations = itertools.count(1)
+    generation = 0
+    """
+    Changed every time the regexps or the page class of any URL are
+    modified, so that :class:`URLRouter` knows when to rebuild its
+    alternations without comparing every URL.
+    """
+
+    def __setattr__(self, name, value):
+        if name in ('urls', 'klass'):
+            if name == 'urls':
+                value = URLList(value)
+            URL.generation = next(URL._generations)
+        super(URL, self).__setattr__(name, value)
+
     def __init__(self, *args):
         self.urls = []
         self.klass = None
@@ -54,6 +92,10 @@ def __init__(self, *args):
         self._creation_counter = URL._creation_counter
         URL._creation_counter += 1
 
+        self._build_urls = None
+        self._build_templates = None
+        self._build_choices = None
+
     def is_here(self, **kwargs):
         """
         Returns True if the current page of browser matches this URL.
@@ -116,6 +158,61 @@ def open(self, params=None, data=None, json=None, method=None, headers=None, is_
             return r.page
         return r
 
+    PLACEHOLDER_RE = re.compile(r'(%\(\w+\)s)')
+
+    def get_build_templates(self):
+        """
+        Get the templates used by :func:`build`, computed once from the
+        regexps.
+
+        :returns: list of (pattern, template, required names, all names),
+                  where the template is ready for the ``%`` operator.
+        """
+        urls = tuple(self.urls)
+        if self._build_urls != urls:
+            templates = []
+            for url in urls:
+                for pattern, _ in normalize(url):
+                    parts = self.PLACEHOLDER_RE.split(pattern)
+                    # literal parts are at even positions, placeholders at odd ones
+                    names = frozenset(part[2:-2] for part in parts[1::2])
+                    # Placeholders of unnamed groups (_0, _1, ...) are
+                    # optional, and kept as is in the url if not given.
+                    required = frozenset(name for name in names if re.match(r'^[A-z_]+$', name))
+                    template = ''.join(part if i % 2 else part.replace('%', '%%') for i, part in enumerate(parts))
+                    templates.append((pattern, template, required, names))
+
+            self._build_templates = templates
+            self._build_choices = {}
+            self._build_urls = urls
+
+        return self._build_templates
+
+    def get_build_template(self, names):
+        """
+        Get the template of the first pattern using exactly these parameters.
+
+        :param names: names of parameters
+        :type names: :class:`frozenset`
+        :returns: the template and default values of optional placeholders,
+                  or None if no pattern can be used
+        :rtype: tuple[:class:`str`, :class:`dict`]
+        """
+        templates = self.get_build_templates()
+        try:
+            return self._build_choices[names]
+        except KeyError:
+            pass
+
+        choice = None
+        for _, template, required, available in templates:
+            if required <= names <= available:
+                choice = (template, {name: '%%(%s)s' % name for name in available - names})
+                break
+
+        self._build_choices[names] = choice
+        return choice
+
     def build(self, **kwargs):
         """
         Build an url with the given arguments from URL's regexps.
@@ -127,33 +224,37 @@ def build(self, **kwargs):
         """
         browser = kwargs.pop('browser', self.browser)
         params = kwargs.pop('params', None)
-        patterns = []
-        for url in self.urls:
-            patterns += normalize(url)
-
-        for pattern, _ in patterns:
-            url = pattern
-            # only use full-name substitutions, to allow % in URLs
-            args = kwargs.copy()
-            for key in list(args.keys()):  # need to use keys() because of pop()
-                search = '%%(%s)s' % key
-                if search in pattern:
-                    url = url.replace(search, to_unicode(args.pop(key)))
-            # if there are named substitutions left, ignore pattern
-            if re.search('%\([A-z_]+\)s', url):
-                continue
-            # if not all args were used
-            if len(args):
-                continue
 
-            url = browser.absurl(url, base=True)
-            if params:
-                p = requests.models.PreparedRequest()
-                p.prepare_url(url, params)
-                url = p.url
-            return url
+        choice = self.get_build_template(frozenset(kwargs))
+        if choice is None:
+            raise UrlNotResolvable('Unable to resolve URL with %r. Available are %s' % (
+                kwargs, ', '.join([pattern for pattern, _, _, _ in self.get_build_templates()])))
+
+        template, defaults = choice
+        values = dict(defaults)
+        for key, value in kwargs.items():
+            values[key] = to_unicode(value)
+        url = template % values
+        url = browser.absurl(url, base=True)
+        if params:
+            p = requests.models.PreparedRequest()
+            p.prepare_url(url, params)
+            url = p.url
+        return url
+
+    def get_regexes(self, base):
+        """
+        Get the absolute regexps of this object, relative URLs being joined
+        to *base*.
 
-        raise UrlNotResolvable('Unable to resolve URL with %r. Available are %s' % (kwargs, ', '.join([pattern for pattern, _ in patterns])))
+        :rtype: list[:class:`str`]
+        """
+        regexes = []
+        for regex in self.urls:
+            if not re.match(r'^[\w\?]+://.*', regex):
+                regex = re.escape(base).rstrip('/') + '/' + regex.lstrip('/')
+            regexes.append(regex)
+        return regexes
 
     def match(self, url, base=None):
         """
@@ -163,9 +264,7 @@ def match(self, url, base=None):
             assert self.browser is not None
             base = self.browser.BASEURL
 
-        for regex in self.urls:
-            if not re.match(r'^[\w\?]+://.*', regex):
-                regex = re.escape(base).rstrip('/') + '/' + regex.lstrip('/')
+        for regex in self.get_regexes(base):
             m = re.match(regex, url)
             if m:
                 return m
@@ -181,17 +280,24 @@ def handle(self, response):
 
         m = self.match(response.url)
         if m:
-            page = self.klass(self.browser, response, m.groupdict())
-            if hasattr(page, 'is_here'):
-                if callable(page.is_here):
-                    if page.is_here():
-                        return page
-                else:
-                    assert isinstance(page.is_here, basestring)
-                    if page.doc.xpath(page.is_here):
-                        return page
+            return self.load_page(response, m)
+
+    def load_page(self, response, match):
+        """
+        Instanciate the klass for a response matched by one of the regexps,
+        if the page agrees with its *is_here* attribute.
+        """
+        page = self.klass(self.browser, response, match.groupdict())
+        if hasattr(page, 'is_here'):
+            if callable(page.is_here):
+                if page.is_here():
+                    return page
             else:
-                return page
+                assert isinstance(page.is_here, basestring)
+                if page.doc.xpath(page.is_here):
+                    return page
+        else:
+            return page
 
     def id2url(self, func):
         r"""
@@ -242,6 +348,133 @@ def build(self, **kwargs):
         return super(BrowserParamURL, self).build(**kwargs)
 
 
+class URLRouter(object):
+    """
+    Find the :class:`URL` object of a :class:`woob.browser.browsers.PagesBrowser`
+    which handles a response.
+
+    Regexps of consecutive URLs are compiled into a single alternation, so
+    the matching URL is found in one pass, with the same priority as trying
+    them one after the other. The alternations are built again when the
+    BASEURL of the browser or any URL changes (see :attr:`URL.generation`).
+
+    URLs whose regexps can't be combined (for example when they use numbered
+    backreferences, or are invalid), or which override their matching
+    methods, are tried on their own, at their place in the priority order.
+
+    :param urls: URL objects, in priority order
+    :type urls: list[:class:`URL`]
+    """
+
+    GROUP_RE = re.compile(r'(?<!\\)\(\?P(<|=)(\w+)')
+    UNSUPPORTED_RE = re.compile(r'\\\d|\(\?\(|\(\?[aiLmsux]+\)')
+
+    def __init__(self, urls):
+        self.urls = urls
+        self.signature = None
+        self.segments = []
+
+    def get_signature(self, base):
+        return (base, URL.generation)
+
+    def _add_alternation(self, pending, segments):
+        alternatives = []
+        routes = []
+        for i, (index, regex, compiled) in enumerate(pending):
+            prefix = '_r%d_' % i
+            alternatives.append('(?P<_r%d>%s)' % (i, self.GROUP_RE.sub(r'(?P\1%s\2' % prefix, regex)))
+            routes.append((index, compiled))
+        del pending[:]
+
+        if not alternatives:
+            return
+
+        try:
+            segments.append((re.compile('|'.join(alternatives)), routes))
+        except (re.error, OverflowError, AssertionError):
+            for index, _ in routes:
+                if index not in segments:
+                    segments.append(index)
+
+    def compile(self, base):
+        """
+        Build the alternations of regexps of URLs.
+
+        :returns: segments to try in order, either a tuple of a combined
+                  regexp and the list of (URL index, regexp) of its
+                  alternatives, or the index of an URL to try on its own
+        :rtype: list
+        """
+        segments = []
+        pending = []
+        for index, url in enumerate(self.urls):
+            if type(url).match is not URL.match or type(url).handle is not URL.handle:
+                self._add_alternation(pending, segments)
+                segments.append(index)
+                continue
+
+            if url.klass is None:
+                continue
+
+            try:
+                regexes = [(regex, re.compile(regex)) for regex in url.get_regexes(base)]
+            except (re.error, OverflowError, AssertionError):
+                regexes = None
+
+            if regexes is None or any(self.UNSUPPORTED_RE.search(regex) for regex, _ in regexes):
+                # the URL fails as before, only when it is reached
+                self._add_alternation(pending, segments)
+                segments.append(index)
+                continue
+
+            pending.extend((index, regex, compiled) for regex, compiled in regexes)
+
+        self._add_alternation(pending, segments)
+        return segments
+
+    def handle(self, response, base):
+        """
+        Get the page of the first URL handling the response.
+
+        :param base: BASEURL of the browser
+        :type base: :class:`str`
+        :rtype: :class:`woob.browser.pages.Page` or None
+        """
+        if response.request.method == 'HEAD':
+            return None
+
+        signature = self.get_signature(base)
+        if signature != self.signature:
+            self.segments = self.compile(base)
+            self.signature = signature
+
+        for segment in self.segments:
+            if isinstance(segment, int):
+                page = self.urls[segment].handle(response)
+                if page is not None:
+                    return page
+                continue
+
+            regex, routes = segment
+            m = regex.match(response.url)
+            if m is None:
+                continue
+
+            index, url_regex = routes[int(m.lastgroup[2:])]
+            page = self.urls[index].load_page(response, url_regex.match(response.url))
+            if page is not None:
+                return page
+
+            # The page refused to be handled, try next URLs.
+            return self.handle_from(response, index + 1)
+
+    def handle_from(self, response, start):
+        for url in self.urls[start:]:
+            page = url.handle(response)
+            if page is not None:
+                return page
+
+
 def normalize_url(url):
     """Normalize URL by lower-casing the domain and other fixes.
 
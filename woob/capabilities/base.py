@@ -17,12 +17,13 @@
 # You should have received a copy of the GNU Lesser General Public License
 # along with woob. If not, see <http://www.gnu.org/licenses/>.
 
-from collections import OrderedDict
+from collections import Counter, OrderedDict, deque
 import warnings
 import re
 from decimal import Decimal
-from copy import deepcopy, copy
+from copy import deepcopy
 import sys
+from threading import Lock
 
 from woob.tools.compat import unicode, long, with_metaclass, StrConv
 from woob.tools.misc import to_unicode
@@ -258,7 +259,7 @@ class Field(object):
 
     def __init__(self, doc, *args, **kwargs):
         self.types = ()
-        self.value = kwargs.get('default', NotLoaded)
+        self.value = self.normalize(kwargs.get('default', NotLoaded))
         self.doc = doc
         self.mandatory = kwargs.get('mandatory', True)
 
@@ -268,16 +269,77 @@ def __init__(self, doc, *args, **kwargs):
             else:
                 raise TypeError('Arguments must be types or strings of type name')
 
+        self.exact_types = frozenset(t for t in self.types if isinstance(t, type))
+        self._resolved_types = None
+
         self._creation_counter = Field._creation_counter
         Field._creation_counter += 1
 
+    def get_types(self):
+        """
+        Get the accepted types, types given by name being resolved.
+
+        :rtype: tuple
+        """
+        if self._resolved_types is not None:
+            return self._resolved_types
+
+        types = ()
+        resolved = True
+        for v in self.types:
+            if isinstance(v, str):
+                found = _find_types_by_name(v)
+                resolved = resolved and len(found) > 0
+                types += found
+            else:
+                types += (v,)
+
+        # a type given by name may be defined later
+        if resolved:
+            self._resolved_types = types
+        return types
+
     def convert(self, value):
         """
         Convert value to the wanted one.
+
+        It is not called for values whose type is exactly one of the
+        accepted types, which have to be returned unchanged.
+        """
+        return value
+
+    def normalize(self, value):
+        """
+        Get the value to store, once it has the wanted type.
+
+        Contrary to :meth:`convert`, this is not considered as a conversion.
         """
         return value
 
 
+def _find_types_by_name(name):
+    # the following is a (almost) copy/paste from
+    # https://stackoverflow.com/questions/11775460/lexical-cast-from-string-to-type
+    types = ()
+    q = deque([object])
+    while q:
+        t = q.popleft()
+        if t.__name__ == name:
+            types += (t,)
+        else:
+            try:
+                # keep looking!
+                q.extend(t.__subclasses__())
+            except TypeError:
+                # type.__subclasses__ needs an argument for
+                # whatever reason.
+                if t is type:
+                    continue
+                else:
+                    raise
+    return types
+
+
 class IntField(Field):
     """
     A field which accepts only :class:`int` and :class:`long` types.
@@ -367,6 +429,9 @@ def convert(self, value):
         return value
 
 
+_DELETED = object()
+
+
 class _BaseObjectMeta(type):
     def __new__(cls, name, bases, attrs):
         fields = [(field_name, attrs.pop(field_name)) for field_name, obj in list(attrs.items()) if isinstance(obj, Field)]
@@ -379,6 +444,18 @@ def __new__(cls, name, bases, attrs):
             new_class._fields = deepcopy(new_class._fields)
         new_class._fields.update(fields)
 
+        # Fields are shared by all instances, which only store values, in a
+        # list ordered as _fields.
+        new_class._field_index = dict((name, i) for i, name in enumerate(new_class._fields))
+        new_class._field_list = list(new_class._fields.values())
+        new_class._field_defaults = [field.value for field in new_class._fields.values()]
+        # mutable defaults have to be copied for each instance
+        new_class._field_copied_defaults = [i for i, value in enumerate(new_class._field_defaults)
+                                            if deepcopy(value) is not value]
+
+        # names for which creating an attribute is expected, see __setattr__
+        new_class._attribute_names = frozenset(dir(new_class))
+
         if new_class.__doc__ is None:
             new_class.__doc__ = ''
         for name, field in fields:
@@ -411,19 +488,44 @@ class Transfer(BaseObject):
             recipient = Field('Recipient', int, long, basestring)
 
     The docstring is mandatory.
+
+    The :class:`Field` objects in :attr:`_fields` are shared by all instances
+    of a class, values of an instance are stored in :attr:`_field_values`.
     """
 
     id = None
     backend = None
     url = StringField('url')
     _fields = None
+    _field_values = None
+
+    WARN_CONVERSIONS = True
+    """
+    Emit a :class:`ConversionWarning` each time a value is converted to the
+    type of a field. If False, conversions are only counted in
+    :attr:`CONVERSIONS`, which is much cheaper.
+    """
+
+    CONVERSIONS = Counter()
+    """
+    Number of conversions of values set when :attr:`WARN_CONVERSIONS` is
+    False, by (class name, field name).
+    """
+
+    _conversions_lock = Lock()
 
     def __init__(self, id=u'', url=NotLoaded, backend=None):
         self.id = to_unicode(id) if id is not None else u''
         self.backend = backend
-        self._fields = deepcopy(self._fields)
         self.__setattr__('url', url)
 
+    def _init_field_values(self):
+        values = list(self._field_defaults)
+        for i in self._field_copied_defaults:
+            values[i] = deepcopy(values[i])
+        object.__setattr__(self, '_field_values', values)
+        return values
+
     @property
     def fullid(self):
         """
@@ -447,10 +549,10 @@ def __iscomplete__(self):
         return True
 
     def copy(self):
-        obj = copy(self)
-        obj._fields = copy(self._fields)
-        for k in obj._fields:
-            obj._fields[k] = copy(obj._fields[k])
+        obj = self.__class__.__new__(self.__class__)
+        obj.__dict__.update(self.__dict__)
+        if self._field_values is not None:
+            object.__setattr__(obj, '_field_values', list(self._field_values))
         return obj
 
     def __deepcopy__(self, memo):
@@ -478,8 +580,12 @@ def iter_fields(self):
 
         if hasattr(self, 'id') and self.id is not None:
             yield 'id', self.id
-        for name, field in self._fields.items():
-            yield name, field.value
+        values = self._field_values
+        if values is None:
+            values = self._init_field_values()
+        for name, value in zip(self._fields, values):
+            if value is not _DELETED:
+                yield name, value
 
     def __eq__(self, obj):
         if isinstance(obj, BaseObject):
@@ -488,72 +594,75 @@ def __eq__(self, obj):
             return False
 
     def __getattr__(self, name):
-        if self._fields is not None and name in self._fields:
-            return self._fields[name].value
-        else:
-            raise AttributeError("'%s' object has no attribute '%s'" % (
-                self.__class__.__name__, name))
+        index = self._field_index.get(name)
+        if index is not None:
+            values = self._field_values
+            if values is None:
+                values = self._init_field_values()
+            value = values[index]
+            if value is not _DELETED:
+                return value
+
+        raise AttributeError("'%s' object has no attribute '%s'" % (
+            self.__class__.__name__, name))
 
     def __setattr__(self, name, value):
-        try:
-            attr = (self._fields or {})[name]
-        except KeyError:
-            if name not in dir(self) and not name.startswith('_'):
+        index = self._field_index.get(name)
+        if index is None:
+            # dir() is slow, check it last
+            if not name.startswith('_') and name not in self.__dict__ and \
+               name not in self._attribute_names and name not in dir(self):
                 warnings.warn('Creating a non-field attribute %s. Please prefix it with _' % name,
                               AttributeCreationWarning, stacklevel=2)
             object.__setattr__(self, name, value)
-        else:
-            if not empty(value):
-                try:
-                    # Try to convert value to the wanted one.
-                    nvalue = attr.convert(value)
-                    # If the value was converted
-                    if nvalue is not value:
+            return
+
+        attr = self._field_list[index]
+        # values which are empty or have exactly the field type are stored as is
+        if value is not None and not isinstance(value, EmptyType) and type(value) not in attr.exact_types:
+            try:
+                # Try to convert value to the wanted one.
+                nvalue = attr.convert(value)
+                # If the value was converted
+                if nvalue is not value:
+                    if self.WARN_CONVERSIONS:
                         warnings.warn('Value %s was converted from %s to %s' %
                                       (name, type(value), type(nvalue)),
                                       ConversionWarning, stacklevel=2)
-                    value = nvalue
-                except Exception:
-                    # error during conversion, it will probably not
-                    # match the wanted following types, so we'll
-                    # raise ValueError.
-                    pass
-            from collections import deque
-            actual_types = ()
-            for v in attr.types:
-                if isinstance(v, str):
-                    # the following is a (almost) copy/paste from
-                    # https://stackoverflow.com/questions/11775460/lexical-cast-from-string-to-type
-                    q = deque([object])
-                    while q:
-                        t = q.popleft()
-                        if t.__name__ == v:
-                            actual_types += (t,)
-                        else:
-                            try:
-                                # keep looking!
-                                q.extend(t.__subclasses__())
-                            except TypeError:
-                                # type.__subclasses__ needs an argument for
-                                # whatever reason.
-                                if t is type:
-                                    continue
-                                else:
-                                    raise
-                else:
-                    actual_types += (v,)
-
+                    else:
+                        # objects are filled by the threads of backends
+                        with self._conversions_lock:
+                            self.CONVERSIONS[(self.__class__.__name__, name)] += 1
+                value = nvalue
+            except Exception:
+                # error during conversion, it will probably not
+                # match the wanted following types, so we'll
+                # raise ValueError.
+                pass
+
+            actual_types = attr.get_types()
             if not isinstance(value, actual_types) and not empty(value):
                 raise ValueError(
                     'Value for "%s" needs to be of type %r, not %r' % (
                         name, actual_types, type(value)))
-            attr.value = value
+
+        values = self._field_values
+        if values is None:
+            values = self._init_field_values()
+        values[index] = attr.normalize(value)
 
     def __delattr__(self, name):
-        try:
-            self._fields.pop(name)
-        except KeyError:
+        index = self._field_index.get(name)
+        if index is None:
             object.__delattr__(self, name)
+            return
+
+        values = self._field_values
+        if values is None:
+            values = self._init_field_values()
+        if values[index] is _DELETED:
+            raise AttributeError(name)
+        values[index] = _DELETED
 
     def to_dict(self):
         def iter_decorate(d):
@@ -567,7 +676,7 @@ def iter_decorate(d):
 
     def __getstate__(self):
         d = self.to_dict()
-        d.update((k, v) for k, v in self.__dict__.items() if k != '_fields')
+        d.update((k, v) for k, v in self.__dict__.items() if k != '_field_values')
         return d
 
     @classmethod
@@ -580,13 +689,15 @@ def from_dict(cls, values, backend=None):
         return self
 
     def __setstate__(self, state):
-        self._fields = deepcopy(self._fields)  # because yaml does not call __init__
+        self._init_field_values()  # because yaml does not call __init__
         for k in state:
             setattr(self, k, state[k])
 
     if sys.version_info.major >= 3:
         def __dir__(self):
-            return list(super(BaseObject, self).__dir__()) + list(self._fields.keys())
+            values = self._field_values or self._field_defaults
+            return list(super(BaseObject, self).__dir__()) + \
+                [name for name, value in zip(self._fields, values) if value is not _DELETED]
 
 
 class Currency(object):
@@ -642,6 +753,29 @@ class Currency(object):
 
     EXTRACTOR = re.compile(r'[()\d\s,\.\-]', re.UNICODE)
 
+    MEMO_SIZE = 1024
+    """
+    Number of texts whose currency is remembered by :meth:`get_currency`.
+    """
+
+    @classmethod
+    def _get_currencies_index(klass):
+        """
+        Get the index of :attr:`CURRENCIES`, built once per class.
+
+        Codes and symbols are mapped to the position of the first currency
+        using them, and to this currency.
+        """
+        index = klass.__dict__.get('_currencies_index')
+        if index is None or index[0] is not klass.CURRENCIES:
+            symbols = {}
+            for position, (currency, currency_symbols) in enumerate(klass.CURRENCIES.items()):
+                for symbol in (currency,) + tuple(currency_symbols):
+                    symbols.setdefault(symbol, (position, currency))
+            index = (klass.CURRENCIES, symbols, {})
+            klass._currencies_index = index
+        return index
+
     @classmethod
     def get_currency(klass, text):
         u"""
@@ -660,16 +794,24 @@ def get_currency(klass, text):
         >>> Currency.get_currency(u'US1D')
         None
         """
-        curtexts = klass.EXTRACTOR.sub(' ', text.upper()).split()
-
-        for currency, symbols in klass.CURRENCIES.items():
-            for curtext in curtexts:
-                if curtext == currency:
-                    return currency
-                for symbol in symbols:
-                    if curtext == symbol:
-                        return currency
-        return None
+        _, symbols, memo = klass._get_currencies_index()
+        try:
+            return memo[text]
+        except KeyError:
+            pass
+
+        # the first currency of CURRENCIES found in text is returned
+        found = None
+        for curtext in klass.EXTRACTOR.sub(' ', text.upper()).split():
+            symbol = symbols.get(curtext)
+            if symbol is not None and (found is None or symbol < found):
+                found = symbol
+        currency = found[1] if found is not None else None
+
+        if len(memo) >= klass.MEMO_SIZE:
+            memo.clear()
+        memo[text] = currency
+        return currency
 
     @classmethod
     def currency2txt(klass, currency):
@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+
+# Copyright(C) 2021 The Woob Team
+#
+# This file is part of woob.
+#
+# woob is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# woob is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with woob. If not, see <http://www.gnu.org/licenses/>.
+
+import datetime
+import pickle
+import warnings
+from copy import deepcopy
+from threading import Thread
+from unittest import TestCase
+
+from woob.capabilities.base import BaseObject, ConversionWarning, Field, IntField, NotLoaded, StringField
+from woob.capabilities.date import DateField
+from woob.tools.date import date as woob_date, datetime as woob_datetime
+
+
+class MyObject(BaseObject):
+    title = StringField('Title')
+    count = IntField('Count', default=0)
+    tags = Field('Tags', list, default=[])
+    date = DateField('Date')
+
+
+class MyChildObject(MyObject):
+    content = StringField('Content')
+
+
+class BaseObjectTest(TestCase):
+    def setUp(self):
+        self.obj = MyObject(u'1', backend='foo')
+        self.obj.title = u'title'
+
+    # Check that fields have their default value, and can be set
+    def test_fields(self):
+        obj = MyObject(u'2')
+        self.assertIs(obj.title, NotLoaded)
+        self.assertEqual(obj.count, 0)
+        self.assertEqual(list(obj.iter_fields()), [
+            ('id', u'2'), ('url', NotLoaded), ('title', NotLoaded), ('count', 0), ('tags', []), ('date', NotLoaded),
+        ])
+        self.assertEqual(self.obj.title, u'title')
+
+    # Check that a deleted field is hidden until it is set again
+    def test_delete(self):
+        del self.obj.title
+        self.assertFalse(hasattr(self.obj, 'title'))
+        self.assertNotIn('title', dict(self.obj.iter_fields()))
+        self.assertNotIn('title', dir(self.obj))
+        with self.assertRaises(AttributeError):
+            del self.obj.title
+
+        # a field which has never been set can be deleted too
+        obj = MyObject(u'2')
+        del obj.count
+        self.assertFalse(hasattr(obj, 'count'))
+
+        self.obj.title = u'again'
+        self.assertEqual(self.obj.title, u'again')
+        self.assertIn('title', dict(self.obj.iter_fields()))
+
+    # Check that copies do not share their fields with the original object
+    def test_copy(self):
+        for obj in (self.obj.copy(), deepcopy(self.obj)):
+            self.assertIsNot(obj, self.obj)
+            self.assertEqual((obj.id, obj.backend, obj.title), (u'1', 'foo', u'title'))
+
+            obj.title = u'copy'
+            obj.count = 42
+            del obj.url
+            self.assertEqual((self.obj.title, self.obj.count, self.obj.url), (u'title', 0, NotLoaded))
+
+            self.obj.title = u'original'
+            self.assertEqual(obj.title, u'copy')
+            self.obj.title = u'title'
+
+        # an object which has never been set is copied too
+        obj = BaseObject.__new__(MyObject)
+        self.assertEqual(obj.copy().count, 0)
+
+    # Check that an object is the same once pickled and unpickled
+    def test_pickle(self):
+        self.obj.url = u'https://example.org/1'
+        self.obj.tags = [u'a', u'b']
+        self.obj.date = datetime.date(2021, 1, 2)
+        self.obj._private = 42
+
+        obj = pickle.loads(pickle.dumps(self.obj))
+        self.assertEqual(list(obj.iter_fields()), list(self.obj.iter_fields()))
+        self.assertEqual((obj.backend, obj._private), ('foo', 42))
+        self.assertNotIn('_field_values', self.obj.__getstate__())
+
+    # Check that states pickled when values were stored in _fields are loaded
+    def test_setstate_previous(self):
+        # state returned by __getstate__ when values were stored in copies
+        # of the fields of the class
+        state = {
+            'id': u'1', 'url': NotLoaded, 'title': u'title', 'count': 3,
+            'backend': 'foo', '_private': 42,
+        }
+        obj = MyObject.__new__(MyObject)
+        obj.__setstate__(state)
+
+        self.assertEqual((obj.id, obj.backend, obj._private), (u'1', 'foo', 42))
+        self.assertEqual((obj.title, obj.count, obj.tags), (u'title', 3, []))
+        self.assertIs(obj.date, NotLoaded)
+
+    # Check that mutable default values are not shared between instances
+    def test_mutable_default(self):
+        other = MyObject(u'2')
+        self.obj.tags.append(u'a')
+        self.assertEqual(self.obj.tags, [u'a'])
+        self.assertEqual(other.tags, [])
+        self.assertEqual(MyObject(u'3').tags, [])
+        self.assertEqual(MyObject._fields['tags'].value, [])
+
+    # Check that fields of a subclass are not added to its parent class
+    def test_subclass(self):
+        child = MyChildObject(u'2')
+        child.content = u'content'
+        child.title = u'child'
+        self.assertEqual(list(MyChildObject._fields), ['url', 'title', 'count', 'tags', 'date', 'content'])
+        self.assertEqual(list(MyObject._fields), ['url', 'title', 'count', 'tags', 'date'])
+        self.assertEqual((child.title, self.obj.title), (u'child', u'title'))
+
+        self.assertFalse(hasattr(self.obj, 'content'))
+        with self.assertRaises(ValueError):
+            child.count = u'not a number'
+
+    # Check that dates are stored with the date types of woob
+    def test_date_normalize(self):
+        self.obj.date = datetime.date(2021, 1, 2)
+        self.assertIs(type(self.obj.date), woob_date)
+        self.assertEqual(self.obj.date, datetime.date(2021, 1, 2))
+
+        self.obj.date = datetime.datetime(2021, 1, 2, 3, 4)
+        self.assertIs(type(self.obj.date), woob_datetime)
+        self.assertEqual(self.obj.date, datetime.datetime(2021, 1, 2, 3, 4))
+
+        field = DateField('Date', default=datetime.date(1850, 1, 1))
+        self.assertIs(type(field.value), woob_date)
+
+
+class ConversionsTest(TestCase):
+    def setUp(self):
+        self.warn_conversions = BaseObject.WARN_CONVERSIONS
+        BaseObject.WARN_CONVERSIONS = False
+        BaseObject.CONVERSIONS.clear()
+        self.obj = MyObject(u'1')
+
+    def tearDown(self):
+        BaseObject.WARN_CONVERSIONS = self.warn_conversions
+        BaseObject.CONVERSIONS.clear()
+
+    # Check that conversions are counted instead of emitting warnings
+    def test_count(self):
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', ConversionWarning)
+            self.obj.count = u'42'
+            self.obj.count = 43
+            self.obj.title = b'title'
+            self.obj.count = NotLoaded
+        self.assertEqual((self.obj.count, self.obj.title), (NotLoaded, u'title'))
+        self.assertEqual(BaseObject.CONVERSIONS, {('MyObject', 'count'): 1, ('MyObject', 'title'): 1})
+
+        BaseObject.WARN_CONVERSIONS = True
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always', ConversionWarning)
+            self.obj.count = u'42'
+        self.assertEqual(self.obj.count, 42)
+        self.assertEqual([warning.category for warning in caught], [ConversionWarning])
+        self.assertEqual(BaseObject.CONVERSIONS[('MyObject', 'count')], 1)
+
+    # Check that a value which can't be converted is refused
+    def test_bad_type(self):
+        with self.assertRaises(ValueError):
+            self.obj.count = u'not a number'
+        with self.assertRaises(ValueError):
+            self.obj.date = u'2021-01-02'
+        self.assertEqual(self.obj.count, 0)
+        self.assertEqual(BaseObject.CONVERSIONS, {})
+
+    # Check that conversions made by several threads are all counted
+    def test_threads(self):
+        def convert():
+            obj = MyObject(u'1')
+            for i in range(1000):
+                obj.count = u'%d' % i
+
+        threads = [Thread(target=convert) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(BaseObject.CONVERSIONS[('MyObject', 'count')], 4000)
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+
+# Copyright(C) 2021 The Woob Team
+#
+# This file is part of woob.
+#
+# woob is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# woob is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with woob. If not, see <http://www.gnu.org/licenses/>.
+
+import random
+from collections import OrderedDict
+from unittest import TestCase
+
+from woob.capabilities.bank import Account
+from woob.capabilities.base import Currency
+
+
+# Implementation of Currency.get_currency comparing every token with every
+# code and symbol
+def get_currency_by_scan(klass, text):
+    curtexts = klass.EXTRACTOR.sub(' ', text.upper()).split()
+
+    for currency, symbols in klass.CURRENCIES.items():
+        for curtext in curtexts:
+            if curtext == currency:
+                return currency
+            for symbol in symbols:
+                if curtext == symbol:
+                    return currency
+    return None
+
+
+class CurrencyTest(TestCase):
+    def setUp(self):
+        self.random = random.Random(42)
+        words = set()
+        for currency, symbols in Currency.CURRENCIES.items():
+            for word in (currency,) + symbols:
+                words.update((word, word.lower(), word.capitalize()))
+        words.update((u'US', u'D', u'EU', u'RO', u'$$', u'€€', u'K', u'lei', u'ROL'))
+        self.words = sorted(words)
+        self.separators = [u'', u' ', u'  ', u'\xa0', u'-', u',', u'.', u'(', u')', u'%', u'/', u'\n']
+
+    def random_text(self):
+        parts = []
+        for _ in range(self.random.randint(0, 6)):
+            choice = self.random.random()
+            if choice < 0.5:
+                parts.append(self.random.choice(self.words))
+            elif choice < 0.8:
+                parts.append(u'%d,%02d' % (self.random.randint(0, 100000), self.random.randint(0, 99)))
+            else:
+                parts.append(u''.join(chr(self.random.randint(32, 0x20cf)) for _ in range(self.random.randint(1, 3))))
+            parts.append(self.random.choice(self.separators))
+        return u''.join(parts)
+
+    # get_currency returns the same currency as scanning CURRENCIES, with or
+    # without its memo
+    def test_same_as_scan(self):
+        for _ in range(20000):
+            text = self.random_text()
+            expected = get_currency_by_scan(Currency, text)
+            self.assertEqual(Currency.get_currency(text), expected, text)
+            self.assertEqual(Currency.get_currency(text), expected, text)
+            self.assertEqual(Account.get_currency(text), expected, text)
+
+    # the first currency of CURRENCIES is returned when several are found
+    def test_precedence(self):
+        self.assertEqual(Currency.get_currency(u'42 $'), u'USD')
+        self.assertEqual(Currency.get_currency(u'MXN 42 $'), u'USD')
+        self.assertEqual(Currency.get_currency(u'42 ¥'), u'JPY')
+        self.assertEqual(Currency.get_currency(u'USD 42 €'), u'EUR')
+        self.assertEqual(Currency.get_currency(u'kr 42'), None)
+        self.assertEqual(Currency.get_currency(u'KR 42'), None)
+
+    # the memo doesn't grow more than MEMO_SIZE texts
+    def test_memo_size(self):
+        for i in range(Currency.MEMO_SIZE * 3):
+            Currency.get_currency(u'%d €' % i)
+        self.assertLessEqual(len(Currency._get_currencies_index()[2]), Currency.MEMO_SIZE)
+
+    # classes defining their own CURRENCIES get their own index
+    def test_subclass(self):
+        class MyCurrency(Currency):
+            CURRENCIES = OrderedDict([
+                (u'XBT', (u'₿', u'BTC')),
+                (u'EUR', (u'€',)),
+            ])
+
+        self.assertEqual(Currency.get_currency(u'42 BTC'), None)
+        self.assertEqual(MyCurrency.get_currency(u'42 BTC'), u'XBT')
+        self.assertEqual(MyCurrency.get_currency(u'42 € ₿'), u'XBT')
+        self.assertEqual(MyCurrency.get_currency(u'42 $'), None)
+
+        for _ in range(2000):
+            text = self.random_text() + self.random.choice([u'', u' ₿', u' BTC'])
+            self.assertEqual(MyCurrency.get_currency(text), get_currency_by_scan(MyCurrency, text), text)
@@ -18,8 +18,10 @@
 # along with woob. If not, see <http://www.gnu.org/licenses/>.
 
 
+import asyncio
 from copy import copy
-from threading import Thread, Event
+from threading import BoundedSemaphore, Event, Lock, Thread
+from time import time
 try:
     import Queue
 except ImportError:
@@ -31,7 +33,7 @@
 from woob.tools.log import getLogger
 
 
-__all__ = ['BackendsCall', 'CallErrors']
+__all__ = ['AsyncBackendsCall', 'BackendsCall', 'CallErrors', 'CallTimeout']
 
 
 class CallErrors(Exception):
@@ -47,44 +49,225 @@ def __iter__(self):
         return self.errors.__iter__()
 
 
+class CallTimeout(Exception):
+    """
+    Raised (and stored in :class:`CallErrors`) when a backend did not finish
+    its task before the deadline given to :class:`BackendsCall`.
+    """
+
+    def __init__(self, backend, timeout):
+        super(CallTimeout, self).__init__('Backend %s did not complete in %s seconds' % (backend, timeout))
+        self.timeout = timeout
+
+
 class BackendsCall(object):
-    def __init__(self, backends, function, *args, **kwargs):
+    MAX_WORKERS = None
+    """
+    Default maximum number of threads running backends in parallel. If None,
+    one thread is started per backend.
+    """
+
+    MAX_RESPONSES = 0
+    """
+    Default maximum number of results waiting to be consumed. When the queue
+    is full, backends are paused until the consumer catches up, so results
+    have to be consumed (iterating or with :func:`callback_thread`) before
+    calling :func:`wait`. 0 means no limit.
+    """
+
+    TIMEOUT = None
+    """
+    Default delay in seconds given to each backend to complete its task.
+    Time spent waiting for the consumer to take results is not counted,
+    and a backend can only be interrupted between two results.
+    """
+
+    _END = object()
+    """
+    Marker put in the responses queue when every backend has finished.
+    """
+
+    def __init__(self, backends, function, *args, max_workers=None, max_responses=None, timeout=None, **kwargs):
         """
         :param backends: List of backends to call
         :type backends: list[:class:`Module`]
         :param function: backends' method name, or callable object.
         :type function: :class:`str` or :class:`callable`
+        :param max_workers: maximum number of backends called in parallel
+                            (default is :attr:`MAX_WORKERS`)
+        :type max_workers: :class:`int`
+        :param max_responses: maximum number of results waiting to be
+                              consumed (default is :attr:`MAX_RESPONSES`)
+        :type max_responses: :class:`int`
+        :param timeout: delay in seconds given to each backend to complete
+                        (default is :attr:`TIMEOUT`)
+        :type timeout: :class:`float`
         """
         self.logger = getLogger('bcall')
 
-        self.responses = Queue.Queue()
+        if max_workers is None:
+            max_workers = self.MAX_WORKERS
+        if max_responses is None:
+            max_responses = self.MAX_RESPONSES
+        if timeout is None:
+            timeout = self.TIMEOUT
+        self.timeout = timeout
+
+        self.responses = Queue.Queue(max_responses)
         self.errors = []
         self.tasks = Queue.Queue()
         self.stop_event = Event()
         self.threads = []
 
+        self.start_time = time()
+        self.first_result_time = None
+        self.end_time = None
+        self.function = function
+
+        # Every task is queued before the workers are started, so that
+        # tasks.unfinished_tasks is right as soon as the constructor returns.
         for backend in backends:
-            t = Thread(target=self.backend_process, args=(function, args, kwargs))
+            self.tasks.put(backend)
+
+        nb_workers = len(backends)
+        if max_workers:
+            nb_workers = min(nb_workers, max_workers)
+
+        self.workers_lock = Lock()
+        self.running_workers = nb_workers
+        if not nb_workers:
+            self._end()
+
+        for _ in range(nb_workers):
+            t = Thread(target=self._worker_run, args=(function, args, kwargs))
             t.start()
             self.threads.append(t)
-            self.tasks.put(backend)
+
+    @property
+    def time_to_first_result(self):
+        """
+        Delay in seconds between the start of the call and the first result,
+        or None if there is no result yet.
+        """
+        if self.first_result_time is None:
+            return None
+        return self.first_result_time - self.start_time
+
+    @property
+    def duration(self):
+        """
+        Delay in seconds between the start of the call and the end of the
+        last backend, or None if the call is not finished.
+        """
+        if self.end_time is None:
+            return None
+        return self.end_time - self.start_time
+
+    def _worker_run(self, function, args, kwargs):
+        try:
+            while not self.stop_event.is_set():
+                try:
+                    backend = self.tasks.get_nowait()
+                except Queue.Empty:
+                    return
+
+                self._process(backend, function, args, kwargs)
+        finally:
+            with self.workers_lock:
+                self.running_workers -= 1
+                last = self.running_workers == 0
+            if last:
+                self._end()
+
+    def _end(self):
+        self._log_timings()
+
+        while not self.stop_event.is_set():
+            try:
+                self.responses.put(self._END, timeout=0.1)
+            except Queue.Full:
+                continue
+            else:
+                return
+
+    def _log_timings(self):
+        self.end_time = time()
+        if self.first_result_time is None:
+            self.logger.debug('%s: no result, completed in %.3fs', self.function, self.duration)
+        else:
+            self.logger.debug('%s: first result in %.3fs, completed in %.3fs',
+                              self.function, self.time_to_first_result, self.duration)
+
+    def _iter_responses(self):
+        while not self.stop_event.is_set():
+            response = self.responses.get()
+            if response is self._END:
+                # Put the marker back for any other consumer.
+                try:
+                    self.responses.put_nowait(self._END)
+                except Queue.Full:
+                    pass
+                return
+
+            yield response
 
     def store_result(self, backend, result):
-        """Store the result when a backend task finished."""
+        """
+        Store the result when a backend task finished.
+
+        If the responses queue is full, wait until the consumer takes a
+        result or the call is stopped.
+
+        :returns: False if the call has been stopped
+        :rtype: bool
+        """
         if result is None:
-            return
+            return True
 
         if isinstance(result, BaseObject):
             result.backend = backend.name
-        self.responses.put(result)
+
+        if self.first_result_time is None:
+            self.first_result_time = time()
+
+        return self._put_response(backend, result)
+
+    def _put_response(self, backend, result):
+        while True:
+            try:
+                self.responses.put(result, timeout=0.1)
+            except Queue.Full:
+                if self.stop_event.is_set():
+                    return False
+            else:
+                return True
+
+    def _get_deadline(self, backend):
+        if self.timeout:
+            return time() + self.timeout
+
+    def _postpone(self, backend, deadline, delay):
+        # Time spent waiting for the consumer is not charged to the backend.
+        if deadline is not None:
+            return deadline + delay
+
+    def _is_expired(self, deadline):
+        return deadline is not None and time() > deadline
+
+    def _store_timeout(self, backend):
+        self.errors.append((backend, CallTimeout(backend, self.timeout), get_backtrace()))
 
     def backend_process(self, function, args, kwargs):
         """
-        Internal method to run a method of a backend.
+        Internal method to run a method of the next queued backend.
 
         As this method may be blocking, it should be run on its own thread.
         """
-        backend = self.tasks.get()
+        self._process(self.tasks.get(), function, args, kwargs)
+
+    def _process(self, backend, function, args, kwargs):
+        deadline = self._get_deadline(backend)
+
         with backend:
             try:
                 # Call method on backend
@@ -104,8 +287,16 @@ def backend_process(self, function, args, kwargs):
                         # Loop on iterator
                         try:
                             for subresult in result:
-                                self.store_result(backend, subresult)
-                                if self.stop_event.is_set():
+                                put_time = time()
+                                if not self.store_result(backend, subresult) or self.stop_event.is_set():
+                                    break
+
+                                deadline = self._postpone(backend, deadline, time() - put_time)
+                                if self._is_expired(deadline):
+                                    # The timeout can only interrupt a backend
+                                    # between two results.
+                                    self.logger.debug('%s: Called function %s timed out', backend, function)
+                                    self._store_timeout(backend)
                                     break
                         except Exception as error:
                             self.errors.append((backend, error, get_backtrace(error)))
@@ -115,14 +306,9 @@ def backend_process(self, function, args, kwargs):
                 self.tasks.task_done()
 
     def _callback_thread_run(self, callback, errback, finishback):
-        while not self.stop_event.is_set() and (self.tasks.unfinished_tasks or not self.responses.empty()):
-            try:
-                response = self.responses.get(timeout=0.1)
-            except Queue.Empty:
-                continue
-            else:
-                if callback:
-                    callback(response)
+        for response in self._iter_responses():
+            if callback:
+                callback(response)
 
         # Raise errors
         while errback and self.errors:
@@ -167,19 +353,266 @@ def stop(self, wait=False):
 
         self.stop_event.set()
 
+        # Wake up consumers waiting for a response.
+        try:
+            self.responses.put_nowait(self._END)
+        except Queue.Full:
+            pass
+
         if wait:
             self.wait()
 
     def __iter__(self):
         try:
-            while not self.stop_event.is_set() and (self.tasks.unfinished_tasks or not self.responses.empty()):
-                try:
-                    yield self.responses.get(timeout=0.1)
-                except Queue.Empty:
-                    continue
+            for response in self._iter_responses():
+                yield response
         except:
             self.stop()
             raise
 
         if self.errors:
             raise CallErrors(self.errors)
+
+
+class AsyncBackendsCall(BackendsCall):
+    """
+    Asynchronous version of :class:`BackendsCall`, to iterate on results
+    with ``async for``.
+
+    Backends are run in the given executor, and results are handed to the
+    event loop as soon as they are produced.
+
+    When the call is cancelled, or when the deadline given by *timeout* is
+    exceeded, backends are asked to stop after their current result. Note
+    that a blocking module call can't be interrupted, so it keeps its
+    executor worker until it returns.
+
+    Backends waiting for the consumer keep their executor worker too, so
+    a call left before its end has to be stopped. Iterate within
+    ``async with`` to stop it on ``break``, exceptions or cancellation::
+
+        async with AsyncBackendsCall(backends, 'iter_history', account, executor=executor) as call:
+            async for transaction in call:
+                if transaction.date < since:
+                    break
+
+    :param backends: List of backends to call
+    :type backends: list[:class:`Module`]
+    :param function: backends' method name, or callable object.
+    :type function: :class:`str` or :class:`callable`
+    :param executor: executor used to run the blocking backends code
+    :type executor: :class:`concurrent.futures.Executor`
+    :param max_responses: maximum number of results waiting to be consumed
+    :type max_responses: :class:`int`
+    :param timeout: delay in seconds, from the start of the call, given to
+                    each backend to complete, not counting the time it
+                    waits for the consumer
+    :type timeout: :class:`float`
+    """
+
+    def __init__(self, backends, function, *args, executor, max_responses=None, timeout=None, **kwargs):
+        self.logger = getLogger('bcall')
+
+        if max_responses is None:
+            max_responses = self.MAX_RESPONSES
+        if timeout is None:
+            timeout = self.TIMEOUT
+        self.timeout = timeout
+
+        self.errors = []
+        self.tasks = Queue.Queue()
+        self.stop_event = Event()
+        self.threads = []
+
+        self.backends = list(backends)
+        self.function = function
+        self.args = args
+        self.kwargs = kwargs
+        self.executor = executor
+
+        # Limit on results waiting in the asyncio queue. It is a thread
+        # semaphore as producers are running in the executor.
+        self.slots = BoundedSemaphore(max_responses) if max_responses else None
+
+        self.loop = None
+        self.responses = None
+        self.futures = []
+        self.running = set()
+        self.expired = set()
+        self.expired_lock = Lock()
+        self.deadlines = {}
+        self.waiting = set()
+        self.finished = False
+
+        self.start_time = None
+        self.first_result_time = None
+        self.end_time = None
+
+    def _start(self):
+        self.start_time = time()
+        self.loop = asyncio.get_running_loop()
+        self.responses = asyncio.Queue()
+
+        for backend in self.backends:
+            self.tasks.put(backend)
+            self.running.add(backend)
+            if self.timeout:
+                self.deadlines[backend] = self.start_time + self.timeout
+            self.futures.append(self.loop.run_in_executor(self.executor, self._backend_run, backend))
+
+    def _backend_run(self, backend):
+        try:
+            self._process(backend, self.function, self.args, self.kwargs)
+        finally:
+            self._post(backend, self._END)
+
+    def _post(self, backend, result):
+        try:
+            self.loop.call_soon_threadsafe(self.responses.put_nowait, (backend, result))
+        except RuntimeError:
+            # Event loop is closed, nobody is listening anymore.
+            self.stop_event.set()
+            return False
+        return True
+
+    def _put_response(self, backend, result):
+        if self.slots is not None and not self.slots.acquire(blocking=False):
+            # The consumer does not expire a backend waiting for it, and the
+            # waiting time is added to its deadline before it runs again.
+            self.waiting.add(backend)
+            wait_time = time()
+            try:
+                while not self.slots.acquire(timeout=0.1):
+                    if self.stop_event.is_set() or backend in self.expired:
+                        return False
+            finally:
+                if backend in self.deadlines:
+                    self.deadlines[backend] += time() - wait_time
+                self.waiting.discard(backend)
+
+        if self.stop_event.is_set() or backend in self.expired or not self._post(backend, result):
+            # The result will never be consumed, give its slot back.
+            if self.slots is not None:
+                self.slots.release()
+            return False
+        return True
+
+    def _get_deadline(self, backend):
+        return self.deadlines.get(backend)
+
+    def _postpone(self, backend, deadline, delay):
+        # Already postponed by _put_response.
+        return self.deadlines.get(backend)
+
+    def _get_wait_delay(self):
+        deadlines = [self.deadlines[backend] for backend in self.running
+                     if backend in self.deadlines and backend not in self.waiting]
+        if deadlines:
+            return max(0, min(deadlines) - time())
+
+    def _expire(self):
+        now = time()
+        for backend in list(self.running):
+            if backend in self.deadlines and backend not in self.waiting and self.deadlines[backend] <= now:
+                self._store_timeout(backend)
+                self.running.discard(backend)
+
+    def _store_timeout(self, backend):
+        with self.expired_lock:
+            if backend in self.expired:
+                return
+            self.expired.add(backend)
+        super(AsyncBackendsCall, self)._store_timeout(backend)
+
+    def _finish(self):
+        self.finished = True
+        self._log_timings()
+        if self.errors:
+            raise CallErrors(self.errors)
+        raise StopAsyncIteration()
+
+    def __aiter__(self):
+        return self
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.aclose()
+
+    async def aclose(self):
+        """
+        Stop all tasks, when results are not consumed anymore.
+
+        Backends waiting for the consumer give up their result and free
+        their executor worker.
+        """
+        self.stop()
+
+    async def __anext__(self):
+        if self.finished:
+            raise StopAsyncIteration()
+
+        if self.loop is None:
+            self._start()
+
+        while self.running and not self.stop_event.is_set():
+            try:
+                backend, result = self.responses.get_nowait()
+            except asyncio.QueueEmpty:
+                try:
+                    backend, result = await asyncio.wait_for(self.responses.get(), self._get_wait_delay())
+                except asyncio.TimeoutError:
+                    self._expire()
+                    continue
+                except asyncio.CancelledError:
+                    self.stop()
+                    raise
+
+            if result is self._END:
+                self.running.discard(backend)
+                continue
+
+            if self.slots is not None:
+                self.slots.release()
+
+            if backend in self.expired:
+                continue
+
+            return result
+
+        self._finish()
+
+    def __iter__(self):
+        raise TypeError('%s has to be iterated with "async for"' % type(self).__name__)
+
+    def callback_thread(self, callback, errback=None, finishback=None):
+        """
+        Not supported, as results are delivered to the event loop. Iterate
+        with ``async for`` instead.
+
+        :raises: :class:`TypeError`
+        """
+        raise TypeError('%s has to be iterated with "async for"' % type(self).__name__)
+
+    def stop(self, wait=False):
+        """
+        Stop all tasks.
+
+        Backends stop after their current result, and backends waiting for
+        the consumer give up.
+
+        :param wait: ignored, use :func:`wait` to wait for backends
+        :type wait: bool
+        """
+        self.stop_event.set()
+
+    async def wait(self):
+        """Wait until all tasks are finished."""
+        if self.loop is None:
+            self._start()
+
+        await asyncio.gather(*self.futures)
+
+        if self.errors:
+            raise CallErrors(self.errors)
@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+
+# Copyright(C) 2021 The Woob Team
+#
+# This file is part of woob.
+#
+# woob is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# woob is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with woob. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Read information of modules from their source code, without importing them.
+"""
+
+import ast
+import os
+from importlib import import_module
+
+from woob.capabilities.base import Capability
+
+
+__all__ = ['StaticReadError', 'get_tree_stamp', 'read_module_info']
+
+
+MODULE_BASES = {
+    ('woob.tools.backend', 'Module'),
+    ('woob.tools.backend', 'AbstractModule'),
+    ('weboob.tools.backend', 'Module'),
+    ('weboob.tools.backend', 'AbstractModule'),
+}
+
+CAPABILITIES_PACKAGES = ('woob.capabilities', 'weboob.capabilities')
+
+ATTRIBUTES = {
+    'NAME': None,
+    'MAINTAINER': u'<unspecified>',
+    'EMAIL': '<unspecified>',
+    'DESCRIPTION': '<unspecified>',
+    'LICENSE': '<unspecified>',
+    'ICON': None,
+}
+
+
+class StaticReadError(Exception):
+    """
+    Raised when information of a module can't be read without importing it.
+    """
+
+
+def get_tree_stamp(path):
+    """
+    Get the last modification time of files and directories of a tree.
+
+    Files removed or added in a directory change its modification time, so
+    the result changes as soon as anything changes in the tree.
+
+    :param path: root of the tree
+    :type path: str
+    :returns: last modification time of a file (compiled files excepted),
+              and last modification time of a directory
+    :rtype: tuple[float, float]
+    """
+    files_mtime = 0
+    dirs_mtime = 0
+    stack = [path]
+    while stack:
+        for entry in os.scandir(stack.pop()):
+            if entry.is_dir(follow_symlinks=False):
+                stack.append(entry.path)
+                dirs_mtime = max(dirs_mtime, entry.stat().st_mtime)
+            elif not entry.name.endswith('.pyc'):
+                files_mtime = max(files_mtime, entry.stat().st_mtime)
+    return files_mtime, max(dirs_mtime, os.path.getmtime(path))
+
+
+def _parse(filename):
+    with open(filename, 'rb') as f:
+        return ast.parse(f.read(), filename)
+
+
+def _get_imports(tree):
+    """
+    Map names imported by a file to their (module, attribute).
+    """
+    imports = {}
+    for node in tree.body:
+        if isinstance(node, ast.ImportFrom):
+            module = node.module or ''
+            if node.level:
+                module = ('.' * node.level) + module
+            for alias in node.names:
+                imports[alias.asname or alias.name] = (module, alias.name)
+    return imports
+
+
+def _get_relative_files(path, imports):
+    for module, _ in imports.values():
+        if not module.startswith('.') or module.startswith('..'):
+            continue
+        name = module[1:]
+        for filename in (os.path.join(path, '%s.py' % name), os.path.join(path, name, '__init__.py')):
+            if os.path.isfile(filename):
+                yield filename
+                break
+
+
+def _get_capability(module, name):
+    if not module.startswith(CAPABILITIES_PACKAGES):
+        raise StaticReadError('base %s is imported from %s' % (name, module))
+
+    try:
+        cap = getattr(import_module(module), name)
+    except (ImportError, AttributeError) as e:
+        raise StaticReadError('unable to get base %s: %s' % (name, e))
+
+    if not isinstance(cap, type) or not issubclass(cap, Capability):
+        raise StaticReadError('base %s is not a capability' % name)
+    return cap
+
+
+def _read_class(node, imports):
+    caps = set()
+    for base in node.bases:
+        if not isinstance(base, ast.Name) or base.id not in imports:
+            raise StaticReadError('unknown base of class %s' % node.name)
+        module, name = imports[base.id]
+        if (module, name) in MODULE_BASES:
+            continue
+
+        for cap in _get_capability(module, name).mro():
+            if issubclass(cap, Capability) and cap is not Capability:
+                caps.add(cap.__name__)
+
+    info = dict(ATTRIBUTES)
+    for statement in node.body:
+        if not isinstance(statement, ast.Assign):
+            continue
+        for target in statement.targets:
+            if isinstance(target, ast.Name) and target.id in ATTRIBUTES:
+                try:
+                    info[target.id] = ast.literal_eval(statement.value)
+                except ValueError:
+                    raise StaticReadError('%s.%s is not a literal' % (node.name, target.id))
+
+    if not info['NAME']:
+        raise StaticReadError('%s.NAME is not set' % node.name)
+
+    info['capabilities'] = sorted(caps)
+    return info
+
+
+def read_module_info(path):
+    """
+    Read information of a module from the source code of its package.
+
+    The module class has to be defined in the package ``__init__.py`` or in
+    a file it imports, directly inherit from capabilities and from
+    :class:`woob.tools.backend.Module` or
+    :class:`woob.tools.backend.AbstractModule`, and define its attributes
+    with literals.
+
+    :param path: path of the module package
+    :type path: str
+    :returns: values of ``NAME``, ``MAINTAINER``, ``EMAIL``, ``DESCRIPTION``,
+              ``LICENSE`` and ``ICON`` attributes, and ``capabilities``
+              names
+    :rtype: dict
+    :raises: :class:`StaticReadError` if the module has to be imported
+    """
+    filenames = [os.path.join(path, '__init__.py')]
+    found = []
+    for filename in filenames:
+        try:
+            tree = _parse(filename)
+        except (IOError, SyntaxError, ValueError) as e:
+            raise StaticReadError('unable to parse %s: %s' % (filename, e))
+
+        imports = _get_imports(tree)
+        for node in tree.body:
+            if not isinstance(node, ast.ClassDef):
+                continue
+            if any(isinstance(base, ast.Name) and imports.get(base.id) in MODULE_BASES for base in node.bases):
+                found.append((node, imports))
+
+        if filename == filenames[0]:
+            filenames.extend(_get_relative_files(path, imports))
+
+    if len(found) != 1:
+        raise StaticReadError('%d module classes found' % len(found))
+
+    return _read_class(*found[0])
@@ -17,16 +17,92 @@
 # You should have received a copy of the GNU Lesser General Public License
 # along with woob. If not, see <http://www.gnu.org/licenses/>.
 
-import os
-import imp
+import importlib.util
 import logging
+import os
+import py_compile
+import sys
+import tempfile
+import zipfile
+import zipimport
 
 from woob.tools.backend import Module, BackendConfig
 from woob.tools.compat import basestring
 from woob.tools.log import getLogger
 from woob.exceptions import ModuleLoadError
 
-__all__ = ['LoadedModule', 'ModulesLoader', 'RepositoryModulesLoader']
+__all__ = ['LoadedModule', 'ModulesLoader', 'RepositoryModulesLoader', 'create_bundle', 'import_package']
+
+
+def import_package(name, path):
+    """
+    Import a package as a top-level package.
+
+    The package is executed again if it is already imported.
+
+    :param name: name of the package
+    :type name: str
+    :param path: directory or zip archive containing the package
+    :type path: str
+    :rtype: module
+    """
+    if os.path.isfile(path):
+        importer = zipimport.zipimporter(path)
+        if not hasattr(importer, 'find_spec'):
+            # python < 3.10
+            return importer.load_module(name)
+        spec = importer.find_spec(name)
+        if spec is None:
+            raise ImportError('No module named %s in %s' % (name, path))
+    else:
+        package_path = os.path.join(path, name)
+        spec = importlib.util.spec_from_file_location(name, os.path.join(package_path, '__init__.py'),
+                                                      submodule_search_locations=[package_path])
+
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        sys.modules.pop(name, None)
+        raise
+    return sys.modules[name]
+
+
+def create_bundle(path, filename):
+    """
+    Create a zip archive with all modules of a directory.
+
+    The archive can be given as path of a :class:`ModulesLoader`, to load
+    modules from one file. Compiled files are stored next to sources, so
+    modules are not compiled again when they are loaded.
+
+    Modules reading data files next to their sources can't be loaded from an
+    archive.
+
+    :param path: directory containing modules
+    :type path: str
+    :param filename: path of the archive to create
+    :type filename: str
+    """
+    loader = ModulesLoader(path)
+    # compiled files are written in a temporary directory, not in __pycache__
+    # directories of the sources
+    with tempfile.TemporaryDirectory() as tmpdir, zipfile.ZipFile(filename, 'w', zipfile.ZIP_DEFLATED) as bundle:
+        cfile = os.path.join(tmpdir, 'module.pyc')
+        for name in sorted(loader.iter_existing_module_names()):
+            for root, dirs, files in os.walk(os.path.join(path, name)):
+                dirs[:] = sorted(d for d in dirs if d != '__pycache__')
+                for basename in sorted(files):
+                    if basename.endswith('.pyc'):
+                        continue
+
+                    source = os.path.join(root, basename)
+                    arcname = os.path.relpath(source, path)
+                    bundle.write(source, arcname)
+                    if basename.endswith('.py'):
+                        # zipimport only looks for compiled files next to sources
+                        bundle.write(py_compile.compile(source, cfile=cfile, doraise=True), arcname + 'c')
 
 
 class LoadedModule(object):
@@ -101,6 +177,12 @@ def create_instance(self, woob, backend_name, config, storage, nofail=False, log
 class ModulesLoader(object):
     """
     Load modules.
+
+    :param path: directory containing modules, or zip archive created by
+                 :func:`create_bundle`
+    :type path: str
+    :param version: version of woob required by modules
+    :type version: str
     """
 
     def __init__(self, path, version=None):
@@ -109,6 +191,9 @@ def __init__(self, path, version=None):
         self.loaded = {}
         self.logger = getLogger('modules')
 
+        self._modules = None
+        self._modules_stamp = None
+
     def get_or_load_module(self, module_name):
         """
         Can raise a ModuleLoadError exception.
@@ -117,20 +202,53 @@ def get_or_load_module(self, module_name):
             self.load_module(module_name)
         return self.loaded[module_name]
 
+    def _list_modules(self):
+        modules = {}
+        if os.path.isfile(self.path):
+            with zipfile.ZipFile(self.path) as bundle:
+                for arcname in bundle.namelist():
+                    name, _, basename = arcname.partition('/')
+                    if basename in ('__init__.py', '__init__.pyc'):
+                        modules[name] = self.path
+            return modules
+
+        try:
+            entries = list(os.scandir(self.path))
+        except OSError:
+            return modules
+
+        for entry in entries:
+            if entry.is_dir() and os.path.isfile(os.path.join(entry.path, '__init__.py')):
+                modules[entry.name] = entry.path
+        return modules
+
+    def get_modules_paths(self):
+        """
+        Get paths of existing modules.
+
+        The list is read again only when the modification time of the
+        modules directory (or archive) changes, that is when a module is
+        added or removed.
+
+        :returns: path of the package of each module, or path of the archive
+        :rtype: dict[str, str]
+        """
+        try:
+            stamp = os.stat(self.path).st_mtime
+        except OSError:
+            stamp = None
+
+        if self._modules is None or stamp != self._modules_stamp:
+            self._modules = self._list_modules()
+            self._modules_stamp = stamp
+        return self._modules
+
     def iter_existing_module_names(self):
-        for name in os.listdir(self.path):
-            try:
-                if '__init__.py' in os.listdir(os.path.join(self.path, name)):
-                    yield name
-            except OSError:
-                # if path/name is not a directory
-                continue
+        for name in self.get_modules_paths():
+            yield name
 
     def module_exists(self, name):
-        for existing_module_name in self.iter_existing_module_names():
-            if existing_module_name == name:
-                return True
-        return False
+        return name in self.get_modules_paths()
 
     def load_all(self):
         for existing_module_name in self.iter_existing_module_names():
@@ -147,12 +265,7 @@ def load_module(self, module_name):
         path = self.get_module_path(module_name)
 
         try:
-            fp, pathname, description = imp.find_module(module_name, [path])
-            try:
-                module = LoadedModule(imp.load_module(module_name, fp, pathname, description))
-            finally:
-                if fp:
-                    fp.close()
+            module = LoadedModule(import_package(module_name, path))
         except Exception as e:
             if logging.root.level <= logging.DEBUG:
                 self.logger.exception(e)
@@ -182,6 +295,9 @@ def iter_existing_module_names(self):
         for name in self.repositories.get_all_modules_info():
             yield name
 
+    def module_exists(self, name):
+        return self.repositories.get_module_info(name) is not None
+
     def get_module_path(self, module_name):
         minfo = self.repositories.get_module_info(module_name)
         if minfo is None:
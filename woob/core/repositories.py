@@ -19,7 +19,6 @@
 
 
 from __future__ import print_function
-import imp
 import posixpath
 import shutil
 import re
@@ -27,14 +26,19 @@
 import os
 import subprocess
 import hashlib
+import json
 from compileall import compile_dir
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from contextlib import closing, contextmanager
 from datetime import datetime
 from io import BytesIO, StringIO
 from tempfile import NamedTemporaryFile
+from threading import Lock
 
 from woob.exceptions import BrowserHTTPError, BrowserHTTPNotFound, ModuleInstallError
-from .modules import LoadedModule
+from .indexer import StaticReadError, get_tree_stamp, read_module_info
+from .modules import LoadedModule, import_package
 from woob.tools.log import getLogger
 from woob.tools.misc import get_backtrace, to_unicode, find_exe
 from woob.tools.compat import basestring, unicode
@@ -117,6 +121,14 @@ def dump(self):
                )
 
 
+def _read_module_info(path):
+    # run in worker processes, exceptions are returned to keep the other results
+    try:
+        return read_module_info(path)
+    except StaticReadError as e:
+        return e
+
+
 class RepositoryUnavailable(Exception):
     """
     Repository in not available.
@@ -128,6 +140,7 @@ class Repository(object):
     Represents a repository.
     """
     INDEX = 'modules.list'
+    INDEX_POOL_MIN_MODULES = 20
     KEYDIR = '.keys'
     KEYRING = 'trusted.gpg'
 
@@ -279,14 +292,21 @@ def parse_index(self, fp):
                 module.signed = self.signed
             self.modules[section] = module
 
-    def build_index(self, path, filename):
+    def build_index(self, path, filename, workers=None):
         """
         Rebuild index of modules of repository.
 
+        Information of modules is read from their source code when possible,
+        and modules are only imported when it fails. It is cached next to
+        the index file, and only read again for modules which changed.
+
         :param path: path of the repository
         :type path: str
         :param filename: file to save index
         :type filename: str
+        :param workers: number of processes reading modules (default is the
+                        number of CPUs)
+        :type workers: int
         """
         self.logger.debug('Rebuild index')
         self.modules.clear()
@@ -299,49 +319,112 @@ def build_index(self, path, filename):
             self.signed = False
             self.key_update = 0
 
+        cache_filename = '%s.cache' % filename
+        cache = self._load_index_cache(cache_filename)
+        stamps = {}
         for name in sorted(os.listdir(path)):
             module_path = os.path.join(path, name)
             if not os.path.isdir(module_path) or '.' in name or name == self.KEYDIR or not os.path.exists(os.path.join(module_path, '__init__.py')):
                 continue
+            stamps[name] = list(get_tree_stamp(module_path))
 
-            try:
-                fp, pathname, description = imp.find_module(name, [path])
-                try:
-                    module = LoadedModule(imp.load_module(name, fp, pathname, description))
-                finally:
-                    if fp:
-                        fp.close()
-            except Exception as e:
-                self.logger.warning('Unable to build module %s: [%s] %s' % (name, type(e).__name__, e))
-                bt = get_backtrace(e)
-                self.logger.debug(bt)
-                self.errors[name] = bt
+        infos = {}
+        todo = []
+        for name, stamp in stamps.items():
+            if name in cache and cache[name]['stamp'] == stamp:
+                infos[name] = cache[name]['info']
             else:
-                m = ModuleInfo(module.name)
-                m.version = self.get_tree_mtime(module_path)
-                m.capabilities = list(set([c.__name__ for c in module.iter_caps()]))
-                m.description = module.description
-                m.maintainer = module.maintainer
-                m.license = module.license
-                m.icon = module.icon or ''
-                self.modules[module.name] = m
+                todo.append(name)
+
+        for name, info in zip(todo, self._read_modules_info([os.path.join(path, name) for name in todo], workers)):
+            if isinstance(info, StaticReadError):
+                self.logger.debug('Unable to read module %s without importing it: %s' % (name, info))
+                info = self._import_module_info(path, name)
+            if info is not None:
+                infos[name] = info
+
+        for name in sorted(infos):
+            info = infos[name]
+            m = ModuleInfo(info['NAME'])
+            m.version = self._format_mtime(stamps[name][0])
+            m.capabilities = info['capabilities']
+            m.description = info['DESCRIPTION']
+            m.maintainer = u'%s <%s>' % (info['MAINTAINER'], info['EMAIL'])
+            m.license = info['LICENSE']
+            m.icon = info['ICON'] or ''
+            self.modules[m.name] = m
+
+        self._save_index_cache(cache_filename, dict(
+            (name, {'stamp': stamps[name], 'info': info}) for name, info in infos.items()
+        ))
 
         self.update = int(datetime.now().strftime('%Y%m%d%H%M'))
         self.save(filename)
 
+    def _read_modules_info(self, paths, workers=None):
+        """
+        Read information of modules without importing them.
+
+        :returns: for each path, the information or the
+                  :class:`woob.core.indexer.StaticReadError` raised
+        :rtype: list
+        """
+        if len(paths) < self.INDEX_POOL_MIN_MODULES or workers == 1:
+            return [_read_module_info(module_path) for module_path in paths]
+
+        try:
+            with ProcessPoolExecutor(workers) as executor:
+                return list(executor.map(_read_module_info, paths, chunksize=8))
+        except (OSError, BrokenProcessPool) as e:
+            self.logger.debug('Unable to read modules in parallel: %s' % e)
+            return [_read_module_info(module_path) for module_path in paths]
+
+    def _import_module_info(self, path, name):
+        try:
+            module = LoadedModule(import_package(name, path))
+        except Exception as e:
+            self.logger.warning('Unable to build module %s: [%s] %s' % (name, type(e).__name__, e))
+            bt = get_backtrace(e)
+            self.logger.debug(bt)
+            self.errors[name] = bt
+            return None
+
+        return {
+            'NAME': module.name,
+            'MAINTAINER': module.klass.MAINTAINER,
+            'EMAIL': module.klass.EMAIL,
+            'DESCRIPTION': module.description,
+            'LICENSE': module.license,
+            'ICON': module.icon,
+            'capabilities': sorted(set(c.__name__ for c in module.iter_caps())),
+        }
+
+    def _load_index_cache(self, filename):
+        try:
+            with open(filename, 'r') as fp:
+                return json.load(fp)
+        except (IOError, ValueError):
+            return {}
+
+    def _save_index_cache(self, filename, cache):
+        try:
+            with open_for_config(filename) as fp:
+                json.dump(cache, fp)
+        except (IOError, OSError) as e:
+            self.logger.debug('Unable to save index cache %s: %s' % (filename, e))
+
     @staticmethod
-    def get_tree_mtime(path, include_root=False):
-        mtime = 0
+    def _format_mtime(mtime):
+        if not mtime:
+            return 0
+        return int(datetime.fromtimestamp(mtime).strftime('%Y%m%d%H%M'))
+
+    @classmethod
+    def get_tree_mtime(cls, path, include_root=False):
+        mtime, _ = get_tree_stamp(path)
         if include_root:
-            mtime = int(datetime.fromtimestamp(os.path.getmtime(path)).strftime('%Y%m%d%H%M'))
-        for root, dirs, files in os.walk(path):
-            for f in files:
-                if f.endswith('.pyc'):
-                    continue
-                m = int(datetime.fromtimestamp(os.path.getmtime(os.path.join(root, f))).strftime('%Y%m%d%H%M'))
-                mtime = max(mtime, m)
-
-        return mtime
+            mtime = max(mtime, os.path.getmtime(path))
+        return cls._format_mtime(mtime)
 
     def save(self, filename, private=False):
         """
@@ -380,6 +463,7 @@ class Versions(object):
     def __init__(self, path):
         self.path = path
         self.versions = {}
+        self.lock = Lock()
 
         try:
             with open(os.path.join(self.path, self.VERSIONS_LIST), 'r') as fp:
@@ -396,12 +480,13 @@ def get(self, name):
         return self.versions.get(name, None)
 
     def set(self, name, version):
-        self.versions[name] = int(version)
-        self.save()
+        with self.lock:
+            self.versions[name] = int(version)
+            self.save()
 
     def save(self):
         config = RawConfigParser()
-        for name, version in self.versions.items():
+        for name, version in list(self.versions.items()):
             config.set(DEFAULTSECT, name, version)
 
         with open_for_config(os.path.join(self.path, self.VERSIONS_LIST)) as fp:
@@ -449,6 +534,41 @@ def prompt(self, message):
 """
 
 
+class ModuleInstallProgress(IProgress):
+    """
+    Report progress of a module installed with others, as part of the total
+    progress.
+
+    :param progress: observer object of all installations
+    :type progress: :class:`IProgress`
+    :param name: name of the installed module
+    :type name: str
+    :param status: progress of each module, shared by installations
+    :type status: dict[str, float]
+    :param lock: lock shared by installations
+    :type lock: :class:`threading.Lock`
+    """
+
+    def __init__(self, progress, name, status, lock):
+        self.parent = progress
+        self.name = name
+        self.status = status
+        self.lock = lock
+
+    def progress(self, percent, message):
+        with self.lock:
+            self.status[self.name] = percent
+            self.parent.progress(sum(self.status.values()) / len(self.status), '%s: %s' % (self.name, message))
+
+    def error(self, message):
+        with self.lock:
+            self.parent.error('%s: %s' % (self.name, message))
+
+    def prompt(self, message):
+        with self.lock:
+            return self.parent.prompt('%s: %s' % (self.name, message))
+
+
 class Repositories(object):
     SOURCES_LIST = 'sources.list'
     MODULES_DIR = 'modules'
@@ -458,6 +578,14 @@ class Repositories(object):
 
     SHARE_DIRS = [MODULES_DIR, REPOS_DIR, KEYRINGS_DIR, ICONS_DIR]
 
+    INSTALL_WORKERS = 4
+    """
+    Maximum number of modules installed at the same time.
+
+    Downloads use the connections pool of the browser, which has to be at
+    least as large.
+    """
+
     def __init__(self, workdir, datadir, version):
         self.logger = getLogger('repositories')
         self.version = version
@@ -659,31 +787,76 @@ def update(self, progress=PrintProgress()):
         """
         self.update_repositories(progress)
 
-        to_update = []
-        for name, info in self.get_all_modules_info().items():
-            if not info.is_local() and info.is_installed():
-                if self.versions.get(name) != info.version:
-                    to_update.append(info)
+        to_update = [info for info in self.get_all_modules_info().values()
+                     if not info.is_local() and info.is_installed()]
 
-        if len(to_update) == 0:
+        self.install_modules(to_update, progress)
+
+    def is_uptodate(self, module):
+        """
+        Check if the installed version of a module is the one of the
+        repositories.
+
+        :param module: module to check
+        :type module: :class:`ModuleInfo`
+        :rtype: bool
+        """
+        return self.versions.get(module.name) == module.version and \
+            os.path.exists(os.path.join(self.modules_dir, module.name))
+
+    def install_modules(self, modules, progress=PrintProgress(), force=False, workers=None):
+        """
+        Install several modules at the same time.
+
+        Downloads, signature checks and extractions of up to `workers`
+        modules run in parallel, and share the HTTP connections to
+        repositories. Failures are reported to `progress` and don't stop
+        installation of other modules.
+
+        :param modules: modules to install
+        :type modules: list[:class:`ModuleInfo`]
+        :param progress: observer object
+        :type progress: :class:`IProgress`
+        :param force: also install again modules which are up-to-date
+        :type force: bool
+        :param workers: number of parallel installations, :attr:`INSTALL_WORKERS` by default
+        :type workers: int
+        :returns: errors of modules which failed to install
+        :rtype: dict[str, :class:`ModuleInstallError`]
+        """
+        if not force:
+            modules = [module for module in modules if not self.is_uptodate(module)]
+
+        if len(modules) == 0:
             progress.progress(1.0, 'All modules are up-to-date.')
-            return
+            return {}
 
-        class InstallProgress(PrintProgress):
-            def __init__(self, n):
-                self.n = n
+        # Create the shared browser before starting threads. Its requests
+        # session is used by all threads, though requests does not guarantee
+        # sessions are thread-safe: installations only call Browser.open(),
+        # which does not change the state of the browser, repositories do
+        # not set cookies, and the connections pool has its own lock.
+        self.load_browser()
 
-            def progress(self, percent, message):
-                progress.progress(float(self.n)/len(to_update) + 1.0/len(to_update)*percent, message)
+        status = dict((module.name, 0.) for module in modules)
+        lock = Lock()
+        errors = {}
 
-        for n, info in enumerate(to_update):
-            inst_progress = InstallProgress(n)
+        def install(module):
+            inst_progress = ModuleInstallProgress(progress, module.name, status, lock)
             try:
-                self.install(info, inst_progress)
+                self.install(module, inst_progress, force)
             except ModuleInstallError as e:
+                errors[module.name] = e
                 inst_progress.progress(1.0, unicode(e))
 
-    def install(self, module, progress=PrintProgress()):
+        with ThreadPoolExecutor(workers or self.INSTALL_WORKERS) as executor:
+            for future in [executor.submit(install, module) for module in modules]:
+                future.result()
+
+        return errors
+
+    def install(self, module, progress=PrintProgress(), force=False):
         """
         Install a module.
 
@@ -691,6 +864,8 @@ def install(self, module, progress=PrintProgress()):
         :type module: :class:`str` or :class:`ModuleInfo`
         :param progress: observer object
         :type progress: :class:`IProgress`
+        :param force: install the module even if its latest version is already installed
+        :type force: bool
         """
         import tarfile
         self.load_browser()
@@ -716,6 +891,8 @@ def install(self, module, progress=PrintProgress()):
             progress.progress(0.2, 'Module %s is not installed yet' % module.name)
         elif module.version > installed:
             progress.progress(0.2, 'A new version of %s is available' % module.name)
+        elif force:
+            progress.progress(0.2, 'Installing %s again' % module.name)
         else:
             raise ModuleInstallError('The latest version of %s is already installed' % module.name)
 
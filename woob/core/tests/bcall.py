@@ -0,0 +1,329 @@
+# -*- coding: utf-8 -*-
+
+# Copyright(C) 2021 The Woob Team
+#
+# This file is part of woob.
+#
+# woob is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# woob is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with woob. If not, see <http://www.gnu.org/licenses/>.
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import Event, Lock
+from unittest import TestCase
+
+from woob.core.bcall import AsyncBackendsCall, BackendsCall, CallErrors, CallTimeout
+
+
+# Mock of a module, recording how many of its calls run at the same time
+class MyBackend(object):
+    running = 0
+    max_running = 0
+    counter_lock = Lock()
+
+    def __init__(self, name):
+        self.name = name
+        self.lock = Lock()
+        self.produced = 0
+
+    def __enter__(self):
+        self.lock.acquire()
+
+    def __exit__(self, t, v, tb):
+        self.lock.release()
+
+    def __repr__(self):
+        return '<Backend %r>' % self.name
+
+    def get_name(self, delay=0):
+        with self.counter_lock:
+            MyBackend.running += 1
+            MyBackend.max_running = max(MyBackend.max_running, MyBackend.running)
+        time.sleep(delay)
+        with self.counter_lock:
+            MyBackend.running -= 1
+        return self.name
+
+    def iter_numbers(self, count=None, delay=0):
+        i = 0
+        while count is None or i < count:
+            time.sleep(delay)
+            self.produced += 1
+            yield i
+            i += 1
+
+    def fail(self):
+        raise ValueError('failure of %s' % self.name)
+
+
+class BackendsCallTest(TestCase):
+    def setUp(self):
+        MyBackend.running = 0
+        MyBackend.max_running = 0
+        self.backends = [MyBackend('b%d' % i) for i in range(5)]
+
+    # Every backend is called, with at most max_workers at the same time
+    def test_max_workers(self):
+        call = BackendsCall(self.backends, 'get_name', 0.05, max_workers=2)
+        self.assertEqual(sorted(call), ['b0', 'b1', 'b2', 'b3', 'b4'])
+        self.assertEqual(MyBackend.max_running, 2)
+        self.assertLessEqual(len(call.threads), 2)
+
+    # Without max_workers, every backend runs in its own thread
+    def test_unbounded_workers(self):
+        call = BackendsCall(self.backends, 'get_name', 0.05)
+        self.assertEqual(len(list(call)), 5)
+        self.assertEqual(len(call.threads), 5)
+
+    # Producers are paused while the responses queue is full
+    def test_backpressure(self):
+        backend = self.backends[0]
+        call = BackendsCall([backend], 'iter_numbers', 20, max_responses=2)
+        time.sleep(0.3)
+        # two results in the queue, and one waiting to be put
+        self.assertLessEqual(backend.produced, 3)
+        self.assertEqual(list(call), list(range(20)))
+        self.assertEqual(backend.produced, 20)
+
+    # Errors are raised once every result has been consumed
+    def test_errors(self):
+        call = BackendsCall(self.backends[:2], 'fail')
+        with self.assertRaises(CallErrors) as cm:
+            list(call)
+        self.assertEqual(sorted(backend.name for backend, _, _ in cm.exception), ['b0', 'b1'])
+        self.assertTrue(all(isinstance(error, ValueError) for _, error, _ in cm.exception))
+
+        call = BackendsCall(self.backends[:1], 'fail')
+        self.assertRaises(CallErrors, call.wait)
+
+    # A backend still producing results after the timeout is reported
+    def test_timeout(self):
+        backend = self.backends[0]
+        call = BackendsCall([backend, self.backends[1]], 'iter_numbers', 100, 0.02, timeout=0.2)
+        with self.assertRaises(CallErrors) as cm:
+            list(call)
+        self.assertEqual(len(cm.exception.errors), 2)
+        for _, error, _ in cm.exception:
+            self.assertIsInstance(error, CallTimeout)
+            self.assertEqual(error.timeout, 0.2)
+        self.assertLess(backend.produced, 100)
+
+    # A blocking call can't be interrupted, and its result is kept
+    def test_timeout_blocking(self):
+        call = BackendsCall(self.backends[:1], 'get_name', 0.3, timeout=0.1)
+        self.assertEqual(list(call), ['b0'])
+        self.assertEqual(call.errors, [])
+
+    # Time spent waiting for a slow consumer is not charged to backends
+    def test_timeout_slow_consumer(self):
+        call = BackendsCall(self.backends[:2], 'iter_numbers', 5, max_responses=1, timeout=0.2)
+        results = []
+        for result in call:
+            time.sleep(0.05)
+            results.append(result)
+        self.assertEqual(sorted(results), sorted(list(range(5)) * 2))
+        self.assertEqual(call.errors, [])
+
+    # stop() makes backends quit and wakes up consumers
+    def test_stop(self):
+        backend = self.backends[0]
+        call = BackendsCall([backend], 'iter_numbers', None, max_responses=1)
+        results = iter(call)
+        self.assertEqual(next(results), 0)
+        call.stop(wait=True)
+        self.assertTrue(all(not thread.is_alive() for thread in call.threads))
+        produced = backend.produced
+        self.assertEqual(list(results), [])
+        time.sleep(0.2)
+        self.assertEqual(backend.produced, produced)
+
+    # callback_thread() calls callback with every result, then errback and finishback
+    def test_callback_thread(self):
+        results = []
+        errors = []
+        finished = Event()
+
+        call = BackendsCall(self.backends[:3], 'iter_numbers', 3, max_responses=1)
+        thread = call.callback_thread(results.append, finishback=finished.set)
+        call.wait()
+        thread.join()
+        self.assertEqual(sorted(results), [0, 0, 0, 1, 1, 1, 2, 2, 2])
+        self.assertTrue(finished.is_set())
+
+        call = BackendsCall(self.backends[:2], 'fail')
+        thread = call.callback_thread(results.append, lambda backend, error, backtrace: errors.append(error))
+        thread.join()
+        self.assertEqual(len(errors), 2)
+
+    # Iteration returns as soon as the last backend finishes
+    def test_completion(self):
+        call = BackendsCall(self.backends, 'get_name', 0.05)
+        start = time.time()
+        self.assertEqual(len(list(call)), 5)
+        self.assertLess(time.time() - start, 0.5)
+        # the end marker is kept for other consumers
+        self.assertEqual(list(call), [])
+
+        call = BackendsCall([], 'get_name')
+        self.assertEqual(list(call), [])
+
+    # Delays to the first result and to the end of the call are recorded
+    def test_timings(self):
+        call = BackendsCall(self.backends[:2], 'iter_numbers', 3, 0.05, max_responses=1)
+        self.assertIsNone(call.duration)
+        results = iter(call)
+        next(results)
+        self.assertGreaterEqual(call.time_to_first_result, 0.04)
+        list(results)
+        call.wait()
+        self.assertGreaterEqual(call.duration, call.time_to_first_result)
+        self.assertGreaterEqual(call.duration, 0.14)
+
+        call = BackendsCall(self.backends[:2], 'fail')
+        self.assertRaises(CallErrors, list, call)
+        self.assertIsNone(call.time_to_first_result)
+        self.assertIsNotNone(call.duration)
+
+
+class AsyncBackendsCallTest(TestCase):
+    def setUp(self):
+        self.executor = ThreadPoolExecutor(4)
+        self.backends = [MyBackend('b%d' % i) for i in range(3)]
+
+    def tearDown(self):
+        self.executor.shutdown()
+
+    def call(self, function, *args, **kwargs):
+        return AsyncBackendsCall(self.backends, function, *args, executor=self.executor, **kwargs)
+
+    def collect(self, call):
+        async def run():
+            return [result async for result in call]
+        return asyncio.run(run())
+
+    # Results of every backend are yielded, errors raised at the end
+    def test_iterate(self):
+        self.assertEqual(sorted(self.collect(self.call('iter_numbers', 2))), [0, 0, 0, 1, 1, 1])
+
+        with self.assertRaises(CallErrors) as cm:
+            self.collect(self.call('fail'))
+        self.assertEqual(len(cm.exception.errors), 3)
+
+    # Results are limited by max_responses, and producers resume when consumed
+    def test_backpressure(self):
+        backend = self.backends[0]
+        call = AsyncBackendsCall([backend], 'iter_numbers', 20, executor=self.executor, max_responses=2)
+
+        async def run():
+            results = [await call.__anext__()]
+            await asyncio.sleep(0.3)
+            self.assertLessEqual(backend.produced, 4)
+            results.extend([result async for result in call])
+            return results
+
+        self.assertEqual(asyncio.run(run()), list(range(20)))
+
+    # Backends still running at the deadline are reported, their results dropped
+    def test_timeout(self):
+        call = self.call('iter_numbers', 100, 0.02, timeout=0.2)
+        with self.assertRaises(CallErrors) as cm:
+            self.collect(call)
+        self.assertEqual(len(cm.exception.errors), 3)
+        self.assertTrue(all(isinstance(error, CallTimeout) for _, error, _ in cm.exception))
+        self.assertTrue(all(backend.produced < 100 for backend in self.backends))
+
+    # Time spent waiting for a slow consumer is not charged to backends
+    def test_timeout_slow_consumer(self):
+        call = self.call('iter_numbers', 5, max_responses=1, timeout=0.2)
+
+        async def run():
+            results = []
+            async for result in call:
+                await asyncio.sleep(0.05)
+                results.append(result)
+            return results
+
+        self.assertEqual(sorted(asyncio.run(run())), sorted(list(range(5)) * 3))
+        self.assertEqual(call.errors, [])
+
+    # Cancelling the consumer stops the backends
+    def test_cancel(self):
+        call = self.call('iter_numbers', None, 0.01, max_responses=1)
+
+        async def consume():
+            async for _ in call:
+                pass
+
+        async def run():
+            task = asyncio.ensure_future(consume())
+            await asyncio.sleep(0.1)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+            await asyncio.wait_for(call.wait(), 1)
+
+        asyncio.run(run())
+        self.assertTrue(call.stop_event.is_set())
+        produced = [backend.produced for backend in self.backends]
+        time.sleep(0.1)
+        self.assertEqual([backend.produced for backend in self.backends], produced)
+
+    # Leaving an iteration early frees the executor workers
+    def test_abandoned(self):
+        executor = ThreadPoolExecutor(2)
+        self.addCleanup(executor.shutdown)
+
+        async def first(backend):
+            call = AsyncBackendsCall([backend], 'iter_numbers', None, executor=executor, max_responses=1)
+            async with call:
+                async for result in call:
+                    break
+            return call
+
+        async def run():
+            calls = [await first(backend) for backend in self.backends[:2]]
+            self.assertTrue(all(call.stop_event.is_set() for call in calls))
+
+            call = AsyncBackendsCall(self.backends[2:], 'iter_numbers', None, executor=executor, max_responses=1)
+            self.assertEqual(await call.__anext__(), 0)
+            await call.aclose()
+
+            call = AsyncBackendsCall(self.backends, 'get_name', executor=executor)
+            await asyncio.wait_for(call.wait(), 1)
+
+        asyncio.run(run())
+
+    # wait() runs backends to completion, and timings are recorded
+    def test_wait(self):
+        call = self.call('get_name', 0.05)
+        asyncio.run(call.wait())
+        self.assertEqual(call.errors, [])
+
+        call = self.call('iter_numbers', 2, 0.05)
+        self.collect(call)
+        self.assertGreaterEqual(call.time_to_first_result, 0.04)
+        self.assertGreaterEqual(call.duration, call.time_to_first_result)
+
+    # A result which can't be posted gives its slot back
+    def test_slot_released(self):
+        call = self.call('get_name', max_responses=1)
+        call.stop_event.set()
+        self.assertFalse(call._put_response(self.backends[0], 'b0'))
+        self.assertTrue(call.slots.acquire(blocking=False))
+
+    # Synchronous consumers are refused
+    def test_sync_api(self):
+        call = self.call('get_name')
+        self.assertRaises(TypeError, iter, call)
+        self.assertRaises(TypeError, call.callback_thread, print)
@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+
+# Copyright(C) 2021 The Woob Team
+#
+# This file is part of woob.
+#
+# woob is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# woob is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with woob. If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import shutil
+import sys
+import tempfile
+from unittest import TestCase
+
+from woob.core.indexer import StaticReadError, read_module_info
+from woob.core.repositories import Repository
+
+
+# Sources of modules, by module name and file name
+MODULES = {
+    # module class in __init__.py
+    'woobtestfoo': {
+        '__init__.py': '''
+from woob.capabilities.bank import CapBank
+from woob.capabilities.profile import CapProfile as Profile
+from woob.tools.backend import Module
+
+
+class FooModule(Module, CapBank, Profile):
+    NAME = 'woobtestfoo'
+    MAINTAINER = u'John Doe'
+    EMAIL = 'john@example.org'
+    VERSION = '3.1'
+    DESCRIPTION = u'Foo bank'
+    LICENSE = 'LGPLv3+'
+''',
+    },
+    # module class in a file imported by __init__.py
+    'woobtestbar': {
+        '__init__.py': '''
+from .module import BarModule
+
+__all__ = ['BarModule']
+''',
+        'module.py': '''
+from woob.capabilities.messages import CapMessages
+from woob.tools.backend import Module
+
+
+class BarModule(Module, CapMessages):
+    NAME = 'woobtestbar'
+    DESCRIPTION = u'Bar messages'
+    LICENSE = 'AGPLv3+'
+    ICON = 'bar.png'
+''',
+    },
+    # module class inheriting from a helper class, which has to be imported
+    'woobtestbaz': {
+        '__init__.py': '''
+from .module import BazModule
+
+__all__ = ['BazModule']
+''',
+        'base.py': '''
+from woob.capabilities.bank import CapBank
+from woob.tools.backend import Module
+
+
+class BaseModule(Module, CapBank):
+    MAINTAINER = u'Jane Doe'
+    LICENSE = 'LGPLv3+'
+''',
+        'module.py': '''
+from .base import BaseModule
+
+
+class BazModule(BaseModule):
+    NAME = 'woobtestbaz'
+    DESCRIPTION = u'Baz bank'
+''',
+    },
+    # module which can't be read nor imported
+    'woobtestbroken': {
+        '__init__.py': '''
+from woob.tools.backend import Module
+
+
+class BrokenModule(Module:
+    NAME = 'woobtestbroken'
+''',
+    },
+}
+
+
+class IndexerTest(TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        for name, files in MODULES.items():
+            os.mkdir(os.path.join(self.path, name))
+            for filename, source in files.items():
+                with open(os.path.join(self.path, name, filename), 'w') as f:
+                    f.write(source)
+
+        self.repository = Repository('file://%s' % self.path)
+        self.repository.name = 'test'
+
+    def tearDown(self):
+        for name in list(sys.modules):
+            if name.split('.')[0] in MODULES:
+                del sys.modules[name]
+        shutil.rmtree(self.path)
+
+    def import_module_info(self, name):
+        return self.repository._import_module_info(self.path, name)
+
+    # Check that modules read from their sources have the same information as imported ones
+    def test_same_as_import(self):
+        for name in ('woobtestfoo', 'woobtestbar'):
+            info = read_module_info(os.path.join(self.path, name))
+            self.assertEqual(info, self.import_module_info(name))
+
+        info = read_module_info(os.path.join(self.path, 'woobtestfoo'))
+        self.assertEqual(info['capabilities'], ['CapBank', 'CapCollection', 'CapProfile'])
+        self.assertEqual(info['MAINTAINER'], u'John Doe')
+        info = read_module_info(os.path.join(self.path, 'woobtestbar'))
+        self.assertEqual(info['ICON'], 'bar.png')
+        self.assertEqual(info['MAINTAINER'], u'<unspecified>')
+
+    # Check that modules which have to be imported are detected
+    def test_static_read_error(self):
+        self.assertRaises(StaticReadError, read_module_info, os.path.join(self.path, 'woobtestbaz'))
+        self.assertRaises(StaticReadError, read_module_info, os.path.join(self.path, 'woobtestbroken'))
+
+    # Check that the index has every module, importing them when needed
+    def test_build_index(self):
+        filename = os.path.join(self.path, Repository.INDEX)
+        self.repository.build_index(self.path, filename, workers=1)
+
+        self.assertEqual(sorted(self.repository.modules), ['woobtestbar', 'woobtestbaz', 'woobtestfoo'])
+        self.assertEqual(list(self.repository.errors), ['woobtestbroken'])
+        for name in ('woobtestfoo', 'woobtestbar', 'woobtestbaz'):
+            info = self.import_module_info(name)
+            module = self.repository.modules[name]
+            self.assertEqual(module.capabilities, info['capabilities'])
+            self.assertEqual(module.description, info['DESCRIPTION'])
+            self.assertEqual(module.maintainer, u'%s <%s>' % (info['MAINTAINER'], info['EMAIL']))
+            self.assertEqual(module.license, info['LICENSE'])
+        self.assertEqual(self.repository.modules['woobtestbaz'].maintainer, u'Jane Doe <<unspecified>>')
+
+        index = Repository('file://%s' % self.path)
+        with open(filename, 'r') as fp:
+            index.parse_index(fp)
+        self.assertEqual(sorted(index.modules), ['woobtestbar', 'woobtestbaz', 'woobtestfoo'])
+
+    # Check that only changed modules are read again
+    def test_build_index_cache(self):
+        filename = os.path.join(self.path, Repository.INDEX)
+        self.repository.build_index(self.path, filename, workers=1)
+
+        read = []
+        read_modules_info = self.repository._read_modules_info
+
+        def record(paths, workers=None):
+            read.extend(os.path.basename(path) for path in paths)
+            return read_modules_info(paths, workers)
+
+        self.repository._read_modules_info = record
+        self.repository.build_index(self.path, filename, workers=1)
+        self.assertEqual(read, ['woobtestbroken'])
+        self.assertEqual(sorted(self.repository.modules), ['woobtestbar', 'woobtestbaz', 'woobtestfoo'])
+
+        del read[:]
+        with open(os.path.join(self.path, 'woobtestbar', 'new.py'), 'w') as f:
+            f.write('\n')
+        self.repository.build_index(self.path, filename, workers=1)
+        self.assertEqual(read, ['woobtestbar', 'woobtestbroken'])
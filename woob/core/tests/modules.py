@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+
+# Copyright(C) 2021 The Woob Team
+#
+# This file is part of woob.
+#
+# woob is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# woob is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with woob. If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import shutil
+import sys
+import tempfile
+import zipfile
+from unittest import TestCase
+
+from woob.core.modules import ModulesLoader, create_bundle, import_package
+from woob.exceptions import ModuleLoadError
+
+
+# Sources of modules, by module name and file name
+MODULES = {
+    'woobtestfoo': {
+        '__init__.py': '''
+from .module import FooModule
+
+__all__ = ['FooModule']
+''',
+        'module.py': '''
+from woob.tools.backend import Module
+
+from .browser import FooBrowser
+
+
+class FooModule(Module):
+    NAME = 'woobtestfoo'
+    VERSION = '3.1'
+    BROWSER = FooBrowser
+''',
+        'browser.py': '''
+class FooBrowser(object):
+    pass
+''',
+        'pages/__init__.py': '''
+VALUE = 42
+''',
+    },
+    'woobtestbar': {
+        '__init__.py': '''
+from woob.tools.backend import Module
+
+
+class BarModule(Module):
+    NAME = 'woobtestbar'
+    VERSION = '2.0'
+''',
+    },
+    'woobtestbroken': {
+        '__init__.py': '''
+raise ValueError('broken')
+''',
+    },
+}
+
+
+class ModulesTest(TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'modules')
+        for name, files in MODULES.items():
+            for filename, source in files.items():
+                filename = os.path.join(self.path, name, filename)
+                if not os.path.isdir(os.path.dirname(filename)):
+                    os.makedirs(os.path.dirname(filename))
+                with open(filename, 'w') as f:
+                    f.write(source)
+
+        self.bundle = os.path.join(self.tmpdir, 'modules.zip')
+
+    def tearDown(self):
+        for name in list(sys.modules):
+            if name.split('.')[0] in MODULES:
+                del sys.modules[name]
+        shutil.rmtree(self.tmpdir)
+
+    def get_source_files(self):
+        files = []
+        for root, dirs, filenames in os.walk(self.path):
+            files.extend(os.path.relpath(os.path.join(root, name), self.path) for name in dirs + filenames)
+        return sorted(files)
+
+    # Check that a package and its submodules are imported from a directory
+    def test_import_directory(self):
+        package = import_package('woobtestfoo', self.path)
+        self.assertIs(sys.modules['woobtestfoo'], package)
+        self.assertEqual(package.FooModule.BROWSER.__name__, 'FooBrowser')
+        self.assertEqual(package.__path__, [os.path.join(self.path, 'woobtestfoo')])
+
+        from woobtestfoo.pages import VALUE
+        self.assertEqual(VALUE, 42)
+
+    # Check that a package is executed again when it is imported again
+    def test_import_again(self):
+        first = import_package('woobtestfoo', self.path)
+        second = import_package('woobtestfoo', self.path)
+        self.assertIsNot(first, second)
+        self.assertIs(sys.modules['woobtestfoo'], second)
+
+    # Check that a package which fails to import is not kept
+    def test_import_error(self):
+        self.assertRaises(ValueError, import_package, 'woobtestbroken', self.path)
+        self.assertNotIn('woobtestbroken', sys.modules)
+        self.assertRaises(Exception, import_package, 'woobtestmissing', self.path)
+        self.assertNotIn('woobtestmissing', sys.modules)
+
+    # Check that the archive has sources and compiled files of every module
+    def test_create_bundle(self):
+        before = self.get_source_files()
+        create_bundle(self.path, self.bundle)
+
+        with zipfile.ZipFile(self.bundle) as bundle:
+            names = sorted(bundle.namelist())
+        expected = []
+        for name, files in MODULES.items():
+            for filename in files:
+                expected.append('%s/%s' % (name, filename))
+                expected.append('%s/%sc' % (name, filename))
+        self.assertEqual(names, sorted(expected))
+
+        # no compiled files are left in the source tree
+        self.assertEqual(self.get_source_files(), before)
+
+    # Check that compiled files of the source tree are not put in the archive
+    def test_create_bundle_pycache(self):
+        os.makedirs(os.path.join(self.path, 'woobtestfoo', '__pycache__'))
+        for filename in ('__pycache__/module.cpython-39.pyc', 'browser.pyc'):
+            with open(os.path.join(self.path, 'woobtestfoo', filename), 'wb') as f:
+                f.write(b'')
+        create_bundle(self.path, self.bundle)
+        with zipfile.ZipFile(self.bundle) as bundle:
+            self.assertFalse([name for name in bundle.namelist() if '__pycache__' in name])
+            # the stale compiled file is replaced
+            self.assertTrue(bundle.read('woobtestfoo/browser.pyc'))
+
+    # Check that packages are imported from the archive
+    def test_import_bundle(self):
+        create_bundle(self.path, self.bundle)
+        shutil.rmtree(self.path)
+
+        package = import_package('woobtestfoo', self.bundle)
+        self.assertEqual(package.FooModule.NAME, 'woobtestfoo')
+        self.assertTrue(package.__file__.startswith(self.bundle))
+
+        from woobtestfoo.pages import VALUE
+        self.assertEqual(VALUE, 42)
+
+        self.assertRaises(ImportError, import_package, 'woobtestmissing', self.bundle)
+        self.assertRaises(ValueError, import_package, 'woobtestbroken', self.bundle)
+        self.assertNotIn('woobtestbroken', sys.modules)
+
+    # Check that a loader lists and loads modules from a directory or an archive
+    def test_loader(self):
+        create_bundle(self.path, self.bundle)
+        for path in (self.path, self.bundle):
+            loader = ModulesLoader(path, '3.1')
+            self.assertEqual(sorted(loader.iter_existing_module_names()), sorted(MODULES))
+            self.assertTrue(loader.module_exists('woobtestfoo'))
+            self.assertFalse(loader.module_exists('woobtestmissing'))
+
+            module = loader.get_or_load_module('woobtestfoo')
+            self.assertEqual(module.name, 'woobtestfoo')
+            self.assertIs(loader.get_or_load_module('woobtestfoo'), module)
+            self.assertRaises(ModuleLoadError, loader.get_or_load_module, 'woobtestbar')
+            self.assertRaises(ModuleLoadError, loader.get_or_load_module, 'woobtestbroken')
+
+    # Check that the list of modules is read again when a module is added
+    def test_loader_new_module(self):
+        loader = ModulesLoader(self.path, '3.1')
+        self.assertFalse(loader.module_exists('woobtestnew'))
+
+        os.makedirs(os.path.join(self.path, 'woobtestnew'))
+        with open(os.path.join(self.path, 'woobtestnew', '__init__.py'), 'w') as f:
+            f.write('\n')
+        # the modification time of the directory may not have changed yet
+        os.utime(self.path, (0, 0))
+        self.assertTrue(loader.module_exists('woobtestnew'))
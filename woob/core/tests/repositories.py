@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+
+# Copyright(C) 2021 The Woob Team
+#
+# This file is part of woob.
+#
+# woob is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# woob is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with woob. If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import shutil
+import tarfile
+import tempfile
+import time
+from io import BytesIO
+from threading import Lock, Thread
+from unittest import TestCase
+
+from woob.core import Woob
+from woob.core.repositories import IProgress, ModuleInfo, Repositories, Versions
+from woob.exceptions import BrowserHTTPError, BrowserHTTPNotFound, ModuleInstallError
+
+
+REPOSITORY_URL = 'https://updates.example.org/3.1/main/'
+
+
+class NotFound(BrowserHTTPNotFound, BrowserHTTPError):
+    pass
+
+
+class MyResponse(object):
+    def __init__(self, content):
+        self.content = content
+
+
+# Mock of a browser serving archives of modules, recording how many
+# downloads run at the same time
+class MyBrowser(object):
+    def __init__(self, delay=0):
+        self.delay = delay
+        self.archives = {}
+        self.lock = Lock()
+        self.running = 0
+        self.max_running = 0
+
+    def add_module(self, name):
+        data = BytesIO()
+        with tarfile.open(fileobj=data, mode='w:gz') as tar:
+            source = b'# module %s\n' % name.encode('ascii')
+            info = tarfile.TarInfo('%s/__init__.py' % name)
+            info.size = len(source)
+            tar.addfile(info, BytesIO(source))
+        self.archives['%s%s.tar.gz' % (REPOSITORY_URL, name)] = data.getvalue()
+
+    def open(self, url):
+        if url not in self.archives:
+            raise NotFound(url)
+
+        with self.lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        try:
+            time.sleep(self.delay)
+            return MyResponse(self.archives[url])
+        finally:
+            with self.lock:
+                self.running -= 1
+
+
+class MyProgress(IProgress):
+    def __init__(self):
+        self.messages = []
+
+    def progress(self, percent, message):
+        self.messages.append((percent, message))
+
+    def error(self, message):
+        self.messages.append((None, message))
+
+
+def get_module_info(name, version=202101010000):
+    info = ModuleInfo(name)
+    info.version = version
+    info.url = '%s%s.tar.gz' % (REPOSITORY_URL, name)
+    info.repo_url = REPOSITORY_URL
+    info.signed = False
+    return info
+
+
+class InstallModulesTest(TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        workdir = os.path.join(self.path, 'work')
+        os.makedirs(workdir)
+        # no repositories, so nothing is downloaded on creation
+        with open(os.path.join(workdir, Repositories.SOURCES_LIST), 'w') as f:
+            f.write('\n')
+
+        self.repositories = Repositories(workdir, os.path.join(self.path, 'data'), '3.1')
+        self.browser = self.repositories.browser = MyBrowser()
+        self.progress = MyProgress()
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def create_modules(self, count):
+        modules = []
+        for i in range(count):
+            name = 'woobtest%d' % i
+            self.browser.add_module(name)
+            modules.append(get_module_info(name))
+        return modules
+
+    def assertInstalled(self, modules):
+        versions = Versions(self.repositories.modules_dir)
+        for module in modules:
+            self.assertTrue(os.path.isfile(os.path.join(self.repositories.modules_dir, module.name, '__init__.py')))
+            self.assertEqual(self.repositories.versions.get(module.name), module.version)
+            # versions of modules installed at the same time are all saved
+            self.assertEqual(versions.get(module.name), module.version)
+
+    # Check that modules are installed by at most `workers` threads
+    def test_workers(self):
+        self.browser.delay = 0.05
+        modules = self.create_modules(6)
+        errors = self.repositories.install_modules(modules, self.progress, workers=3)
+
+        self.assertEqual(errors, {})
+        self.assertEqual(self.browser.max_running, 3)
+        self.assertInstalled(modules)
+        self.assertEqual(self.progress.messages[-1][0], 1.0)
+        percents = [percent for percent, _ in self.progress.messages]
+        self.assertEqual(percents, sorted(percents))
+
+    # Check that failures are returned and do not stop other installations
+    def test_errors(self):
+        modules = self.create_modules(3)
+        modules.insert(1, get_module_info('woobtestmissing'))
+        errors = self.repositories.install_modules(modules, self.progress, workers=2)
+
+        self.assertEqual(list(errors), ['woobtestmissing'])
+        self.assertIsInstance(errors['woobtestmissing'], ModuleInstallError)
+        self.assertIsNone(self.repositories.versions.get('woobtestmissing'))
+        self.assertInstalled([module for module in modules if module.name != 'woobtestmissing'])
+
+    # Check that up-to-date modules are only installed again when forced
+    def test_uptodate(self):
+        modules = self.create_modules(2)
+        self.repositories.install_modules(modules, self.progress)
+        self.browser.archives.clear()
+
+        self.progress.messages = []
+        self.assertEqual(self.repositories.install_modules(modules, self.progress), {})
+        self.assertEqual(self.progress.messages, [(1.0, 'All modules are up-to-date.')])
+
+        errors = self.repositories.install_modules(modules, self.progress, force=True)
+        self.assertEqual(sorted(errors), ['woobtest0', 'woobtest1'])
+
+    # Check that versions set by several threads are all saved
+    def test_versions_lock(self):
+        versions = self.repositories.versions
+
+        def set_versions(start):
+            for i in range(start, start + 20):
+                versions.set('woobtest%d' % i, i)
+
+        threads = [Thread(target=set_versions, args=(i * 20,)) for i in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        saved = Versions(self.repositories.modules_dir)
+        self.assertEqual(saved.versions, dict(('woobtest%d' % i, i) for i in range(100)))
+
+    # Check that Woob.update raises the first installation error
+    def test_woob_update(self):
+        workdir = os.path.join(self.path, 'work')
+        woob = Woob(workdir=workdir, datadir=os.path.join(self.path, 'data'))
+        woob.repositories.browser = self.browser
+        woob.repositories.update = lambda progress: None
+        modules = {'woobtest0': get_module_info('woobtest0'), 'woobtestmissing': get_module_info('woobtestmissing')}
+        woob.repositories.get_module_info = modules.get
+        self.browser.add_module('woobtest0')
+        woob.backends_config.add_backend('foo', 'woobtest0', {})
+        woob.backends_config.add_backend('bar', 'woobtestmissing', {})
+
+        with self.assertRaises(ModuleInstallError) as cm:
+            woob.update(self.progress)
+        self.assertIn('Unable to fetch module', str(cm.exception))
+        self.assertEqual(woob.repositories.versions.get('woobtest0'), modules['woobtest0'].version)
+        woob.deinit()
@@ -18,15 +18,16 @@
 # along with woob. If not, see <http://www.gnu.org/licenses/>.
 
 import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-from woob.core.bcall import BackendsCall
+from woob.core.bcall import AsyncBackendsCall, BackendsCall
 from woob.core.modules import ModulesLoader, RepositoryModulesLoader
 from woob.core.backendscfg import BackendsConfig
 from woob.core.requests import RequestsManager
 from woob.core.repositories import Repositories, PrintProgress
 from woob.core.scheduler import Scheduler
-from woob.tools.backend import Module
+from woob.tools.backend import LazyBackend, Module
 from woob.tools.compat import basestring, unicode
 from woob.tools.config.iconfig import ConfigError
 from woob.tools.log import getLogger
@@ -62,10 +63,16 @@ class WoobBase(object):
     """
     VERSION = '3.1'
 
+    ASYNC_MAX_WORKERS = 10
+    """
+    Number of threads of the executor shared by calls to :func:`ado`.
+    """
+
     def __init__(self, modules_path=None, storage=None, scheduler=None):
         self.logger = getLogger('woob')
         self.backend_instances = {}
         self.requests = RequestsManager()
+        self._executor = None
 
         if modules_path is None:
             import pkg_resources
@@ -95,6 +102,10 @@ def deinit(self):
         """
         self.unload_backends()
 
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
     def build_backend(self, module_name, params=None, storage=None, name=None, nofail=False, logger=None):
         """
         Create a backend.
@@ -247,12 +258,59 @@ def do(self, function, *args, **kwargs):
         :type backends: list[:class:`str`]
         :param caps: iterate on backends which implement this caps
         :type caps: list[:class:`woob.capabilities.base.Capability`]
+        :param max_workers: maximum number of backends called in parallel
+                            (see :attr:`woob.core.bcall.BackendsCall.MAX_WORKERS`)
+        :type max_workers: :class:`int`
+        :param max_responses: maximum number of results waiting to be
+                              consumed before backends are paused
+        :type max_responses: :class:`int`
+        :param timeout: delay in seconds given to each backend to complete
+        :type timeout: :class:`float`
         :rtype: A :class:`woob.core.bcall.BackendsCall` object (iterable)
         """
+        backends = self._get_call_backends(kwargs)
+
+        # The return value MUST BE the BackendsCall instance. Please never iterate
+        # here on this object, because caller might want to use other methods, like
+        # wait() on callback_thread().
+        # Thanks a lot.
+        return BackendsCall(backends, function, *args, **kwargs)
+
+    def ado(self, function, *args, **kwargs):
+        """
+        Asynchronous version of :func:`do`, to use from an asyncio event
+        loop.
+
+        Blocking code of backends is run in an executor shared by every call,
+        with at most :attr:`ASYNC_MAX_WORKERS` threads, and results are
+        yielded as soon as any backend produces them. Use the call as an
+        asynchronous context manager, so that backends are stopped and free
+        the executor if the iteration is left early::
+
+            async with woob.ado('iter_history', account) as transactions:
+                async for transaction in transactions:
+                    print(transaction)
+
+        Accepted parameters are the same as :func:`do`, except
+        *max_workers*. The *timeout* is a deadline from the start of the
+        call, postponed while a backend waits for the consumer, after which
+        results of the late backends are dropped and a
+        :class:`woob.core.bcall.CallTimeout` is reported.
+
+        :rtype: A :class:`woob.core.bcall.AsyncBackendsCall` object (async iterable)
+        """
+        backends = self._get_call_backends(kwargs)
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self.ASYNC_MAX_WORKERS)
+
+        return AsyncBackendsCall(backends, function, *args, executor=self._executor, **kwargs)
+
+    def _get_call_backends(self, kwargs):
         backends = list(self.backend_instances.values())
         _backends = kwargs.pop('backends', None)
         if _backends is not None:
-            if isinstance(_backends, Module):
+            if isinstance(_backends, (Module, LazyBackend)):
                 backends = [_backends]
             elif isinstance(_backends, basestring):
                 if len(_backends) > 0:
@@ -277,11 +335,7 @@ def do(self, function, *args, **kwargs):
             caps = kwargs.pop('caps')
             backends = [backend for backend in backends if backend.has_caps(caps)]
 
-        # The return value MUST BE the BackendsCall instance. Please never iterate
-        # here on this object, because caller might want to use other methods, like
-        # wait() on callback_thread().
-        # Thanks a lot.
-        return BackendsCall(backends, function, *args, **kwargs)
+        return backends
 
     def schedule(self, interval, function, *args):
         """
@@ -431,10 +485,16 @@ def update(self, progress=PrintProgress()):
         self.repositories.update(progress)
 
         modules_to_check = set([module_name for _, module_name, _ in self.backends_config.iter_backends()])
+        to_install = []
         for module_name in modules_to_check:
             minfo = self.repositories.get_module_info(module_name)
             if minfo and not minfo.is_installed():
-                self.repositories.install(minfo, progress)
+                to_install.append(minfo)
+
+        if to_install:
+            errors = self.repositories.install_modules(to_install, progress)
+            if errors:
+                raise next(iter(errors.values()))
 
     def build_backend(self, module_name, params=None, storage=None, name=None, nofail=False):
         """
@@ -460,7 +520,7 @@ def build_backend(self, module_name, params=None, storage=None, name=None, nofai
 
         return super(Woob, self).build_backend(module_name, params, storage, name, nofail)
 
-    def load_backends(self, caps=None, names=None, modules=None, exclude=None, storage=None, errors=None):
+    def load_backends(self, caps=None, names=None, modules=None, exclude=None, storage=None, errors=None, lazy=False):
         """
         Load backends listed in config file.
 
@@ -476,6 +536,9 @@ def load_backends(self, caps=None, names=None, modules=None, exclude=None, stora
         :type storage: :class:`woob.tools.storage.IStorage`
         :param errors: if specified, store every errors in this list
         :type errors: list[:class:`LoadError`]
+        :param lazy: if True, modules are only imported, installed and built
+                     when backends are used (see :class:`woob.tools.backend.LazyBackend`)
+        :type lazy: bool
         :returns: loaded backends
         :rtype: dict[:class:`str`, :class:`woob.tools.backend.Module`]
         """
@@ -503,6 +566,16 @@ def load_backends(self, caps=None, names=None, modules=None, exclude=None, stora
             if caps is not None and not minfo.has_caps(caps):
                 continue
 
+            if lazy:
+                if backend_name in self.backend_instances:
+                    self.logger.warning(u'Oops, the backend "%s" is already loaded. Unload it before reloading...',
+                                        backend_name)
+                    self.unload_backends(backend_name)
+
+                self.backend_instances[backend_name] = loaded[backend_name] = \
+                    LazyBackend(self, backend_name, minfo, params, storage)
+                continue
+
             if not minfo.is_installed():
                 self.repositories.install(minfo)
 
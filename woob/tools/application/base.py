@@ -28,10 +28,12 @@
 import os
 import sys
 import warnings
+from itertools import islice
 
 from woob.capabilities.base import ConversionWarning, BaseObject
 from woob.core import Woob, CallErrors
 from woob.core.backendscfg import BackendsConfig
+from woob.tools.backend import LazyBackend
 from woob.tools.config.iconfig import ConfigError
 from woob.exceptions import FormFieldConversionWarning
 from woob.tools.log import createColoredFormatter, getLogger, DEBUG_FILTERS, settings as log_settings
@@ -99,6 +101,14 @@ class Application(object):
     STORAGE = {}
     """Default storage tree"""
 
+    STORAGE_CLASS = None
+    """Storage class (if None, use :class:`woob.tools.storage.StandardStorage`)
+
+    :class:`woob.tools.storage.ShardedStorage` stores data of each backend
+    in its own file, and :class:`woob.tools.storage.SQLiteStorage` in its
+    own table of a SQLite database.
+    """
+
     SYNOPSIS = 'Usage: %prog [-h] [-dqv] [-b backends] ...\n'
     SYNOPSIS += '       %prog [--help] [--version]'
     """Synopsis"""
@@ -115,6 +125,10 @@ class Application(object):
     DEBUG_FILTER = 2
     """Verbosity of DEBUG"""
 
+    FILL_BATCH_SIZE = 50
+    """Maximum number of results filled at once, by backends which support
+    it (see :attr:`woob.tools.backend.Module.BATCH_OBJECTS`)"""
+
     stdin = sys.stdin
     stdout = sys.stdout
     stderr = sys.stderr
@@ -185,6 +199,8 @@ def __init__(self, option_parser=None):
         logging_options.add_option('--logging-file', action='store', type='string', dest='logging_file', help='file to save logs')
         logging_options.add_option('-a', '--save-responses', action='store_true', help='save every response')
         logging_options.add_option('--export-session', action='store_true', help='log browser session cookies after login')
+        logging_options.add_option('--cache-stats', action='store_true',
+                                   help='display HTTP cache stats of backends before exiting')
         self._parser.add_option_group(logging_options)
         self._parser.add_option('--shell-completion', action='store_true', help=optparse.SUPPRESS_HELP)
         self._is_default_count = True
@@ -194,8 +210,22 @@ def guess_encoding(self, stdio=None):
 
     def deinit(self):
         self.woob.want_stop()
+        if self.options is not None and self.options.cache_stats:
+            self.print_cache_stats()
         self.woob.deinit()
 
+    def print_cache_stats(self):
+        """
+        Display HTTP cache stats of loaded backends on stderr.
+        """
+        for backend in self.woob.iter_backends():
+            # do not load a lazy backend only to find it has no stats
+            if isinstance(backend, LazyBackend) and not backend.is_loaded():
+                continue
+            stats = backend.get_cache_stats()
+            if stats is not None:
+                print(u'HTTP cache stats of %s: %s' % (backend.name, stats), file=self.stderr)
+
     def _get_preferred_path(self, preferred, legacy):
         try:
             os.lstat(preferred)
@@ -221,12 +251,14 @@ def create_storage(self, path=None, klass=None, localonly=False):
 
         :param path: An optional specific path
         :type path: :class:`str`
-        :param klass: What class to instance
+        :param klass: What class to instance (default is :attr:`STORAGE_CLASS`)
         :type klass: :class:`woob.tools.storage.IStorage`
         :param localonly: If True, do not set it on the :class:`Woob` object.
         :type localonly: :class:`bool`
         :rtype: :class:`woob.tools.storage.IStorage`
         """
+        if klass is None:
+            klass = self.STORAGE_CLASS
         if klass is None:
             from woob.tools.storage import StandardStorage
             klass = StandardStorage
@@ -322,11 +354,46 @@ def _do_complete_obj(self, backend, fields, obj):
             obj = backend.fillobj(obj, fields) or obj
         return obj
 
+    def _do_complete_objs(self, backend, fields, objs):
+        to_fill = []
+        for obj in objs:
+            if isinstance(obj, BaseObject):
+                obj.backend = backend.name
+                to_fill.append(obj)
+
+        if to_fill and (fields is None or len(fields) > 0):
+            filled = iter(backend.fillobjs(to_fill, fields))
+            objs = [next(filled) if isinstance(obj, BaseObject) else obj for obj in objs]
+        return objs
+
+    def _iter_completed(self, backend, count, fields, res):
+        if not backend.BATCH_OBJECTS or (fields is not None and len(fields) == 0):
+            for sub in res:
+                yield self._do_complete_obj(backend, fields, sub)
+            return
+
+        res = iter(res)
+        i = 0
+        while True:
+            # never fill more results than _do_complete_iter may use
+            size = self.FILL_BATCH_SIZE
+            if count:
+                size = max(min(size, count - i + 1), 1)
+            if self.condition and self.condition.limit:
+                size = min(size, self.condition.limit - i + 1)
+
+            batch = list(islice(res, size))
+            if not batch:
+                return
+
+            i += len(batch)
+            for sub in self._do_complete_objs(backend, fields, batch):
+                yield sub
+
     def _do_complete_iter(self, backend, count, fields, res):
         modif = 0
 
-        for i, sub in enumerate(res):
-            sub = self._do_complete_obj(backend, fields, sub)
+        for i, sub in enumerate(self._iter_completed(backend, count, fields, res)):
             if self.condition and self.condition.limit and \
                self.condition.limit == i:
                 return
@@ -434,6 +501,7 @@ def parse_args(self, args):
 
         # this only matters to developers
         if not self.options.debug and not self.options.save_responses:
+            BaseObject.WARN_CONVERSIONS = False
             warnings.simplefilter('ignore', category=ConversionWarning)
             warnings.simplefilter('ignore', category=FormFieldConversionWarning)
 
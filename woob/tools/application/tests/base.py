@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+
+# Copyright(C) 2021 The Woob Team
+#
+# This file is part of woob.
+#
+# woob is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# woob is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with woob. If not, see <http://www.gnu.org/licenses/>.
+
+import logging
+import warnings
+from unittest import TestCase
+
+from woob.capabilities.base import BaseObject, ConversionWarning, IntField, StringField
+from woob.core.woob import WoobBase
+from woob.tools.application.base import Application, MoreResultsAvailable
+from woob.tools.application.results import ResultsCondition
+from woob.tools.backend import Module
+
+
+class MyObject(BaseObject):
+    title = StringField('Title')
+    count = IntField('Count')
+
+
+# Module recording how many results are produced, and how they are filled
+class MyModule(Module):
+    NAME = 'mymodule'
+
+    def __init__(self, *args, **kwargs):
+        super(MyModule, self).__init__(*args, **kwargs)
+        self.produced = 0
+        self.batches = []
+
+    def iter_objects(self, count):
+        for i in range(count):
+            self.produced += 1
+            yield MyObject(u'%d' % i)
+
+    def fill_objects(self, objs, fields):
+        self.batches.append(len(objs))
+        for obj in objs:
+            obj.title = u'title %s' % obj.id
+
+    BATCH_OBJECTS = {MyObject: fill_objects}
+
+
+class MyApplication(Application):
+    APPNAME = 'myapp'
+    VERSION = '3.1'
+    CONFDIR = '/nonexistent'
+    FILL_BATCH_SIZE = 4
+
+    def create_woob(self):
+        return WoobBase(modules_path=False)
+
+
+class CompleteTest(TestCase):
+    def setUp(self):
+        self.app = MyApplication()
+        self.app._is_default_count = False
+        self.backend = MyModule(None, 'foo')
+
+    def complete(self, count, fields, total=10):
+        return list(self.app._do_complete(self.backend, count, fields, 'iter_objects', total))
+
+    # Check that all results are filled by batches
+    def test_batches(self):
+        results = self.complete(None, ['title'])
+        self.assertEqual([obj.title for obj in results], [u'title %d' % i for i in range(10)])
+        self.assertEqual([obj.backend for obj in results], ['foo'] * 10)
+        self.assertEqual(self.backend.batches, [4, 4, 2])
+
+    # Check that no results are filled without fields
+    def test_no_fields(self):
+        results = self.complete(None, [])
+        self.assertEqual(len(results), 10)
+        self.assertEqual(self.backend.batches, [])
+
+    # Check that only one more result than `count` is filled
+    def test_count(self):
+        results = self.complete(2, ['title'])
+        self.assertEqual([obj.id for obj in results], [u'0', u'1'])
+        self.assertEqual(self.backend.batches, [3])
+        self.assertEqual(self.backend.produced, 3)
+
+        self.backend.batches = []
+        results = self.complete(6, ['title'])
+        self.assertEqual(len(results), 6)
+        self.assertEqual(self.backend.batches, [4, 3])
+
+    # Check that MoreResultsAvailable is raised after the default count
+    def test_default_count(self):
+        self.app._is_default_count = True
+        iterator = self.app._do_complete(self.backend, 2, ['title'], 'iter_objects', 10)
+        self.assertEqual([next(iterator).id, next(iterator).id], [u'0', u'1'])
+        self.assertRaises(MoreResultsAvailable, next, iterator)
+        self.assertEqual(self.backend.batches, [3])
+
+    # Check that batches are sized with the LIMIT of the condition
+    def test_condition_limit(self):
+        self.app.condition = ResultsCondition('title!=title 1 LIMIT 5')
+        results = self.complete(None, ['title'])
+        self.assertEqual([obj.id for obj in results], [u'0', u'2', u'3', u'4'])
+        self.assertEqual(self.backend.batches, [4, 2])
+        self.assertEqual(self.backend.produced, 6)
+
+    # Check that results filtered by the condition are replaced one by one
+    def test_condition_count(self):
+        self.app.condition = ResultsCondition('title!=title 1')
+        results = self.complete(2, ['title'])
+        self.assertEqual([obj.id for obj in results], [u'0', u'2'])
+        self.assertEqual(self.backend.batches, [3, 1])
+        self.assertEqual(self.backend.produced, 4)
+
+    # Check that other results are kept at their place
+    def test_other_results(self):
+        objs = [MyObject(u'0'), u'foo', None, MyObject(u'1')]
+        results = self.app._do_complete_objs(self.backend, ['title'], objs)
+        self.assertEqual(results[1:3], [u'foo', None])
+        self.assertEqual([results[0].title, results[3].title], [u'title 0', u'title 1'])
+        self.assertEqual(self.backend.batches, [2])
+
+
+class ParseArgsTest(TestCase):
+    def setUp(self):
+        self.warn_conversions = BaseObject.WARN_CONVERSIONS
+        self.logging = (logging.root.handlers, logging.root.level)
+        self.warnings = warnings.catch_warnings()
+        self.warnings.__enter__()
+
+    def tearDown(self):
+        self.warnings.__exit__(None, None, None)
+        logging.root.handlers, level = self.logging
+        logging.root.setLevel(level)
+        BaseObject.WARN_CONVERSIONS = self.warn_conversions
+
+    def convert(self):
+        obj = MyObject(u'1')
+        obj.title = b'title'
+        obj.count = u'42'
+        obj.count = obj.count
+        return obj.title, obj.count
+
+    # Check that conversion warnings are disabled without changing results
+    def test_conversions(self):
+        BaseObject.WARN_CONVERSIONS = True
+        warnings.simplefilter('always', ConversionWarning)
+        with warnings.catch_warnings(record=True) as caught:
+            expected = self.convert()
+        self.assertEqual(len(caught), 2)
+
+        MyApplication().parse_args(['myapp'])
+        self.assertFalse(BaseObject.WARN_CONVERSIONS)
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always', ConversionWarning)
+            conversions = BaseObject.CONVERSIONS[('MyObject', 'count')]
+            self.assertEqual(self.convert(), expected)
+        self.assertEqual(caught, [])
+        self.assertEqual(BaseObject.CONVERSIONS[('MyObject', 'count')], conversions + 1)
@@ -18,6 +18,7 @@
 
 
 import os
+from collections import OrderedDict
 from copy import copy
 from threading import RLock
 
@@ -29,7 +30,44 @@
 from woob.tools.misc import iter_fields
 from woob.tools.value import ValuesDict
 
-__all__ = ['BackendStorage', 'BackendConfig', 'Module']
+__all__ = ['BackendStorage', 'BackendConfig', 'Module', 'LazyBackend']
+
+
+def _not_loaded_or_incomplete(v):
+    return (v is NotLoaded or isinstance(v, BaseObject) and not v.__iscomplete__())
+
+
+def _not_loaded(v):
+    return v is NotLoaded
+
+
+def _filter_missing_fields(obj, fields, check_cb):
+    missing_fields = []
+    if fields is None:
+        # Select all fields
+        if isinstance(obj, BaseObject):
+            fields = [item[0] for item in obj.iter_fields()]
+        else:
+            fields = [item[0] for item in iter_fields(obj)]
+
+    for field in fields:
+        if not hasattr(obj, field):
+            raise FieldNotFound(obj, field)
+        value = getattr(obj, field)
+
+        missing = False
+        if hasattr(value, '__iter__'):
+            for v in (value.values() if isinstance(value, dict) else value):
+                if check_cb(v):
+                    missing = True
+                    break
+        elif check_cb(value):
+            missing = True
+
+        if missing:
+            missing_fields.append(field)
+
+    return missing_fields
 
 
 class BackendStorage(object):
@@ -270,6 +308,20 @@ class Module(object):
     NOT yet filled.
     """
 
+    BATCH_OBJECTS = {}
+    """Supported objects to fill by batches, with :meth:`fillobjs`
+
+    The key is the class and the value the method to call to fill several
+    objects of this class at once, for example with only one request.
+    Method prototype: method(objects, fields)
+    All objects given to a call miss the same fields, and fields are only
+    the one which are NOT yet filled. The method fills objects in place, or
+    returns the list of all filled objects in the same order (a ValueError is
+    raised if it returns another number of objects).
+    It can raise NotImplementedError to let objects be filled one by one
+    with :attr:`OBJECTS`.
+    """
+
     class ConfigError(Exception):
         """
         Raised when the config can't be loaded.
@@ -311,6 +363,9 @@ def __init__(self, woob, name, config=None, storage=None, logger=None, nofail=Fa
         self.storage = BackendStorage(self.name, storage)
         self.storage.load(self.STORAGE)
 
+        # HTTP cache stats of all browsers created by this backend
+        self.cache_stats = None
+
     def dump_state(self):
         if hasattr(self.browser, 'dump_state'):
             self.storage.set('browser_state', self.browser.dump_state())
@@ -323,12 +378,32 @@ def deinit(self):
         if self._browser is None:
             return
 
+        if self.cache_stats is not None:
+            self.logger.debug('HTTP cache stats: %s', self.cache_stats)
+
         try:
             self.dump_state()
         finally:
             if hasattr(self.browser, 'deinit'):
                 self.browser.deinit()
 
+    def get_cache_stats(self):
+        """
+        Get HTTP cache counters of browsers created by this backend.
+
+        A single object is returned, so with ``Woob.do('get_cache_stats')``
+        there is one result per backend using a cache, and its ``backend``
+        attribute is the name of the backend.
+
+        :returns: a snapshot of counters, None if browsers do not use a cache
+        :rtype: :class:`woob.browser.cache.CacheStats`
+        """
+        if self.cache_stats is None:
+            return None
+        stats = self.cache_stats.copy()
+        stats.backend = self.name
+        return stats
+
     @property
     def weboob(self):
         # compatibility property for modules that still use this name
@@ -388,6 +463,13 @@ def create_browser(self, *args, **kwargs):
 
         browser = klass(*args, **kwargs)
 
+        if hasattr(browser, 'cache_stats'):
+            from woob.browser.cache import CacheStats
+
+            if self.cache_stats is None:
+                self.cache_stats = CacheStats()
+            browser.cache_stats.parent = self.cache_stats
+
         if hasattr(browser, 'load_state'):
             browser.load_state(self.storage.get('browser_state', default={}))
 
@@ -438,62 +520,162 @@ def fillobj(self, obj, fields=None):
         if obj is None:
             return obj
 
-        def not_loaded_or_incomplete(v):
-            return (v is NotLoaded or isinstance(v, BaseObject) and not v.__iscomplete__())
-
-        def not_loaded(v):
-            return v is NotLoaded
-
-        def filter_missing_fields(obj, fields, check_cb):
-            missing_fields = []
-            if fields is None:
-                # Select all fields
-                if isinstance(obj, BaseObject):
-                    fields = [item[0] for item in obj.iter_fields()]
-                else:
-                    fields = [item[0] for item in iter_fields(obj)]
-
-            for field in fields:
-                if not hasattr(obj, field):
-                    raise FieldNotFound(obj, field)
-                value = getattr(obj, field)
-
-                missing = False
-                if hasattr(value, '__iter__'):
-                    for v in (value.values() if isinstance(value, dict) else value):
-                        if check_cb(v):
-                            missing = True
-                            break
-                elif check_cb(value):
-                    missing = True
+        if isinstance(fields, basestring):
+            fields = (fields,)
+
+        missing_fields = _filter_missing_fields(obj, fields, _not_loaded_or_incomplete)
 
-                if missing:
-                    missing_fields.append(field)
+        if not missing_fields:
+            return obj
 
-            return missing_fields
+        filled = self._fill_one(obj, missing_fields)
+        self._set_not_available(filled, missing_fields if filled is obj else fields)
+        return filled
 
+    def fillobjs(self, objs, fields=None):
+        """
+        Fill several objects with the wanted fields.
+
+        Objects are grouped by class and by missing fields, and each group is
+        filled at once by the method of :attr:`BATCH_OBJECTS` if there is one,
+        or object by object as :meth:`fillobj` does.
+
+        :param objs: objects to fill
+        :type objs: :class:`list`
+        :param fields: what fields to fill; if None, all fields are filled
+        :type fields: :class:`list`
+        :returns: filled objects, in the same order
+        :rtype: :class:`list`
+        """
         if isinstance(fields, basestring):
             fields = (fields,)
 
-        missing_fields = filter_missing_fields(obj, fields, not_loaded_or_incomplete)
+        objs = list(objs)
+        groups = OrderedDict()
+        for i, obj in enumerate(objs):
+            if obj is None:
+                continue
+            missing_fields = _filter_missing_fields(obj, fields, _not_loaded_or_incomplete)
+            if missing_fields:
+                groups.setdefault((type(obj), tuple(missing_fields)), []).append(i)
 
-        if not missing_fields:
-            return obj
+        for (klass, missing_fields), indexes in groups.items():
+            missing_fields = list(missing_fields)
+            filled = self._fill_batch([objs[i] for i in indexes], missing_fields)
+            if filled is None:
+                filled = [self._fill_one(objs[i], missing_fields) for i in indexes]
+
+            for i, obj in zip(indexes, filled):
+                self._set_not_available(obj, missing_fields if obj is objs[i] else fields)
+                objs[i] = obj
 
+        return objs
+
+    def _fill_one(self, obj, missing_fields):
         for key, value in self.OBJECTS.items():
             if isinstance(obj, key):
                 self.logger.debug(u'Fill %r with fields: %s' % (obj, missing_fields))
-                obj = value(self, obj, missing_fields) or obj
-                break
-
-        missing_fields = filter_missing_fields(obj, fields, not_loaded)
+                return value(self, obj, missing_fields) or obj
+        return obj
 
-        # Object is not supported by backend. Do not notice it to avoid flooding user.
-        # That's not so bad.
-        for field in missing_fields:
+    def _fill_batch(self, objs, missing_fields):
+        for key, value in self.BATCH_OBJECTS.items():
+            if isinstance(objs[0], key):
+                self.logger.debug(u'Fill %d %s objects with fields: %s',
+                                  len(objs), type(objs[0]).__name__, missing_fields)
+                try:
+                    filled = value(self, objs, missing_fields)
+                except NotImplementedError:
+                    return None
+                if filled is None:
+                    return objs
+
+                filled = list(filled)
+                if len(filled) != len(objs):
+                    raise ValueError('%s returned %d objects instead of %d' % (value.__name__, len(filled), len(objs)))
+                return filled
+        return None
+
+    def _set_not_available(self, obj, fields):
+        # Fields still missing are not supported by backend. Do not notice
+        # it to avoid flooding user. That's not so bad.
+        for field in _filter_missing_fields(obj, fields, _not_loaded):
             setattr(obj, field, NotAvailable)
 
-        return obj
+
+class LazyBackend(object):
+    """
+    Proxy of a backend, which loads its module and builds the backend the
+    first time it is used.
+
+    Capabilities are checked with information of the repositories index, so
+    selecting backends does not import their module.
+
+    Note that errors of the backend configuration are only raised when the
+    backend is built.
+
+    :param woob: woob instance
+    :type woob: :class:`woob.core.woob.Woob`
+    :param name: name of backend
+    :type name: :class:`str`
+    :param minfo: information of the module in repositories
+    :type minfo: :class:`woob.core.repositories.ModuleInfo`
+    :param config: configuration of backend
+    :type config: :class:`dict`
+    :param storage: storage object
+    :type storage: :class:`woob.tools.storage.IStorage`
+    """
+
+    def __init__(self, woob, name, minfo, config, storage=None):
+        self.name = name
+        self.NAME = minfo.name
+        self.lock = RLock()
+        self._woob = woob
+        self._minfo = minfo
+        self._config = config
+        self._storage = storage
+        self._backend = None
+
+    def __repr__(self):
+        return '<LazyBackend %r>' % self.name
+
+    def __enter__(self):
+        self.lock.acquire()
+
+    def __exit__(self, t, v, tb):
+        self.lock.release()
+
+    def __getattr__(self, name):
+        if name.startswith('__') or name == '_backend':
+            raise AttributeError(name)
+        return getattr(self.get_backend(), name)
+
+    def is_loaded(self):
+        return self._backend is not None
+
+    def get_backend(self):
+        """
+        Get the real backend, and build it if needed.
+
+        :rtype: :class:`Module`
+        """
+        with self.lock:
+            if self._backend is None:
+                module = self._woob.load_or_install_module(self.NAME)
+                backend = module.create_instance(self._woob, self.name, self._config, self._storage)
+                # keep the lock already used by callers of this proxy
+                backend.lock = self.lock
+                self._backend = backend
+            return self._backend
+
+    def has_caps(self, *caps):
+        if self._backend is not None:
+            return self._backend.has_caps(*caps)
+        return self._minfo.has_caps(*caps)
+
+    def deinit(self):
+        if self._backend is not None:
+            self._backend.deinit()
 
 
 class AbstractModuleMissingParentError(Exception):
@@ -22,6 +22,11 @@
 import datetime
 import re
 
+try:
+    from re import _parser as sre_parse
+except ImportError:
+    import sre_parse
+
 from woob.capabilities.bank import Transaction, Account
 from woob.capabilities import NotAvailable, NotLoaded
 from woob.tools.misc import to_unicode
@@ -35,7 +40,7 @@
 
 
 __all__ = [
-    'FrenchTransaction', 'AmericanTransaction',
+    'FrenchTransaction', 'AmericanTransaction', 'PatternsMatcher',
     'sorted_transactions', 'merge_iterators', 'keep_only_card_transactions',
     'omit_deferred_transactions',
 ]
@@ -49,6 +54,217 @@ def __get__(self, obj, owner):
         return self.f(owner)
 
 
+_PATTERN_TYPE = type(re.compile(''))
+
+
+def _head_of_sequence(items):
+    """
+    Get characters a parsed regexp sequence can start with.
+
+    :returns: set of characters, or None if it can start with anything, and
+              whether the sequence can match an empty string
+    :rtype: tuple[set, bool]
+    """
+    chars = set()
+    for op, av in items:
+        head, nullable = _head_of_item(op, av)
+        if head is None:
+            return None, False
+        chars |= head
+        if not nullable:
+            return chars, False
+    return chars, True
+
+
+def _head_of_item(op, av):
+    if op == sre_parse.LITERAL:
+        return {chr(av)}, False
+
+    if op == sre_parse.AT:
+        # re.match() only tries the start of the string
+        if av in (sre_parse.AT_BEGINNING, sre_parse.AT_BEGINNING_STRING):
+            return set(), True
+        return None, False
+
+    if op == sre_parse.IN:
+        chars = set()
+        for op2, av2 in av:
+            if op2 == sre_parse.LITERAL:
+                chars.add(chr(av2))
+            elif op2 == sre_parse.RANGE and av2[1] - av2[0] < 128:
+                chars.update(chr(c) for c in range(av2[0], av2[1] + 1))
+            else:
+                return None, False
+        return chars, False
+
+    if op == sre_parse.SUBPATTERN:
+        # (group, add_flags, del_flags, pattern), or (group, pattern) before python 3.6
+        if len(av) == 4 and (av[1] | av[2]) & sre_parse.SRE_FLAG_IGNORECASE:
+            return None, False
+        return _head_of_sequence(av[-1])
+
+    if op == sre_parse.BRANCH:
+        chars = set()
+        nullable = False
+        for items in av[1]:
+            head, branch_nullable = _head_of_sequence(items)
+            if head is None:
+                return None, False
+            chars |= head
+            nullable = nullable or branch_nullable
+        return chars, nullable
+
+    if op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT, getattr(sre_parse, 'POSSESSIVE_REPEAT', None)):
+        min_count, _, items = av
+        head, nullable = _head_of_sequence(items)
+        return head, nullable or min_count == 0
+
+    return None, False
+
+
+def _literal_runs(items, runs):
+    """
+    Split a parsed regexp sequence in runs of literals matched as is.
+    """
+    for op, av in items:
+        if op == sre_parse.LITERAL:
+            runs[-1].append(chr(av))
+        elif op == sre_parse.SUBPATTERN and not (len(av) == 4 and (av[1] | av[2]) & sre_parse.SRE_FLAG_IGNORECASE):
+            _literal_runs(av[-1], runs)
+        elif runs[-1]:
+            runs.append([])
+
+
+def get_pattern_head(pattern):
+    """
+    Get characters a string has to start with to be matched by a pattern.
+
+    Case-insensitive patterns are only described for ASCII characters.
+
+    >>> sorted(get_pattern_head(re.compile(r'^(VIR(EMENT)?|PRLV) (?P<text>.*)')))
+    ['P', 'V']
+    >>> sorted(get_pattern_head(re.compile(r'^cb', re.IGNORECASE)))
+    ['C', 'c']
+    >>> get_pattern_head(re.compile(r'^(?P<text>.*) CARTE \d+'))
+
+    :param pattern: compiled regexp
+    :returns: characters, or None if the pattern can match any string
+    :rtype: frozenset
+    """
+    if not isinstance(pattern, _PATTERN_TYPE) or not isinstance(pattern.pattern, str):
+        return None
+
+    try:
+        head, nullable = _head_of_sequence(sre_parse.parse(pattern.pattern, pattern.flags))
+    except Exception:
+        return None
+
+    if head is None or nullable:
+        return None
+
+    if pattern.flags & re.IGNORECASE:
+        # some non-ASCII characters match ASCII letters, like the Kelvin sign
+        if any(ord(char) > 127 for char in head):
+            return None
+        head = {variant for char in head for variant in (char.lower(), char.upper())}
+    return frozenset(head)
+
+
+def get_pattern_literal(pattern):
+    """
+    Get the longest string a string has to contain to be matched by a pattern.
+
+    >>> get_pattern_literal(re.compile(r'^(?P<text>.*) PAIEMENT CB (?P<dd>\d{2})'))
+    ' PAIEMENT CB '
+    >>> get_pattern_literal(re.compile(r'^(?P<text>.*)'))
+
+    :param pattern: compiled regexp
+    :returns: literal string, or None if there is no such string
+    :rtype: str
+    """
+    if not isinstance(pattern, _PATTERN_TYPE) or not isinstance(pattern.pattern, str):
+        return None
+    if pattern.flags & re.IGNORECASE:
+        return None
+
+    runs = [[]]
+    try:
+        _literal_runs(sre_parse.parse(pattern.pattern, pattern.flags), runs)
+    except Exception:
+        return None
+
+    literal = max((''.join(run) for run in runs), key=len)
+    return literal or None
+
+
+class PatternsMatcher(object):
+    """
+    Select the patterns of a list that can match a label.
+
+    Patterns are indexed by the first character of the labels they can
+    match, so a label is only tried against the patterns starting with its
+    first character, and the ones starting with anything. Patterns which
+    need a literal string, like ``' PAIEMENT CB '`` in
+    ``'^(?P<text>.*) PAIEMENT CB'``, are skipped without running the regexp
+    when the label doesn't contain it. The order of the list is kept, so the
+    first matching pattern is still the one used.
+
+    >>> matcher = PatternsMatcher([(re.compile(r'^VIR (?P<text>.*)'), 1),
+    ...                            (re.compile(r'^(?P<text>.*) CB'), 2),
+    ...                            (re.compile(r'^CHEQUE'), 3)])
+    >>> [_type for _, _type in matcher.iter_candidates(u'CHEQUE 123')]
+    [3]
+    >>> [_type for _, _type in matcher.iter_candidates(u'VIR SEPA CB')]
+    [1, 2]
+
+    :param patterns: list of tuples of a compiled regexp and the
+                     associated transaction type
+    :type patterns: list
+    """
+
+    def __init__(self, patterns):
+        self.patterns = patterns
+        self.count = len(patterns)
+
+        entries = []
+        heads = []
+        for pattern, _type in patterns:
+            entries.append((pattern, _type, get_pattern_literal(pattern)))
+            heads.append(get_pattern_head(pattern))
+
+        def select(char):
+            return tuple(entry for entry, head in zip(entries, heads)
+                         if head is None
+                         or char in head
+                         or (ord(char) > 127 and entry[0].flags & re.IGNORECASE))
+
+        self.table = {}
+        for char in set().union(*[head for head in heads if head is not None]):
+            self.table[char] = select(char)
+        self.default = tuple(entry for entry, head in zip(entries, heads) if head is None)
+        self.unicode_default = select(u'\x80')
+
+    def is_uptodate(self, patterns):
+        return self.patterns is patterns and self.count == len(patterns)
+
+    def iter_candidates(self, raw):
+        """
+        Iterate on patterns that can match a label, by order of priority.
+
+        :param raw: label
+        :type raw: str
+        :rtype: iter[tuple]
+        """
+        char = raw[:1]
+        entries = self.table.get(char)
+        if entries is None:
+            entries = self.default if char < u'\x80' else self.unicode_default
+
+        for pattern, _type, literal in entries:
+            if literal is None or literal in raw:
+                yield pattern, _type
+
+
 def parse_with_patterns(raw, obj, patterns):
     obj.category = NotAvailable
 
@@ -58,6 +274,9 @@ def parse_with_patterns(raw, obj, patterns):
     else:
         obj.label = raw
 
+    if isinstance(patterns, PatternsMatcher):
+        patterns = patterns.iter_candidates(raw)
+
     for pattern, _type in patterns:
         m = pattern.match(raw)
         if m:
@@ -120,6 +339,19 @@ def __init__(self, id='', *args, **kwargs):
         super(FrenchTransaction, self).__init__(id, *args, **kwargs)
         self._logger = getLogger('FrenchTransaction')
 
+    @classmethod
+    def get_patterns_matcher(klass):
+        """
+        Get the matcher of :attr:`PATTERNS`, built once per class.
+
+        :rtype: :class:`PatternsMatcher`
+        """
+        matcher = klass.__dict__.get('_patterns_matcher')
+        if matcher is None or not matcher.is_uptodate(klass.PATTERNS):
+            matcher = PatternsMatcher(klass.PATTERNS)
+            klass._patterns_matcher = matcher
+        return matcher
+
     @classmethod
     def clean_amount(klass, text):
         """
@@ -190,7 +422,7 @@ def parse(self, date, raw, vdate=None):
         self.raw = to_unicode(raw.replace(u'\n', u' ').strip())
 
         try:
-            parse_with_patterns(self.raw, self, self.PATTERNS)
+            parse_with_patterns(self.raw, self, self.get_patterns_matcher())
         except ParseError as e:
             self._logger.warning('Unable to date in label %r: %s' % (self.raw, e))
 
@@ -242,7 +474,7 @@ def filter(self, date):
 
     @classmethod
     def Raw(klass, *args, **kwargs):
-        patterns = klass.PATTERNS
+        patterns = klass.get_patterns_matcher()
 
         class Filter(CleanText):
             def __call__(self, item):
@@ -21,7 +21,10 @@
 import os
 import sqlite3
 import tempfile
-from collections import Mapping, MutableMapping
+try:
+    from collections.abc import Mapping, MutableMapping
+except ImportError:
+    from collections import Mapping, MutableMapping
 
 import yaml
 
@@ -83,7 +86,7 @@ def __len__(self):
 
     def __delitem__(self, key):
         try:
-            self.config.delete(self, self.base, key)
+            self.config.delete(self.base, key)
         except ConfigError:
             raise KeyError('%s key in %s table not found' % (key, self.base))
 
@@ -94,6 +97,7 @@ def __setitem__(self, key, value):
 class SQLiteConfig(IConfig):
     commit_since_seconds = 3600
     dump_since_seconds = 600
+    journal_mode = None
 
     def __init__(self, path, commit_since_seconds=None, dump_since_seconds=None, last_run=True, logger=None):
         self.path = path
@@ -107,8 +111,11 @@ def __init__(self, path, commit_since_seconds=None, dump_since_seconds=None, las
             self.dump = time_buffer(since_seconds=self.dump_since_seconds, last_run=last_run, logger=logger)(self.dump)
 
     def load(self, default={}, optimize=True):
-        self.storage = sqlite3.connect(self.path)
+        # callers using several threads have to serialize accesses
+        self.storage = sqlite3.connect(self.path, check_same_thread=False)
         self.storage.execute('PRAGMA page_size = 4096')
+        if self.journal_mode:
+            self.storage.execute('PRAGMA journal_mode = %s' % self.journal_mode)
         if optimize:
             self.storage.execute('VACUUM')
             self.storage.execute('REINDEX')
@@ -231,6 +238,7 @@ def delete(self, *args):
             if table in self._tables:
                 cur = self.storage.cursor()
                 cur.execute('DROP TABLE %s;' % table)
+                self._tables.discard(table)
             else:
                 raise ConfigError()
         else:
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+
+# Copyright(C) 2021 The Woob Team
+#
+# This file is part of woob.
+#
+# woob is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# woob is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with woob. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Measure the time spent importing modules.
+
+Set the ``WOOB_PROFILE_IMPORTS`` environment variable to get a report of the
+slowest imports of the ``woob`` command on stderr, when it exits. Its value
+is the number of modules to report, or any other value to report the 30
+slowest ones::
+
+    $ WOOB_PROFILE_IMPORTS=10 woob bank list
+"""
+
+import atexit
+import os
+import sys
+import time
+
+
+__all__ = ['ImportProfiler', 'profile_imports_from_env']
+
+
+ENV_VARIABLE = 'WOOB_PROFILE_IMPORTS'
+
+
+class _TimedLoader(object):
+    def __init__(self, profiler, loader):
+        self._profiler = profiler
+        self._loader = loader
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        self._profiler.enter(module.__name__)
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._profiler.leave()
+
+
+class ImportProfiler(object):
+    """
+    Record time of modules imported while it is installed.
+
+    The cumulative time of a module includes the imports it does, its self
+    time excludes them. Modules already imported before :meth:`install` are
+    not recorded.
+    """
+
+    def __init__(self):
+        self.cumulative = {}
+        self.self_time = {}
+        self._stack = []
+
+    def find_spec(self, fullname, path=None, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, 'find_spec'):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is None:
+                continue
+            if spec.loader is not None and hasattr(spec.loader, 'exec_module'):
+                spec.loader = _TimedLoader(self, spec.loader)
+            return spec
+        return None
+
+    def install(self):
+        if self not in sys.meta_path:
+            sys.meta_path.insert(0, self)
+
+    def uninstall(self):
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+
+    def enter(self, name):
+        self._stack.append([name, time.perf_counter(), 0])
+
+    def leave(self):
+        name, start, children = self._stack.pop()
+        elapsed = time.perf_counter() - start
+        self.cumulative[name] = elapsed
+        self.self_time[name] = elapsed - children
+        if self._stack:
+            self._stack[-1][2] += elapsed
+
+    def report(self, limit=30, stream=None):
+        """
+        Write the slowest imports, by cumulative time.
+
+        :param limit: number of modules to write
+        :type limit: int
+        :param stream: output, stderr by default
+        """
+        if stream is None:
+            stream = sys.stderr
+
+        names = sorted(self.cumulative, key=self.cumulative.get, reverse=True)
+        stream.write('%d modules imported in %.1f ms\n'
+                     % (len(names), sum(self.self_time.values()) * 1000))
+        stream.write('%10s %10s  %s\n' % ('self (ms)', 'cumul (ms)', 'module'))
+        for name in names[:limit]:
+            stream.write('%10.1f %10.1f  %s\n' % (self.self_time[name] * 1000, self.cumulative[name] * 1000, name))
+
+
+def profile_imports_from_env():
+    """
+    Profile imports if the ``WOOB_PROFILE_IMPORTS`` environment variable
+    is set, and report them when the process exits.
+
+    :returns: the profiler, or None if imports are not profiled
+    :rtype: :class:`ImportProfiler`
+    """
+    value = os.environ.get(ENV_VARIABLE)
+    if not value:
+        return None
+
+    try:
+        limit = int(value)
+    except ValueError:
+        limit = 30
+
+    profiler = ImportProfiler()
+    profiler.install()
+    atexit.register(profiler.report, limit)
+    return profiler
@@ -32,7 +32,7 @@ def __setitem__(self, key, value):
 
     def __getitem__(self, key):
         value = super(LRUDict, self).__getitem__(key)
-        self[key] = value
+        self.move_to_end(key)
         return value
 
 
@@ -18,10 +18,27 @@
 # along with woob. If not, see <http://www.gnu.org/licenses/>.
 
 
+import atexit
+import os
+import re
+import tempfile
+from contextlib import contextmanager
 from copy import deepcopy
+from threading import RLock
 
+import yaml
+
+from .compat import quote
+from .config.iconfig import ConfigError
+from .config.sqliteconfig import SQLiteConfig
+from .config.util import LOGGER, replace
 from .config.yamlconfig import YamlConfig
 
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
 
 class IStorage(object):
     def load(self, what, name, default={}):
@@ -81,3 +98,289 @@ def delete(self, what, name, *args):
 
     def get(self, what, name, *args, **kwargs):
         return self.config.get(what, name, *args, **kwargs)
+
+
+class ShardedStorage(IStorage):
+    """
+    Storage with one YAML file per backend.
+
+    Files are written in the ``<path>.d`` directory, and saving a backend
+    only rewrites its own file, and only if its data changed. Writes are
+    locked across processes when the platform supports it.
+
+    When a backend has no file yet, its data is read from the single file
+    of :class:`StandardStorage` at `path`, if any, so this class can be
+    given to :meth:`woob.tools.application.base.Application.create_storage`
+    in place of :class:`StandardStorage`.
+
+    :param path: path of the :class:`StandardStorage` file
+    :type path: str
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.dirname = '%s.d' % path
+        self.shards = {}
+        self.saved = {}
+        self.legacy = None
+        self.lock = RLock()
+
+    def get_shard_path(self, what, name):
+        return os.path.join(self.dirname, quote(what, safe=''), '%s.yaml' % quote(name, safe=''))
+
+    def _get_legacy(self, what, name):
+        if self.legacy is None:
+            self.legacy = {}
+            if os.path.isfile(self.path):
+                config = YamlConfig(self.path)
+                config.load()
+                self.legacy = config.values
+        return deepcopy(self.legacy.get(what, {}).get(name, {}))
+
+    def _read_shard(self, what, name):
+        config = YamlConfig(self.get_shard_path(what, name))
+        try:
+            with open(config.path, 'r') as f:
+                data = f.read()
+        except IOError:
+            config.values = self._get_legacy(what, name)
+        else:
+            config.values = yaml.load(data, Loader=config.LOADER) or {}
+            self.saved[(what, name)] = data
+        return config
+
+    def _get_shard(self, what, name):
+        with self.lock:
+            if (what, name) not in self.shards:
+                self.shards[(what, name)] = self._read_shard(what, name)
+            return self.shards[(what, name)]
+
+    def load(self, what, name, default={}):
+        with self.lock:
+            config = self._read_shard(what, name)
+            values = config.values
+            config.values = deepcopy(default)
+            config.values.update(values)
+            self.shards[(what, name)] = config
+
+    @contextmanager
+    def _locked(self):
+        with self.lock:
+            if fcntl is None:
+                yield
+                return
+
+            with open(os.path.join(self.dirname, '.lock'), 'a') as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def save(self, what, name):
+        with self.lock:
+            config = self.shards.get((what, name))
+            if config is None:
+                return
+
+            data = yaml.dump(config.values, Dumper=config.DUMPER, default_flow_style=False)
+            if data == self.saved.get((what, name)):
+                return
+
+            dirname = os.path.dirname(config.path)
+            if not os.path.isdir(dirname):
+                os.makedirs(dirname)
+
+            with self._locked():
+                # write in a temporary file to avoid corruption problems
+                with tempfile.NamedTemporaryFile(mode='w', dir=dirname, delete=False, encoding='utf-8') as f:
+                    f.write(data)
+                replace(f.name, config.path)
+
+            self.saved[(what, name)] = data
+            LOGGER.debug(u'Storage file saved: %s.' % config.path)
+
+    def set(self, what, name, *args):
+        config = self._get_shard(what, name)
+        if len(args) == 1:
+            config.values = args[0]
+        else:
+            config.set(*args)
+
+    def delete(self, what, name, *args):
+        config = self._get_shard(what, name)
+        if args:
+            config.delete(*args)
+        else:
+            config.values = {}
+
+    def get(self, what, name, *args, **kwargs):
+        config = self._get_shard(what, name)
+        if not args:
+            return config.values
+        return config.get(*args, **kwargs)
+
+
+class SQLiteStorage(IStorage):
+    """
+    Storage in a SQLite database, with one table per backend.
+
+    The database is written at ``<path>.sqlite``, in WAL mode so several
+    processes can read it while one of them writes. Each row of a table
+    stores a top-level key of the backend data, so saving a backend only
+    writes its changed keys, and all of them in one transaction.
+
+    Like with the other storages, data of a backend is read once and kept
+    in memory, values returned by :meth:`get` can be changed in place, and
+    changes are written by :meth:`save`.
+
+    When the database does not exist yet, the data of the single file of
+    :class:`StandardStorage` at `path` is imported into it.
+
+    :param path: path of the :class:`StandardStorage` file
+    :type path: str
+    :param commit_since_seconds: if set, changes are only committed when
+                                 the last commit is older than this delay,
+                                 and at exit
+    :type commit_since_seconds: int
+    """
+
+    def __init__(self, path, commit_since_seconds=0):
+        self.path = path
+        self.dbpath = '%s.sqlite' % path
+        self.commit_since_seconds = commit_since_seconds
+        self.tables = {}
+        self.saved = {}
+        self.lock = RLock()
+
+        migrate = not os.path.exists(self.dbpath) and os.path.isfile(path)
+
+        self.config = SQLiteConfig(self.dbpath, logger=LOGGER)
+        # dumps of the whole database are useless here
+        self.config.dump_since_seconds = 0
+        self.config.journal_mode = 'WAL'
+        self.config.load(optimize=False)
+
+        if migrate:
+            self.migrate(path)
+
+        if self.commit_since_seconds:
+            atexit.register(self.close)
+
+    @staticmethod
+    def get_table(what, name):
+        """
+        Get name of the table storing data of an item.
+
+        >>> SQLiteStorage.get_table('backends', 'my-bank_1')
+        'backends__my_2dbank_5f1'
+        """
+        def escape(part):
+            return re.sub(r'[^a-zA-Z0-9]', lambda m: '_%02x' % ord(m.group(0)), part)
+
+        return '%s__%s' % (escape(what), escape(name))
+
+    def migrate(self, path):
+        """
+        Import data of a :class:`StandardStorage` file.
+
+        :param path: path of the YAML file
+        :type path: str
+        """
+        legacy = YamlConfig(path)
+        legacy.load()
+
+        with self.lock:
+            for what, items in legacy.values.items():
+                for name, values in (items or {}).items():
+                    if not isinstance(values, dict):
+                        continue
+
+                    table = self.get_table(what, name)
+                    self.config.ensure_table(table)
+                    for key, value in values.items():
+                        self.config.set(table, key, value)
+            self.config.commit(since_seconds=0)
+
+        LOGGER.info(u'Storage %s migrated to %s.' % (path, self.dbpath))
+
+    def _dump(self, value):
+        return yaml.dump(value, None, Dumper=YamlConfig.DUMPER, default_flow_style=False)
+
+    def _read_table(self, what, name):
+        # wrap the values in a YamlConfig to use its lookups in nested dicts
+        table = self.get_table(what, name)
+        self.config.ensure_table(table)
+        config = YamlConfig(None)
+        config.values = dict(self.config.items(table))
+        self.saved[(what, name)] = dict((key, self._dump(value)) for key, value in config.values.items())
+        return config
+
+    def _get_table(self, what, name):
+        with self.lock:
+            if (what, name) not in self.tables:
+                self.tables[(what, name)] = self._read_table(what, name)
+            return self.tables[(what, name)]
+
+    def load(self, what, name, default={}):
+        with self.lock:
+            config = self._read_table(what, name)
+            for key, value in default.items():
+                if key not in config.values:
+                    config.values[key] = deepcopy(value)
+            self.tables[(what, name)] = config
+
+    def save(self, what, name):
+        with self.lock:
+            config = self.tables.get((what, name))
+            if config is not None:
+                table = self.get_table(what, name)
+                saved = self.saved.setdefault((what, name), {})
+                self.config.ensure_table(table)
+                for key, value in config.values.items():
+                    data = self._dump(value)
+                    if data != saved.get(key):
+                        self.config.set(table, key, value)
+                        saved[key] = data
+                for key in set(saved) - set(config.values):
+                    self.config.delete(table, key)
+                    del saved[key]
+
+            self.config.commit(since_seconds=self.commit_since_seconds)
+
+    def set(self, what, name, *args):
+        config = self._get_table(what, name)
+        with self.lock:
+            if len(args) == 1:
+                config.values = args[0]
+            else:
+                config.set(*args)
+
+    def delete(self, what, name, *args):
+        config = self._get_table(what, name)
+        with self.lock:
+            if args:
+                config.delete(*args)
+            else:
+                config.values = {}
+
+    def get(self, what, name, *args, **kwargs):
+        config = self._get_table(what, name)
+        if not args:
+            return config.values
+
+        try:
+            return config.get(*args, **kwargs)
+        except ConfigError:
+            raise ConfigError('%s not found in %s' % ('.'.join(map(str, args)), self.get_table(what, name)))
+
+    def close(self):
+        """
+        Commit pending changes and close the database.
+        """
+        with self.lock:
+            if self.config.storage is None:
+                return
+            self.config.commit(since_seconds=0)
+            self.config.storage.close()
+            self.config.storage = None
@@ -0,0 +1,253 @@
+# -*- coding: utf-8 -*-
+
+# Copyright(C) 2021 The Woob Team
+#
+# This file is part of woob.
+#
+# woob is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# woob is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with woob. If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import shutil
+import sys
+import tempfile
+from unittest import TestCase
+
+from woob.capabilities.bank import CapBank
+from woob.capabilities.base import BaseObject, NotAvailable, NotLoaded, StringField
+from woob.capabilities.messages import CapMessages
+from woob.core import CallErrors, Woob
+from woob.core.repositories import IProgress
+from woob.tools.backend import LazyBackend, Module
+
+
+MODULE_NAME = 'woobtestlazy'
+
+MODULE_SOURCE = '''
+from woob.capabilities.bank import CapBank
+from woob.tools.backend import BackendConfig, Module
+from woob.tools.value import Value
+
+BUILT = []
+
+
+class LazyModule(Module, CapBank):
+    NAME = 'woobtestlazy'
+    DESCRIPTION = u'Lazy bank'
+    VERSION = '3.1'
+    CONFIG = BackendConfig(Value('login'))
+
+    def __init__(self, *args, **kwargs):
+        super(LazyModule, self).__init__(*args, **kwargs)
+        BUILT.append(self.name)
+
+    def iter_accounts(self):
+        return [self.name]
+'''
+
+
+class MyObject(BaseObject):
+    title = StringField('Title')
+    content = StringField('Content')
+
+
+class MyOtherObject(BaseObject):
+    title = StringField('Title')
+    content = StringField('Content')
+
+
+# Module filling MyObject by batches, and recording calls of its fillers
+class MyModule(Module):
+    NAME = 'mymodule'
+
+    def __init__(self, *args, **kwargs):
+        super(MyModule, self).__init__(*args, **kwargs)
+        self.calls = []
+        self.batch_mode = 'inplace'
+
+    def fill_object(self, obj, fields):
+        self.calls.append(('one', obj.id, fields))
+        if 'title' in fields:
+            obj.title = u'title %s' % obj.id
+        return obj
+
+    def fill_objects(self, objs, fields):
+        self.calls.append(('batch', [obj.id for obj in objs], fields))
+        if self.batch_mode == 'notimplemented':
+            raise NotImplementedError()
+
+        filled = []
+        for obj in objs:
+            if self.batch_mode == 'copy':
+                obj = MyObject(obj.id)
+            if 'title' in fields:
+                obj.title = u'batch title %s' % obj.id
+            filled.append(obj)
+
+        if self.batch_mode == 'short':
+            return filled[:-1]
+        if self.batch_mode == 'copy':
+            return filled
+
+    OBJECTS = {MyObject: fill_object, MyOtherObject: fill_object}
+    BATCH_OBJECTS = {MyObject: fill_objects}
+
+
+class FillObjsTest(TestCase):
+    def setUp(self):
+        self.backend = MyModule(None, 'foo')
+
+    # Check that objects missing the same fields are filled at once
+    def test_batch(self):
+        objs = [MyObject(u'1'), None, MyObject(u'2'), MyObject(u'3')]
+        objs[2].title = u'known'
+        filled = self.backend.fillobjs(objs, ['title'])
+
+        self.assertEqual(self.backend.calls, [('batch', [u'1', u'3'], ['title'])])
+        self.assertIs(filled[0], objs[0])
+        self.assertIsNone(filled[1])
+        self.assertEqual([obj.title for obj in filled if obj], [u'batch title 1', u'known', u'batch title 3'])
+
+    # Check that objects are grouped by class and by missing fields
+    def test_groups(self):
+        objs = [MyObject(u'1'), MyOtherObject(u'2'), MyObject(u'3')]
+        objs[2].content = u'known'
+        self.backend.fillobjs(objs, ['title', 'content'])
+
+        self.assertEqual(self.backend.calls, [
+            ('batch', [u'1'], ['title', 'content']),
+            ('one', u'2', ['title', 'content']),
+            ('batch', [u'3'], ['title']),
+        ])
+
+    # Check that fields which are still missing are not available
+    def test_not_available(self):
+        filled = self.backend.fillobjs([MyObject(u'1')])
+        self.assertEqual(filled[0].title, u'batch title 1')
+        self.assertIs(filled[0].content, NotAvailable)
+        self.assertIs(filled[0].url, NotAvailable)
+
+    # Check that objects returned by the batch filler replace the given ones
+    def test_batch_copy(self):
+        self.backend.batch_mode = 'copy'
+        objs = [MyObject(u'1'), MyObject(u'2')]
+        filled = self.backend.fillobjs(objs, ['title'])
+
+        self.assertIsNot(filled[0], objs[0])
+        self.assertEqual([obj.title for obj in filled], [u'batch title 1', u'batch title 2'])
+        self.assertIs(objs[0].title, NotLoaded)
+
+    # Check that objects are filled one by one when the batch filler is not implemented
+    def test_not_implemented(self):
+        self.backend.batch_mode = 'notimplemented'
+        filled = self.backend.fillobjs([MyObject(u'1'), MyObject(u'2')], ['title'])
+
+        self.assertEqual(self.backend.calls, [
+            ('batch', [u'1', u'2'], ['title']),
+            ('one', u'1', ['title']),
+            ('one', u'2', ['title']),
+        ])
+        self.assertEqual([obj.title for obj in filled], [u'title 1', u'title 2'])
+
+    # Check that a batch filler returning less objects than given is an error
+    def test_short_result(self):
+        self.backend.batch_mode = 'short'
+        self.assertRaises(ValueError, self.backend.fillobjs, [MyObject(u'1'), MyObject(u'2')], ['title'])
+
+
+class QuietProgress(IProgress):
+    def progress(self, percent, message):
+        pass
+
+    def error(self, message):
+        raise AssertionError(message)
+
+
+class LazyBackendTest(TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        workdir = os.path.join(self.path, 'work')
+        modules = os.path.join(self.path, 'modules')
+        os.makedirs(workdir)
+        os.makedirs(os.path.join(modules, MODULE_NAME))
+        with open(os.path.join(modules, MODULE_NAME, '__init__.py'), 'w') as f:
+            f.write(MODULE_SOURCE)
+        with open(os.path.join(workdir, 'sources.list'), 'w') as f:
+            f.write('file://%s\n' % modules)
+
+        self.woob = Woob(workdir=workdir, datadir=os.path.join(self.path, 'data'))
+        self.woob.repositories.update(QuietProgress())
+        self.woob.backends_config.add_backend('foo', MODULE_NAME, {'login': 'john'})
+        self.woob.backends_config.add_backend('bar', MODULE_NAME, {})
+
+    def tearDown(self):
+        self.woob.deinit()
+        sys.modules.pop(MODULE_NAME, None)
+        shutil.rmtree(self.path)
+
+    def get_built(self):
+        if MODULE_NAME not in sys.modules:
+            return None
+        return sys.modules[MODULE_NAME].BUILT
+
+    # Check that lazy backends are loaded without importing their module
+    def test_load(self):
+        backends = self.woob.load_backends(lazy=True)
+        self.assertEqual(sorted(backends), ['bar', 'foo'])
+        for backend in backends.values():
+            self.assertIsInstance(backend, LazyBackend)
+            self.assertFalse(backend.is_loaded())
+        self.assertEqual(self.woob.backend_instances, backends)
+        self.assertIsNone(self.get_built())
+
+    # Check that capabilities are checked with the repositories index
+    def test_has_caps(self):
+        self.assertEqual(self.woob.load_backends(caps=[CapMessages], lazy=True), {})
+        backends = self.woob.load_backends(caps=[CapBank], lazy=True)
+        self.assertEqual(sorted(backends), ['bar', 'foo'])
+        self.assertTrue(backends['foo'].has_caps(CapBank))
+        self.assertTrue(backends['foo'].has_caps('CapBank'))
+        self.assertFalse(backends['foo'].has_caps(CapMessages))
+        self.assertEqual(list(self.woob.iter_backends(caps=CapBank)), [backends['bar'], backends['foo']])
+        self.assertIsNone(self.get_built())
+
+    # Check that the backend is built on first use, and only once
+    def test_load_on_access(self):
+        backends = self.woob.load_backends(names=['foo'], lazy=True)
+        backend = backends['foo']
+        self.assertEqual(backend.DESCRIPTION, u'Lazy bank')
+        self.assertTrue(backend.is_loaded())
+        self.assertEqual(self.get_built(), ['foo'])
+        self.assertIsInstance(backend.get_backend(), Module)
+        self.assertIs(backend.get_backend().lock, backend.lock)
+
+        self.assertEqual(list(self.woob.do('iter_accounts')), ['foo'])
+        self.assertTrue(backend.has_caps(CapBank))
+        self.assertEqual(self.get_built(), ['foo'])
+
+    # Check that configuration errors are raised when the backend is built
+    def test_config_error(self):
+        backends = self.woob.load_backends(lazy=True)
+        with self.assertRaises(CallErrors) as cm:
+            list(self.woob.do('iter_accounts', backends=['bar', 'foo']))
+        self.assertEqual([backend.name for backend, _, _ in cm.exception.errors], ['bar'])
+        self.assertIsInstance(cm.exception.errors[0][1], Module.ConfigError)
+        self.assertFalse(backends['bar'].is_loaded())
+        self.assertTrue(backends['foo'].is_loaded())
+
+    # Check that backends which are not built are not deinitialized
+    def test_unload(self):
+        backends = self.woob.load_backends(lazy=True)
+        backends['foo'].get_backend()
+        self.assertEqual(sorted(self.woob.unload_backends()), ['bar', 'foo'])
+        self.assertEqual(self.get_built(), ['foo'])
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+
+# Copyright(C) 2021 The Woob Team
+#
+# This file is part of woob.
+#
+# woob is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# woob is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with woob. If not, see <http://www.gnu.org/licenses/>.
+
+import importlib
+import os
+import shutil
+import sys
+import tempfile
+from io import StringIO
+from unittest import TestCase
+
+from woob.tools.importtime import ImportProfiler
+
+
+# Sources of modules, by file name
+MODULES = {
+    'woobtestimp/__init__.py': '''
+import time
+
+from . import child
+
+time.sleep(0.02)
+''',
+    'woobtestimp/child.py': '''
+import time
+
+time.sleep(0.05)
+''',
+}
+
+
+class ImportProfilerTest(TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        for filename, source in MODULES.items():
+            filename = os.path.join(self.path, filename)
+            if not os.path.isdir(os.path.dirname(filename)):
+                os.makedirs(os.path.dirname(filename))
+            with open(filename, 'w') as f:
+                f.write(source)
+        sys.path.insert(0, self.path)
+        importlib.invalidate_caches()
+
+        self.profiler = ImportProfiler()
+
+    def tearDown(self):
+        self.profiler.uninstall()
+        sys.path.remove(self.path)
+        for name in list(sys.modules):
+            if name.split('.')[0] == 'woobtestimp':
+                del sys.modules[name]
+        shutil.rmtree(self.path)
+
+    # Check that imports of a module are included in its cumulative time only
+    def test_nested(self):
+        self.profiler.install()
+        import woobtestimp
+        self.profiler.uninstall()
+
+        self.assertEqual(woobtestimp.child.__name__, 'woobtestimp.child')
+        self.assertEqual(sorted(self.profiler.cumulative), ['woobtestimp', 'woobtestimp.child'])
+        cumulative = self.profiler.cumulative
+        self_time = self.profiler.self_time
+        self.assertGreaterEqual(self_time['woobtestimp.child'], 0.05)
+        self.assertEqual(cumulative['woobtestimp.child'], self_time['woobtestimp.child'])
+        self.assertGreaterEqual(self_time['woobtestimp'], 0.02)
+        self.assertLess(self_time['woobtestimp'], 0.05)
+        self.assertAlmostEqual(cumulative['woobtestimp'], self_time['woobtestimp'] + cumulative['woobtestimp.child'])
+
+        output = StringIO()
+        self.profiler.report(1, output)
+        lines = output.getvalue().splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(lines[0].startswith('2 modules imported in '))
+        self.assertTrue(lines[2].endswith('  woobtestimp'))
+
+    # Check that the profiler is removed from the finders
+    def test_uninstall(self):
+        self.profiler.install()
+        self.profiler.install()
+        self.assertIs(sys.meta_path[0], self.profiler)
+        self.assertEqual(sys.meta_path.count(self.profiler), 1)
+
+        self.profiler.uninstall()
+        self.assertNotIn(self.profiler, sys.meta_path)
+        import woobtestimp.child  # noqa: F401
+        self.assertEqual(self.profiler.cumulative, {})
@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+
+# Copyright(C) 2021 The Woob Team
+#
+# This file is part of woob.
+#
+# woob is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# woob is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with woob. If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from woob.tools.config.iconfig import ConfigError
+from woob.tools.config.yamlconfig import YamlConfig
+from woob.tools.storage import ShardedStorage, SQLiteStorage
+
+
+# Tests shared by storages, which have to implement create_storage()
+class StorageTests(object):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'storage')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def create_storage(self):
+        raise NotImplementedError()
+
+    def reload(self):
+        storage = self.create_storage()
+        storage.load('backends', 'foo')
+        return storage
+
+    # Check that default values are given on load
+    def test_load_default(self):
+        storage = self.create_storage()
+        storage.load('backends', 'foo', {'seen': [], 'config': {'a': 1}})
+        self.assertEqual(storage.get('backends', 'foo'), {'seen': [], 'config': {'a': 1}})
+        self.assertEqual(storage.get('backends', 'foo', 'config', 'a'), 1)
+
+    # Check that set values are read back, before and after a save
+    def test_set(self):
+        storage = self.create_storage()
+        storage.load('backends', 'foo')
+        storage.set('backends', 'foo', 'config', 'a', 1)
+        storage.set('backends', 'foo', 'seen', [1, 2])
+        self.assertEqual(storage.get('backends', 'foo', 'config', 'a'), 1)
+        self.assertEqual(storage.get('backends', 'foo', 'seen'), [1, 2])
+        storage.save('backends', 'foo')
+
+        storage = self.reload()
+        self.assertEqual(storage.get('backends', 'foo'), {'config': {'a': 1}, 'seen': [1, 2]})
+
+    # Check that all values of an item can be replaced at once
+    def test_set_all(self):
+        storage = self.create_storage()
+        storage.load('backends', 'foo', {'seen': []})
+        storage.set('backends', 'foo', {'config': {'a': 1}})
+        storage.save('backends', 'foo')
+
+        storage = self.reload()
+        self.assertEqual(storage.get('backends', 'foo'), {'config': {'a': 1}})
+
+    # Check that deleted values are not saved anymore
+    def test_delete(self):
+        storage = self.create_storage()
+        storage.load('backends', 'foo', {'seen': [1], 'config': {'a': 1, 'b': 2}})
+        storage.save('backends', 'foo')
+
+        storage.delete('backends', 'foo', 'config', 'a')
+        storage.delete('backends', 'foo', 'seen')
+        storage.save('backends', 'foo')
+        self.assertEqual(self.reload().get('backends', 'foo'), {'config': {'b': 2}})
+
+        storage.delete('backends', 'foo')
+        storage.save('backends', 'foo')
+        self.assertEqual(self.reload().get('backends', 'foo'), {})
+
+    # Check that missing values are the default, and missing paths raise ConfigError
+    def test_get_missing(self):
+        storage = self.create_storage()
+        storage.load('backends', 'foo', {'config': {}})
+        self.assertIsNone(storage.get('backends', 'foo', 'config', 'a'))
+        self.assertEqual(storage.get('backends', 'foo', 'config', 'a', default=42), 42)
+        self.assertRaises(ConfigError, storage.get, 'backends', 'foo', 'other', 'a')
+        self.assertEqual(storage.get('backends', 'foo', 'other', 'a', default=42), 42)
+
+    # Check that values returned by get() can be changed in place
+    def test_mutation(self):
+        storage = self.create_storage()
+        storage.load('backends', 'foo', {'seen': []})
+        storage.get('backends', 'foo', 'seen', default=[]).append(1)
+        storage.get('backends', 'foo')['other'] = 'bar'
+        self.assertEqual(storage.get('backends', 'foo', 'seen'), [1])
+        storage.save('backends', 'foo')
+
+        storage = self.reload()
+        self.assertEqual(storage.get('backends', 'foo'), {'seen': [1], 'other': 'bar'})
+
+    # Check that changes are only written on save
+    def test_reload_without_save(self):
+        storage = self.create_storage()
+        storage.load('backends', 'foo', {'seen': []})
+        storage.save('backends', 'foo')
+        storage.set('backends', 'foo', 'seen', [1])
+        self.assertEqual(self.reload().get('backends', 'foo'), {'seen': []})
+
+    # Check that items are stored apart
+    def test_items(self):
+        storage = self.create_storage()
+        storage.load('backends', 'foo', {'seen': [1]})
+        storage.load('backends', 'foo_bar', {'seen': [2]})
+        storage.load('applications', 'foo', {'seen': [3]})
+        storage.save('backends', 'foo')
+        storage.save('backends', 'foo_bar')
+        storage.save('applications', 'foo')
+
+        storage = self.create_storage()
+        self.assertEqual(storage.get('backends', 'foo', 'seen'), [1])
+        self.assertEqual(storage.get('backends', 'foo_bar', 'seen'), [2])
+        self.assertEqual(storage.get('applications', 'foo', 'seen'), [3])
+
+    # Check that data of the StandardStorage file is read
+    def test_legacy(self):
+        legacy = YamlConfig(self.path)
+        legacy.values = {'backends': {'foo': {'seen': [1]}}}
+        legacy.save()
+
+        storage = self.create_storage()
+        storage.load('backends', 'foo', {'seen': [], 'config': {}})
+        self.assertEqual(storage.get('backends', 'foo'), {'seen': [1], 'config': {}})
+
+
+class ShardedStorageTest(StorageTests, TestCase):
+    def create_storage(self):
+        return ShardedStorage(self.path)
+
+    # Check that only changed items are written
+    def test_save_unchanged(self):
+        storage = self.create_storage()
+        storage.load('backends', 'foo', {'seen': [1]})
+        storage.save('backends', 'foo')
+        path = storage.get_shard_path('backends', 'foo')
+        os.remove(path)
+
+        storage.save('backends', 'foo')
+        self.assertFalse(os.path.exists(path))
+        storage.get('backends', 'foo', 'seen').append(2)
+        storage.save('backends', 'foo')
+        self.assertTrue(os.path.exists(path))
+
+
+class SQLiteStorageTest(StorageTests, TestCase):
+    def setUp(self):
+        super(SQLiteStorageTest, self).setUp()
+        self.storages = []
+
+    def tearDown(self):
+        for storage in self.storages:
+            storage.close()
+        super(SQLiteStorageTest, self).tearDown()
+
+    def create_storage(self):
+        storage = SQLiteStorage(self.path)
+        self.storages.append(storage)
+        return storage
+
+    # Check that only changed rows are written
+    def test_save_unchanged(self):
+        storage = self.create_storage()
+        storage.load('backends', 'foo', {'seen': [1], 'config': {'a': 1}})
+        storage.save('backends', 'foo')
+
+        written = []
+        set_row = storage.config.set
+        storage.config.set = lambda *args: written.append(args[1]) or set_row(*args)
+        storage.save('backends', 'foo')
+        self.assertEqual(written, [])
+        storage.get('backends', 'foo', 'seen').append(2)
+        storage.save('backends', 'foo')
+        self.assertEqual(written, ['seen'])